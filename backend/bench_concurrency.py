@@ -0,0 +1,85 @@
+# backend/bench_concurrency.py - Benchmark request throughput against parallel clients
+import sys
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(__file__))
+
+import uvicorn
+from sqlalchemy import event
+
+import main
+from database import SessionLocal, engine, read_engine
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("BENCH_PORT", "8765"))
+CLIENT_COUNTS = [1, 2, 4, 8, 16]
+DURATION = 2.0  # seconds per measurement
+# Simulated per-query latency, standing in for a database or share on a slow disk/NAS
+QUERY_LATENCY = float(os.environ.get("BENCH_QUERY_LATENCY", "0.02"))
+
+
+def _slow_query(conn, cursor, statement, parameters, context, executemany):
+    time.sleep(QUERY_LATENCY)
+
+
+# GET /projects reads through read_engine; both need the latency or the comparison is meaningless
+for bench_engine in (engine, read_engine):
+    event.listen(bench_engine, "before_cursor_execute", _slow_query)
+
+
+@main.app.get("/bench/blocking-projects")
+async def blocking_projects():
+    """The old pattern: an async endpoint running a synchronous query on the event loop."""
+    db = SessionLocal()
+    try:
+        return main.list_live_projects(db)
+    finally:
+        db.close()
+
+
+def start_server() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(main.app, host=HOST, port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def measure(path: str, clients: int) -> float:
+    """Requests per second achieved by `clients` parallel clients hammering path."""
+    url = f"http://{HOST}:{PORT}{path}"
+    deadline = time.perf_counter() + DURATION
+
+    def client() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        total = sum(pool.map(lambda _: client(), range(clients)))
+    return total / (time.perf_counter() - start)
+
+
+def run_benchmark():
+    server = start_server()
+    try:
+        print(f"Concurrency benchmark: GET /projects, {QUERY_LATENCY * 1000:.0f} ms simulated query latency")
+        print(f"{'clients':>8} {'blocking req/s':>15} {'offloaded req/s':>16}")
+        for clients in CLIENT_COUNTS:
+            blocking = measure("/bench/blocking-projects", clients)
+            offloaded = measure("/projects", clients)
+            print(f"{clients:>8} {blocking:>15.1f} {offloaded:>16.1f}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    run_benchmark()
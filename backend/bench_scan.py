@@ -0,0 +1,91 @@
+# backend/bench_scan.py - Benchmark project discovery against folder count
+import sys
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Project
+from scanner import scan_projects_dir, project_name_from_folder
+
+FOLDER_COUNTS = [100, 1000, 10000]
+
+
+def make_projects_dir(root: Path, count: int) -> Path:
+    """Create count project folders, every other one a VFX project."""
+    projects_dir = root / "Projects"
+    projects_dir.mkdir()
+    for i in range(count):
+        folder = projects_dir / f"24{i:04d}_Project{i}"
+        folder.mkdir()
+        if i % 2 == 0:
+            (folder / "vfx").mkdir()
+    return projects_dir
+
+
+def make_session(root: Path):
+    engine = create_engine(f"sqlite:///{root}/bench.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def legacy_scan(db, projects_dir: Path):
+    """The original serial loop: iterdir, exists/is_dir and one query per folder."""
+    for project_folder in projects_dir.iterdir():
+        if project_folder.is_dir():
+            vfx_folder = project_folder / "vfx"
+            if vfx_folder.exists() and vfx_folder.is_dir():
+                folder_name = project_folder.name
+                existing_project = db.query(Project).filter(Project.folder_name == folder_name).first()
+                if not existing_project:
+                    db.add(Project(
+                        name=project_name_from_folder(folder_name),
+                        folder_name=folder_name,
+                        type="vfx",
+                        client="",
+                        workspace_path=str(project_folder),
+                        shots=[]
+                    ))
+    db.commit()
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_benchmark():
+    print("Project scan benchmark (times in ms)")
+    print(f"{'folders':>8} {'legacy cold':>12} {'legacy warm':>12} {'scan cold':>10} {'scan full':>10} {'no change':>10}")
+
+    for count in FOLDER_COUNTS:
+        root = Path(tempfile.mkdtemp(prefix="scan_bench_"))
+        try:
+            projects_dir = make_projects_dir(root, count)
+
+            legacy_root = root / "legacy"
+            legacy_root.mkdir()
+            legacy_db = make_session(legacy_root)
+            legacy_cold = timed(legacy_scan, legacy_db, projects_dir)
+            legacy_warm = timed(legacy_scan, legacy_db, projects_dir)
+            legacy_db.close()
+
+            db = make_session(root)
+            scan_cold = timed(scan_projects_dir, db, projects_dir)
+            scan_full = timed(scan_projects_dir, db, projects_dir, full=True)
+            no_change = timed(scan_projects_dir, db, projects_dir)
+            db.close()
+
+            print(f"{count:>8} {legacy_cold:>12.1f} {legacy_warm:>12.1f} {scan_cold:>10.1f} {scan_full:>10.1f} {no_change:>10.2f}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
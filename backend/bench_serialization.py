@@ -0,0 +1,97 @@
+# backend/bench_serialization.py - Benchmark response serialization of library item lists
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(__file__))
+
+from fastapi.encoders import jsonable_encoder
+
+import serializers
+from models import LibraryItem
+from serializers import dumps, library_item_serializer
+
+ITEM_COUNT = 10000
+ROUNDS = 5
+
+
+def make_items():
+    now = datetime.utcnow()
+    return [
+        LibraryItem(
+            id=i, library_id=1, name=f"Sunset Hdri {i:05d}", path=f"/library/hdri/sunset_{i:05d}.hdr",
+            preview_path=f"/cache/{i:040x}_256.png", category="hdri", tags=["sunset", "warm", "outdoor"],
+            width=8192, height=4096, file_format="hdr", file_size=150_000_000 + i,
+            created_at=now - timedelta(seconds=i), updated_at=now,
+        )
+        for i in range(ITEM_COUNT)
+    ]
+
+
+def hand_built(items) -> bytes:
+    """The previous path: a dict built field by field, jsonable_encoder, then the stdlib encoder."""
+    rows = [
+        {
+            "id": item.id,
+            "name": item.name,
+            "path": item.path,
+            "preview_path": item.preview_path,
+            "category": item.category,
+            "tags": item.tags,
+            "width": item.width,
+            "height": item.height,
+            "format": item.file_format,
+            "file_size": item.file_size,
+            "created_at": item.created_at.isoformat(),
+            "updated_at": item.updated_at.isoformat()
+        }
+        for item in items
+    ]
+    return json.dumps(jsonable_encoder(rows), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def serializer_stdlib(items) -> bytes:
+    orjson, serializers.orjson = serializers.orjson, None
+    try:
+        return dumps(library_item_serializer.many(items))
+    finally:
+        serializers.orjson = orjson
+
+
+def serializer_fast(items) -> bytes:
+    return dumps(library_item_serializer.many(items))
+
+
+def serializer_fields(items) -> bytes:
+    return dumps(library_item_serializer.many(items, ("id", "name", "preview_path")))
+
+
+def measure(func, items) -> tuple:
+    best = float("inf")
+    size = 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        size = len(func(items))
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def run_benchmark():
+    items = make_items()
+    print(f"Serializing {ITEM_COUNT} library items, best of {ROUNDS}")
+    print(f"orjson: {'installed' if serializers.orjson is not None else 'not installed'}")
+    print(f"{'method':>28} {'ms':>9} {'items/s':>11} {'bytes':>11}")
+    cases = [
+        ("hand-built + jsonable_encoder", hand_built),
+        ("serializer + stdlib json", serializer_stdlib),
+        ("serializer + dumps", serializer_fast),
+        ("serializer, 3 fields", serializer_fields),
+    ]
+    for label, func in cases:
+        elapsed, size = measure(func, items)
+        print(f"{label:>28} {elapsed * 1000:>9.1f} {ITEM_COUNT / elapsed:>11.0f} {size:>11}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,120 @@
+# backend/bench_sqlite.py - Benchmark mixed read/write throughput for the SQLite profile
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import SQLITE_PROFILE, READ_POOL_SIZE, create_sqlite_engine
+from models import Base, Project, Shot
+
+READERS = 8
+WRITERS = 2
+DURATION = 3.0  # seconds per configuration
+SEED_PROJECTS = 2000
+ROWS_PER_WRITE = 20
+
+
+def seed(session_factory):
+    db = session_factory()
+    try:
+        db.add_all(
+            Project(name=f"Project{i}", folder_name=f"seed_{i:05d}", workspace_path=f"/seed/{i}")
+            for i in range(SEED_PROJECTS)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_workload(read_factory, write_factory) -> dict:
+    deadline = time.perf_counter() + DURATION
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            db = read_factory()
+            try:
+                db.query(Project).filter(Project.deleted_at.is_(None)).limit(200).all()
+                db.query(Shot.project_id, func.count(Shot.id)).group_by(Shot.project_id).all()
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+            finally:
+                db.close()
+
+    def writer(worker: int):
+        n = 0
+        while time.perf_counter() < deadline:
+            db = write_factory()
+            try:
+                for _ in range(ROWS_PER_WRITE):
+                    db.add(Project(name="bench", folder_name=f"w{worker}_{n}", workspace_path="/bench"))
+                    n += 1
+                db.commit()
+                bump("writes")
+            except OperationalError:
+                db.rollback()
+                bump("locked")
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer, args=(w,)) for w in range(WRITERS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {key: value / elapsed if key != "locked" else value for key, value in counts.items()}
+
+
+def bench_default(root: Path) -> dict:
+    """SQLite defaults: rollback journal, one engine and session factory for everything."""
+    engine = create_sqlite_engine(f"sqlite:///{root}/default.db", profile=None)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(factory)
+    return run_workload(factory, factory)
+
+
+def bench_profile(root: Path) -> dict:
+    """The configured profile with separate read-only and write engines."""
+    url = f"sqlite:///{root}/profile.db"
+    write_engine = create_sqlite_engine(url, SQLITE_PROFILE)
+    Base.metadata.create_all(bind=write_engine)
+    read_engine = create_sqlite_engine(url, SQLITE_PROFILE, read_only=True, pool_size=READ_POOL_SIZE)
+    write_factory = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    read_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    seed(write_factory)
+    return run_workload(read_factory, write_factory)
+
+
+def run_benchmark():
+    root = Path(tempfile.mkdtemp(prefix="sqlite_bench_"))
+    try:
+        print(f"Mixed read/write benchmark: {READERS} readers, {WRITERS} writers, {DURATION:.0f}s each")
+        print(f"Profile: {SQLITE_PROFILE}")
+        print(f"{'configuration':>15} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+        for label, bench in [("defaults", bench_default), ("profile", bench_profile)]:
+            result = bench(root)
+            print(f"{label:>15} {result['reads']:>10.1f} {result['writes']:>10.1f} {result['locked']:>14}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,228 @@
+# backend/changes.py - Change Log for Incremental Client Sync
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, delete, event, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import ChangeLog, ChangeLogState, Library, LibraryItem, Project, Settings, Tool
+from serializers import library_item_serializer, library_serializer, project_serializer, settings_serializer, tool_serializer
+
+logger = logging.getLogger(__name__)
+
+COMPACT_INTERVAL = float(os.environ.get("PIPELINE_CHANGES_COMPACT_INTERVAL", "3600"))
+RETENTION_DAYS = float(os.environ.get("PIPELINE_CHANGES_RETENTION_DAYS", "30"))
+QUERY_CHUNK_SIZE = 500
+
+PROJECT = "project"
+LIBRARY = "library"
+LIBRARY_ITEM = "library_item"
+TOOL = "tool"
+SETTINGS = "settings"
+
+# Which logged entity a unit-of-work change to each table touches, and the attribute holding its id
+TABLE_ENTITIES = {
+    "projects": (PROJECT, "id"),
+    "shots": (PROJECT, "project_id"),
+    "libraries": (LIBRARY, "id"),
+    "library_items": (LIBRARY_ITEM, "id"),
+    "library_item_tags": (LIBRARY_ITEM, "item_id"),
+    "tools": (TOOL, "id"),
+    "settings": (SETTINGS, "id"),
+}
+
+ENTITY_SERIALIZERS = {
+    PROJECT: (Project, project_serializer),
+    LIBRARY: (Library, library_serializer),
+    LIBRARY_ITEM: (LibraryItem, library_item_serializer),
+    TOOL: (Tool, tool_serializer),
+    SETTINGS: (Settings, settings_serializer),
+}
+
+
+class CursorExpired(Exception):
+    """The cursor predates entries removed by compaction; the client has to reload everything."""
+
+
+def record_changes(db: Session, entity: str, ids: Iterable[int]):
+    """Log ids of entity as changed in db's transaction.
+
+    ORM unit-of-work changes are logged automatically; call this for
+    insert/update/delete statements and bulk_*_mappings.
+    """
+    now = datetime.utcnow()
+    rows = [{"entity": entity, "entity_id": entity_id, "created_at": now} for entity_id in set(ids)]
+    if rows:
+        db.execute(insert(ChangeLog), rows)
+
+
+def record_selected(db: Session, entity: str, ids_select):
+    """Log every id returned by ids_select, a one-column select, without fetching them."""
+    ids = ids_select.subquery()
+    db.execute(insert(ChangeLog).from_select(
+        ["entity", "entity_id", "created_at"],
+        select(literal(entity), *ids.c, literal(datetime.utcnow(), DateTime())),
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed(session, flush_context):
+    keys = set()
+    modified = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in (*session.new, *modified, *session.deleted):
+        target = TABLE_ENTITIES.get(getattr(obj, "__tablename__", None))
+        if target is None:
+            continue
+        entity, attr = target
+        entity_id = getattr(obj, attr)
+        if entity_id is not None:
+            keys.add((entity, entity_id))
+    if keys:
+        now = datetime.utcnow()
+        # Straight to the connection: the log row is part of the same flush
+        session.connection().execute(
+            ChangeLog.__table__.insert(),
+            [{"entity": entity, "entity_id": entity_id, "created_at": now} for entity, entity_id in keys],
+        )
+
+
+def _pruned_through(db: Session) -> int:
+    return db.query(ChangeLogState.pruned_through).scalar() or 0
+
+
+def latest_cursor(db: Session) -> int:
+    """Cursor of the newest change; a client that loads everything afterwards syncs from here."""
+    return max(db.query(func.max(ChangeLog.id)).scalar() or 0, _pruned_through(db))
+
+
+def _load_current(db: Session, entity: str, ids: List[int]) -> Dict[int, dict]:
+    model, serializer = ENTITY_SERIALIZERS[entity]
+    current = {}
+    for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+        for obj in db.query(model).filter(model.id.in_(ids[start:start + QUERY_CHUNK_SIZE])):
+            if entity == PROJECT and obj.deleted_at is not None:
+                continue
+            data = serializer(obj)
+            if entity == LIBRARY_ITEM:
+                data["library_id"] = obj.library_id
+            current[obj.id] = data
+    return current
+
+
+def changes_since(db: Session, since: int, limit: int) -> Tuple[List[dict], int, bool]:
+    """Rows changed after cursor since: (changes, next cursor, whether more follow).
+
+    Each entity appears once, with its current state ("upsert") or as
+    "delete" when it no longer exists, so a row changed many times costs
+    one entry. Raises CursorExpired if entries after since were pruned.
+    """
+    pruned_through = _pruned_through(db)
+    latest = max(db.query(func.max(ChangeLog.id)).scalar() or 0, pruned_through)
+    if since < pruned_through or since > latest:
+        raise CursorExpired()
+
+    cursor = func.max(ChangeLog.id).label("cursor")
+    rows = (
+        db.query(ChangeLog.entity, ChangeLog.entity_id, cursor)
+        .filter(ChangeLog.id > since)
+        .group_by(ChangeLog.entity, ChangeLog.entity_id)
+        .order_by(cursor)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    by_entity: Dict[str, List[int]] = {}
+    for entity, entity_id, _ in rows:
+        by_entity.setdefault(entity, []).append(entity_id)
+    current = {entity: _load_current(db, entity, ids) for entity, ids in by_entity.items() if entity in ENTITY_SERIALIZERS}
+
+    changes = []
+    for entity, entity_id, _ in rows:
+        data = current.get(entity, {}).get(entity_id)
+        if data is None:
+            changes.append({"entity": entity, "id": entity_id, "op": "delete"})
+        else:
+            changes.append({"entity": entity, "id": entity_id, "op": "upsert", "data": data})
+    next_cursor = rows[-1][2] if has_more else latest
+    return changes, next_cursor, has_more
+
+
+def compact_change_log(db: Session, retention_days: float = RETENTION_DAYS) -> dict:
+    """Drop superseded entries and entries older than retention_days. The caller commits.
+
+    Only the newest entry per entity matters, since /changes reports an
+    entity's current state, so removing older ones loses nothing. Pruning
+    by age does: cursors before the pruned entries stop being accepted.
+    """
+    newest = select(func.max(ChangeLog.id)).group_by(ChangeLog.entity, ChangeLog.entity_id)
+    superseded = db.execute(
+        delete(ChangeLog).where(ChangeLog.id.not_in(newest)), execution_options={"synchronize_session": False}
+    ).rowcount
+
+    state = db.query(ChangeLogState).first()
+    if state is None:
+        state = ChangeLogState(pruned_through=0)
+        db.add(state)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    prune_through = db.query(func.max(ChangeLog.id)).filter(ChangeLog.created_at < cutoff).scalar()
+    expired = 0
+    if prune_through:
+        expired = db.execute(
+            delete(ChangeLog).where(ChangeLog.id <= prune_through), execution_options={"synchronize_session": False}
+        ).rowcount
+        state.pruned_through = max(state.pruned_through or 0, prune_through)
+    state.compacted_at = datetime.utcnow()
+    return {"superseded": superseded, "expired": expired, "pruned_through": state.pruned_through}
+
+
+class ChangeLogCompactor:
+    """Compacts the change log on a background thread every interval seconds, starting right away."""
+
+    def __init__(self, interval: float = COMPACT_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-log-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def compact(self) -> dict:
+        db = SessionLocal()
+        try:
+            summary = compact_change_log(db)
+            db.commit()
+            if summary["superseded"] or summary["expired"]:
+                logger.info(f"Compacted change log: {summary}")
+            return summary
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Change log compaction failed: {e}")
+            self._stop.wait(self.interval)
+
+
+change_log_compactor = ChangeLogCompactor()
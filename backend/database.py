@@ -1,7 +1,7 @@
 # backend/database.py - Database Configuration
 import os
 from pathlib import Path
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker
 
 # Database file path
@@ -9,19 +9,77 @@ DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 DATABASE_URL = f"sqlite:///{DATA_DIR}/pipeline.db"
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
-    echo=False  # Set to True for SQL query logging
-)
+# SQLite performance profile. WAL lets readers run while a writer is
+# active, synchronous=NORMAL is durable in WAL mode short of power loss,
+# and the busy timeout makes contending writers wait instead of failing
+# with "database is locked".
+SQLITE_PROFILE = {
+    "journal_mode": os.environ.get("PIPELINE_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("PIPELINE_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("PIPELINE_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.environ.get("PIPELINE_SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB
+    "busy_timeout": int(os.environ.get("PIPELINE_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+WRITE_POOL_SIZE = int(os.environ.get("PIPELINE_DB_WRITE_POOL_SIZE", "5"))
+READ_POOL_SIZE = int(os.environ.get("PIPELINE_DB_READ_POOL_SIZE", "20"))
+MAX_OVERFLOW = int(os.environ.get("PIPELINE_DB_MAX_OVERFLOW", "10"))
 
-# Create SessionLocal class
+
+def create_sqlite_engine(url: str, profile: dict | None = SQLITE_PROFILE, read_only: bool = False,
+                         pool_size: int = WRITE_POOL_SIZE, max_overflow: int = MAX_OVERFLOW):
+    """Create an engine for a SQLite database with the given performance profile.
+
+    Write engines open every transaction with BEGIN IMMEDIATE, so a session
+    takes the write lock up front (waiting up to busy_timeout) rather than
+    failing when it later upgrades a read transaction. Read-only engines set
+    query_only and never take the write lock. profile=None gives a plain
+    engine with SQLite defaults.
+    """
+    if profile is None:
+        return create_engine(url, connect_args={"check_same_thread": False}, echo=False)
+
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": profile["busy_timeout"] / 1000},  # Needed for SQLite
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        echo=False  # Set to True for SQL query logging
+    )
+
+    @event.listens_for(new_engine, "connect")
+    def _apply_profile(dbapi_connection, connection_record):
+        # Let the "begin" handler below issue BEGIN instead of the driver
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous={profile['synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size={int(profile['cache_size'])}")
+        cursor.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(new_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return new_engine
+
+
+# Create SQLAlchemy engines: one for writes, one for concurrent reads
+engine = create_sqlite_engine(DATABASE_URL)
+read_engine = create_sqlite_engine(DATABASE_URL, read_only=True, pool_size=READ_POOL_SIZE)
+
+# Create session classes. SessionLocal is the read/write session; use
+# ReadSessionLocal for anything that only queries.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def get_db():
-    """Dependency to get database session"""
+    """Dependency to get a read/write database session"""
     db = SessionLocal()
     try:
         yield db
@@ -29,6 +87,44 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency to get a read-only database session"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_missing_columns(metadata):
+    """Add columns that exist on the models but not yet in the database.
+
+    SQLite supports ALTER TABLE ... ADD COLUMN for nullable columns, which is
+    all the newer model fields need, so older databases keep working without
+    a full migration.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                print(f"Adding column {table.name}.{column.name}")
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+
+
+def add_missing_indexes(metadata):
+    """Create indexes declared on the models that older databases lack."""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def init_db():
     """Initialize database with tables and sample data"""
     from models import Base, Settings, Library, LibraryItem, Project, Tool
@@ -38,12 +134,15 @@ def init_db():
     inspector = inspect(engine)
     existing_tables = inspector.get_table_names()
     
-    # Only create tables if they don't exist
+    # create_all only creates missing tables, so databases from older
+    # versions pick up newly added tables without touching existing data
     if not existing_tables:
         print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
     else:
-        print("Database tables already exist")
+        print("Database tables already exist, creating any missing tables")
+        add_missing_columns(Base.metadata)
+    Base.metadata.create_all(bind=engine)
+    add_missing_indexes(Base.metadata)
     
     # Get database session
     db = SessionLocal()
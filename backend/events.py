@@ -0,0 +1,111 @@
+# backend/events.py - Coalesced Change Notifications for Connected Clients
+import asyncio
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+from versions import versions
+
+logger = logging.getLogger(__name__)
+
+# Changes arriving within this window go out as one event
+COALESCE_WINDOW = float(os.environ.get("PIPELINE_EVENTS_COALESCE_MS", "500")) / 1000
+# Comment lines sent on idle streams so proxies and clients keep them open
+HEARTBEAT_INTERVAL = 15.0
+
+
+class Subscriber:
+    """One connected client: the latest version of every collection changed since it last read.
+
+    Changes are merged rather than queued, so a slow client gets one
+    event with the newest versions instead of a backlog.
+    """
+
+    def __init__(self):
+        self._changes: Dict[str, int] = {}
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def push(self, changes: Dict[str, int]):
+        self._changes.update(changes)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[Dict[str, int]]:
+        """Changes since the last call, or None if nothing changed within timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        changes, self._changes = self._changes, {}
+        return changes
+
+
+class ChangeBroadcaster:
+    """Fans collection version bumps out to subscribers, at most once per window.
+
+    Bumps arrive on whichever thread committed the write; they are merged
+    under a lock and handed to the event loop by a single delayed flush,
+    so a bulk ingest committing hundreds of batches produces a handful of
+    events.
+    """
+
+    def __init__(self, window: float = COALESCE_WINDOW):
+        self.window = window
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, int] = {}
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Deliver events on loop; called once the server's loop is running."""
+        self._loop = loop
+
+    def publish(self, changes: Dict[str, int]):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._lock:
+            self._pending.update(changes)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        loop.call_soon_threadsafe(loop.call_later, self.window, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            changes, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        for subscriber in self._subscribers:
+            subscriber.push(changes)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[Subscriber]:
+        """Register a subscriber for the duration of the block; use from the event loop."""
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def close(self):
+        """Stop publishing and end every open stream; called on shutdown."""
+        self._loop = None
+        for subscriber in self._subscribers:
+            subscriber.close()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broadcaster = ChangeBroadcaster()
+versions.add_listener(broadcaster.publish)
@@ -0,0 +1,218 @@
+# backend/file_metadata.py - Header-Only Image Metadata for Library Items
+import logging
+import mmap
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from changes import LIBRARY_ITEM, record_changes
+from database import ReadSessionLocal, SessionLocal
+from hdri import HDR_EXTENSIONS, read_hdr_header
+from jobs import Job, JobCancelled, library_jobs
+from models import LibraryItem
+from versions import mark_changed
+
+logger = logging.getLogger(__name__)
+
+METADATA_WORKERS = int(os.environ.get("PIPELINE_METADATA_WORKERS", "8"))
+# Items read, inspected and written back per round
+METADATA_BATCH = 200
+# Seconds between passes that re-stat every item and re-read changed headers
+VERIFY_INTERVAL = float(os.environ.get("PIPELINE_METADATA_VERIFY_INTERVAL", "600"))
+
+EXR_MAGIC = 20000630
+# Header attributes are small; give up on files whose header runs past this
+EXR_MAX_HEADER = 1024 * 1024
+
+
+@dataclass
+class FileMetadata:
+    file_format: str
+    file_size: int
+    file_mtime_ns: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def _read_cstring(data, pos: int, limit: int) -> Tuple[bytes, int]:
+    end = data.find(b"\0", pos, limit)
+    if end < 0:
+        raise ValueError("Truncated EXR header")
+    return data[pos:end], end + 1
+
+
+def read_exr_size(data) -> Tuple[int, int]:
+    """Width and height from the dataWindow attribute of an OpenEXR header.
+
+    Walks the attribute list (name, type, size, value) of the first part
+    without touching any pixel data.
+    """
+    limit = min(len(data), EXR_MAX_HEADER)
+    if limit < 8 or struct.unpack_from("<i", data, 0)[0] != EXR_MAGIC:
+        raise ValueError("Not an OpenEXR file")
+    pos = 8
+    while True:
+        name, pos = _read_cstring(data, pos, limit)
+        if not name:
+            raise ValueError("OpenEXR header has no dataWindow")
+        _type, pos = _read_cstring(data, pos, limit)
+        if pos + 4 > limit:
+            raise ValueError("Truncated EXR header")
+        (size,) = struct.unpack_from("<i", data, pos)
+        pos += 4
+        if name == b"dataWindow":
+            xmin, ymin, xmax, ymax = struct.unpack_from("<4i", data, pos)
+            return xmax - xmin + 1, ymax - ymin + 1
+        pos += size
+
+
+def read_file_metadata(path: str) -> FileMetadata:
+    """Size, mtime, format and resolution of an image, reading only its header.
+
+    The file is memory-mapped, so only the pages holding the header are
+    actually read. Formats without a header parser get size and format only.
+    """
+    stat = os.stat(path)
+    ext = os.path.splitext(path)[1].lower()
+    meta = FileMetadata(file_format=ext.lstrip(".") or "unknown", file_size=stat.st_size,
+                        file_mtime_ns=stat.st_mtime_ns)
+    if stat.st_size == 0 or (ext not in HDR_EXTENSIONS and ext != ".exr"):
+        return meta
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if ext == ".exr":
+                meta.width, meta.height = read_exr_size(data)
+            else:
+                meta.file_format = "hdr"
+                meta.width, meta.height = read_hdr_header(data)[:2]
+    except (ValueError, struct.error) as e:
+        logger.warning(f"Could not read image header of {path}: {e}")
+    return meta
+
+
+def items_needing_metadata(library_id: Optional[int] = None, verify: bool = False) -> List[int]:
+    """Ids of items never inspected, or of all items with verify (only changed files are re-read)."""
+    db = ReadSessionLocal()
+    try:
+        query = db.query(LibraryItem.id)
+        if not verify:
+            query = query.filter(LibraryItem.file_mtime_ns.is_(None))
+        if library_id is not None:
+            query = query.filter(LibraryItem.library_id == library_id)
+        return [row[0] for row in query.order_by(LibraryItem.id)]
+    finally:
+        db.close()
+
+
+def _refresh(item):
+    """Metadata update for one item, None if its file did not change, False if it is missing."""
+    try:
+        if item.file_mtime_ns is not None:
+            stat = os.stat(item.path)
+            if stat.st_mtime_ns == item.file_mtime_ns and stat.st_size == item.file_size:
+                return None
+        meta = read_file_metadata(item.path)
+    except OSError:
+        return False
+    return {
+        "id": item.id,
+        "width": meta.width,
+        "height": meta.height,
+        "file_format": meta.file_format,
+        "file_size": meta.file_size,
+        "file_mtime_ns": meta.file_mtime_ns,
+    }
+
+
+def run_metadata_extraction(job: Job, item_ids: List[int]) -> dict:
+    """Job body: read the headers of changed or new files of item_ids on a thread pool."""
+    summary = {"items": len(item_ids), "updated": 0, "unchanged": 0, "missing": 0}
+    job.update_progress(0, len(item_ids))
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, METADATA_WORKERS), thread_name_prefix="metadata") as pool:
+        for start in range(0, len(item_ids), METADATA_BATCH):
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            db = ReadSessionLocal()
+            try:
+                items = db.query(
+                    LibraryItem.id, LibraryItem.path, LibraryItem.file_size, LibraryItem.file_mtime_ns
+                ).filter(LibraryItem.id.in_(item_ids[start:start + METADATA_BATCH])).all()
+            finally:
+                db.close()
+
+            updates = []
+            for update in pool.map(_refresh, items):
+                if update is False:
+                    summary["missing"] += 1
+                elif update is None:
+                    summary["unchanged"] += 1
+                else:
+                    updates.append(update)
+            if updates:
+                db = SessionLocal()
+                try:
+                    db.bulk_update_mappings(LibraryItem, updates)
+                    mark_changed(db, "libraries")
+                    record_changes(db, LIBRARY_ITEM, [update["id"] for update in updates])
+                    db.commit()
+                finally:
+                    db.close()
+            summary["updated"] += len(updates)
+            done += len(items)
+            job.update_progress(done, len(item_ids))
+            job.stats.update(summary)
+
+    logger.info(f"Metadata extraction finished: {summary}")
+    return summary
+
+
+class MetadataRefresher:
+    """Queues a verify pass over all items every interval seconds, starting right away.
+
+    A pass stats every file and re-reads only headers whose mtime or size
+    changed, so files replaced in place get current resolution, format
+    and size without anyone asking for it.
+    """
+
+    def __init__(self, interval: float = VERIFY_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metadata-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def refresh(self) -> Optional[Job]:
+        """Queue a verify pass; None if there are no items or a pass is still running."""
+        item_ids = items_needing_metadata(verify=True)
+        if not item_ids:
+            return None
+        try:
+            return library_jobs.submit("metadata", run_metadata_extraction, item_ids, key="metadata:all")
+        except ValueError:
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Metadata refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+
+metadata_refresher = MetadataRefresher()
@@ -0,0 +1,224 @@
+# backend/file_serving.py - File Responses with ETags, Ranges and a Thumbnail Cache
+import os
+import re
+import stat as stat_module
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Mapping, Optional, Tuple
+
+from anyio import to_thread
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Thumbnails held in memory, and the largest file that is cached there
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("PIPELINE_THUMBNAIL_MEMORY_MB", "64")) * 1024 * 1024
+THUMBNAIL_MAX_FILE_BYTES = 2 * 1024 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ThumbnailCache:
+    """Bounded in-memory LRU of small files, keyed by path and validator."""
+
+    def __init__(self, max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: Tuple[str, str], data: bytes):
+        if len(data) > THUMBNAIL_MAX_FILE_BYTES or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+thumbnail_cache = ThumbnailCache()
+
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """Strong validator from inode, size and nanosecond mtime."""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison; uses the weak comparison RFC 9110 prescribes for it."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == bare for candidate in if_none_match.split(","))
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single byte range; None to send the whole file.
+
+    Raises ValueError for a range that cannot be satisfied. Multiple ranges
+    are answered with the whole file, which the spec allows.
+    """
+    if not range_header:
+        return None
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class CachedFileResponse(Response):
+    """Serves a file or in-memory bytes with conditional and range request support.
+
+    304 when If-None-Match matches the ETag, 206 for a single satisfiable
+    Range (honouring If-Range), 416 for an unsatisfiable one, 200 otherwise.
+    File bodies go through the ASGI zero-copy send extension when the server
+    offers it and are streamed in chunks from a worker thread otherwise.
+    """
+
+    def __init__(self, request_headers: Mapping[str, str], etag: str, path: Optional[str] = None,
+                 content: Optional[bytes] = None, stat_result: Optional[os.stat_result] = None,
+                 media_type: Optional[str] = None, headers: Optional[Mapping[str, str]] = None):
+        self.path = path
+        self.content = content
+        size = len(content) if content is not None else stat_result.st_size
+        media_type = media_type or guess_type(path or "")[0] or "application/octet-stream"
+        super().__init__(status_code=200, headers=headers, media_type=media_type)
+        self.headers["etag"] = etag
+        self.headers["accept-ranges"] = "bytes"
+        self.headers.setdefault("cache-control", "no-cache")
+        if stat_result is not None:
+            self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+        self.start, self.end = 0, size - 1
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            self.status_code = 304
+            del self.headers["content-length"]
+            return
+
+        if_range = request_headers.get("if-range")
+        try:
+            byte_range = parse_range(request_headers.get("range"), size)
+        except ValueError:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            return
+        if byte_range is not None and (not if_range or if_range.strip() == etag):
+            self.start, self.end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        self.headers["content-length"] = str(max(0, self.end - self.start + 1))
+
+    @property
+    def has_body(self) -> bool:
+        return self.status_code in (200, 206) and self.end >= self.start
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.has_body or scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.content is not None:
+            await send({"type": "http.response.body", "body": self.content[self.start:self.end + 1]})
+        else:
+            await self._send_file(scope, send)
+
+    async def _send_file(self, scope: Scope, send: Send):
+        f = await to_thread.run_sync(open, self.path, "rb")
+        try:
+            count = self.end - self.start + 1
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+                return
+            fd = f.fileno()
+            offset = self.start
+            while count > 0:
+                chunk = await to_thread.run_sync(os.pread, fd, min(STREAM_CHUNK_SIZE, count), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                count -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+            if count > 0:
+                # The file shrank underneath us; end the body anyway
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            f.close()
+
+
+def file_response(request_headers: Mapping[str, str], path: str, etag: Optional[str] = None,
+                  cache: Optional[ThumbnailCache] = None, immutable: bool = False,
+                  touch: bool = False, stat_result: Optional[os.stat_result] = None,
+                  headers: Optional[Mapping[str, str]] = None) -> CachedFileResponse:
+    """Build a response for the file at path. Raises FileNotFoundError if it is missing.
+
+    Files whose content never changes under the same path (content-addressed
+    previews) are answered from the cache without touching the disk when
+    etag is given and immutable is set; otherwise the file is stat'ed and
+    the cache entry is keyed by that validator. With touch, the file's mtime
+    is updated whenever it is read from disk, for caches that evict by mtime.
+    Pass stat_result if the caller already stat'ed the file.
+    """
+    if cache is not None and immutable and etag:
+        data = cache.get((path, etag))
+        if data is not None:
+            return CachedFileResponse(request_headers, etag, path=path, content=data, headers=headers)
+
+    stat_result = stat_result or os.stat(path)
+    if not stat_module.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(path)
+    etag = etag or stat_etag(stat_result)
+    if touch:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    if cache is not None and stat_result.st_size <= THUMBNAIL_MAX_FILE_BYTES:
+        data = cache.get((path, etag))
+        if data is None and not etag_matches(request_headers.get("if-none-match"), etag):
+            with open(path, "rb") as f:
+                data = f.read()
+            cache.put((path, etag), data)
+        if data is not None:
+            return CachedFileResponse(request_headers, etag, path=path, content=data,
+                                      stat_result=stat_result, headers=headers)
+    return CachedFileResponse(request_headers, etag, path=path, stat_result=stat_result, headers=headers)
@@ -0,0 +1,162 @@
+# backend/folder_templates.py - Project Folder Templates
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# mkdir on a network share is one round trip per directory, so a handful of
+# workers hides most of the latency without flooding the file server
+MKDIR_WORKERS = int(os.environ.get("PIPELINE_MKDIR_WORKERS", "8"))
+
+
+def get_vfx_shot_structure() -> dict:
+    """Returns the dictionary defining the VFX shot folder structure."""
+    common_app_structure = {
+        "work": {"scenes": {}, "cache": {"alembic": {}}},
+        "publish": {"maya_exports": {}, "obj": {}}
+    }
+    return {
+        "artwork": {},
+        "modeling": {app: common_app_structure for app in ["maya", "houdini", "zbrush"]},
+        "animation": {app: common_app_structure for app in ["maya", "houdini"]},
+        "fx": {
+            app: {
+                "work": {"scenes": {}, "cache": {"sim": {}, "geo": {}}},
+                "publish": {"fx_exports": {}}
+            } for app in ["houdini", "maya", "realflow"]
+        },
+        "lighting": {
+            app: {
+                "work": {"scenes": {}, "cache": {}},
+                "publish": {"lighting_exports": {}}
+            } for app in ["maya", "houdini", "katana"]
+        },
+        "rendering": {
+            "beauty": {},
+            "passes": {pass_name: {} for pass_name in ["diffuse", "specular", "reflection", "shadow", "ambient_occlusion"]}
+        },
+        "comp": {
+            "nuke": {
+                "work": {"scripts": {}, "precomps": {}},
+                "publish": {"comp_exports": {}},
+                "elements": {}, "images": {}, "renders": {}
+            }
+        }
+    }
+
+
+def get_vfx_project_structure() -> dict:
+    """Returns the project-level folders that sit next to vfx/."""
+    return {
+        "in": {"tracking": {}, "reference": {"media": {}, "notes": {}}, "models": {}},
+        "out": {"postings": {"Posting01": {}}},
+        "vfx": {}
+    }
+
+
+def compile_structure(structure: dict, prefix: Tuple[str, ...] = ()) -> List[Tuple[str, ...]]:
+    """Flatten a nested folder dict into relative paths, parents before children."""
+    paths = []
+    for name, content in structure.items():
+        path = prefix + (name,)
+        paths.append(path)
+        if isinstance(content, dict):
+            paths.extend(compile_structure(content, path))
+    return paths
+
+
+@lru_cache(maxsize=None)
+def compiled_shot_template() -> Tuple[Tuple[str, ...], ...]:
+    """The shot template compiled once into relative path tuples."""
+    return tuple(compile_structure(get_vfx_shot_structure()))
+
+
+@lru_cache(maxsize=None)
+def compiled_project_template() -> Tuple[Tuple[str, ...], ...]:
+    return tuple(compile_structure(get_vfx_project_structure()))
+
+
+def vfx_project_paths(shots: Iterable[str]) -> List[Tuple[str, ...]]:
+    """All relative directories of a VFX project with the given shots, parents first."""
+    paths = list(compiled_project_template())
+    shot_template = compiled_shot_template()
+    for shot in dict.fromkeys(shots):
+        shot_root = ("vfx", shot)
+        paths.append(shot_root)
+        paths.extend(shot_root + rel for rel in shot_template)
+    return paths
+
+
+@dataclass
+class CreateResult:
+    """Outcome of a create_directories call"""
+    total: int = 0
+    created: int = 0
+    existing: int = 0
+    cancelled: bool = False
+
+
+def create_directories(
+    base_path: Path,
+    rel_paths: List[Tuple[str, ...]],
+    workers: int = MKDIR_WORKERS,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> CreateResult:
+    """Create rel_paths below base_path on a bounded worker pool.
+
+    Paths are grouped by depth and each depth level is created in parallel
+    once the previous level is done, so parents always exist before their
+    children. Directories that already exist are counted and left alone,
+    which makes the call idempotent: re-running it after a failure or
+    cancellation only creates what is still missing. progress is called with
+    (done, total) as directories are processed; setting cancel_event stops
+    creation before the next directory.
+    """
+    result = CreateResult(total=len(rel_paths))
+    levels = defaultdict(list)
+    for rel in rel_paths:
+        levels[len(rel)].append(os.path.join(base_path, *rel))
+
+    lock = threading.Lock()
+
+    def make(path: str) -> bool:
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        try:
+            os.mkdir(path)
+            created = True
+        except FileExistsError:
+            created = False
+        with lock:
+            if created:
+                result.created += 1
+            else:
+                result.existing += 1
+            done = result.created + result.existing
+        if progress is not None:
+            progress(done, result.total)
+        return created
+
+    if progress is not None:
+        progress(0, result.total)
+    base_path.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="mkdir") as pool:
+        for depth in sorted(levels):
+            list(pool.map(make, levels[depth]))
+            if cancel_event is not None and cancel_event.is_set():
+                result.cancelled = True
+                break
+
+    logger.info(
+        f"Created {result.created} directories under {base_path} "
+        f"({result.existing} already existed, {result.total} total)"
+    )
+    return result
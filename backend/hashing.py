@@ -0,0 +1,54 @@
+# backend/hashing.py - File Content Hashing
+#
+# No database or app imports: used from preview worker processes as well.
+import hashlib
+import mmap
+import os
+from typing import Optional, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Files at least this large are hashed through a memory map instead of reads
+MMAP_MIN_SIZE = 4 * 1024 * 1024
+
+
+def _new_digest():
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hex content hash of a file.
+
+    Large files are memory-mapped and fed to the hash in chunks of the
+    mapping, which avoids copying them through Python buffers; hashlib
+    releases the GIL while it works, so several files hash in parallel on
+    threads. Files that cannot be mapped (some network filesystems) are
+    read in chunks instead.
+    """
+    digest = _new_digest()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_SIZE:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for start in range(0, size, chunk_size):
+                            digest.update(view[start:start + chunk_size])
+                    finally:
+                        view.release()
+                return digest.hexdigest()
+            except (OSError, ValueError):
+                digest = _new_digest()
+                f.seek(0)
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_if_changed(path: str, known: Optional[Tuple[Optional[str], Optional[int], Optional[int]]] = None
+                    ) -> Tuple[str, int, int]:
+    """(hash, size, mtime_ns) of a file, reusing the known hash if size and mtime are unchanged."""
+    stat = os.stat(path)
+    if known and known[0] and known[1] == stat.st_size and known[2] == stat.st_mtime_ns:
+        return known[0], stat.st_size, stat.st_mtime_ns
+    return hash_file(path), stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,206 @@
+# backend/hdri.py - Radiance HDR Decoding and Preview Rendering
+#
+# Kept free of database and app imports: these functions run in worker
+# processes, which import only this module.
+import math
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hashing import hash_if_changed
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+HDR_EXTENSIONS = (".hdr", ".pic")
+# Decoded scanlines converted to float per step; bounds memory on huge panoramas
+STRIP_PIXELS = 4 * 1024 * 1024
+# Middle grey the log-average luminance is mapped to (Reinhard et al.)
+TONEMAP_KEY = 0.18
+DISPLAY_GAMMA = 2.2
+
+
+def read_hdr_header(data) -> Tuple[int, int, int, bool, bool]:
+    """Parse a Radiance header. Returns (width, height, data offset, flip_x, flip_y)."""
+    if not data[:2] == b"#?":
+        raise ValueError("Not a Radiance HDR file")
+    pos = 0
+    while True:
+        end = data.find(b"\n", pos)
+        if end < 0:
+            raise ValueError("Truncated HDR header")
+        line = data[pos:end].strip()
+        pos = end + 1
+        if not line:
+            break
+        if line.startswith(b"FORMAT=") and line != b"FORMAT=32-bit_rle_rgbe":
+            raise ValueError(f"Unsupported HDR format {line[7:].decode(errors='replace')}")
+
+    end = data.find(b"\n", pos)
+    parts = data[pos:end].split()
+    if len(parts) != 4 or parts[0] not in (b"-Y", b"+Y") or parts[2] not in (b"+X", b"-X"):
+        raise ValueError("Unsupported HDR resolution line")
+    height, width = int(parts[1]), int(parts[3])
+    return width, height, end + 1, parts[2] == b"-X", parts[0] == b"+Y"
+
+
+def _decode_scanlines(data, width: int, height: int, pos: int, rows: int) -> Iterator["np.ndarray"]:
+    """Yield the RGBE pixels as uint8 arrays of up to rows scanlines each."""
+    # Slicing copies out of the mmap; numpy views into it would keep it
+    # from closing if decoding fails halfway
+    rle_marker = bytes((2, 2, width >> 8, width & 0xFF))
+    for start in range(0, height, rows):
+        strip = np.empty((min(rows, height - start), width, 4), dtype=np.uint8)
+        for row in strip:
+            if 8 <= width < 32768 and data[pos:pos + 4] == rle_marker:
+                # Adaptive RLE: the four components are stored one after another
+                pos += 4
+                for channel in range(4):
+                    target = row[:, channel]
+                    x = 0
+                    while x < width:
+                        count = data[pos]
+                        if count > 128:
+                            count -= 128
+                            target[x:x + count] = data[pos + 1]
+                            pos += 2
+                        else:
+                            target[x:x + count] = np.frombuffer(data[pos + 1:pos + 1 + count], dtype=np.uint8)
+                            pos += 1 + count
+                        x += count
+            else:
+                # Flat scanline
+                row[:] = np.frombuffer(data[pos:pos + width * 4], dtype=np.uint8).reshape(width, 4)
+                pos += width * 4
+        yield strip
+
+
+def _rgbe_to_float(rgbe: "np.ndarray") -> "np.ndarray":
+    """Convert RGBE pixels to linear float RGB; exponent 0 means black."""
+    exponent = rgbe[..., 3].astype(np.int32)
+    scale = np.where(exponent > 0, np.ldexp(np.float32(1.0), exponent - 136), 0).astype(np.float32)
+    return (rgbe[..., :3].astype(np.float32) + 0.5) * scale[..., None]
+
+
+def _box_factor(width: int, height: int, size: int) -> int:
+    return max(1, min(math.ceil(max(width, height) / size), width, height))
+
+
+def _box_downsample(image: "np.ndarray", factor: int) -> "np.ndarray":
+    """Average factor x factor blocks of a float image, dropping partial blocks."""
+    if factor == 1:
+        return image
+    h, w = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:h * factor, :w * factor].reshape(h, factor, w, factor, 3)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def load_hdr_downsampled(path: str, size: int) -> "np.ndarray":
+    """Decode a Radiance HDR to linear float RGB, box-filtered so its long side is about size.
+
+    Scanlines are decoded and averaged strip by strip, so the full
+    resolution image is never held in memory as floats.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        width, height, pos, flip_x, flip_y = read_hdr_header(data)
+        factor = _box_factor(width, height, size)
+        rows = max(factor, (STRIP_PIXELS // max(width, 1)) // factor * factor)
+        out_width = width // factor
+        strips = []
+        carry = None
+        for strip in _decode_scanlines(data, width, height, pos, rows):
+            pixels = _rgbe_to_float(strip[:, :out_width * factor])
+            if carry is not None:
+                pixels = np.concatenate([carry, pixels])
+            usable = pixels.shape[0] // factor * factor
+            strips.append(_box_downsample(pixels[:usable], factor))
+            carry = pixels[usable:] if usable < pixels.shape[0] else None
+    image = np.concatenate(strips) if strips else np.zeros((1, 1, 3), dtype=np.float32)
+    if flip_y:
+        image = image[::-1]
+    if flip_x:
+        image = image[:, ::-1]
+    return image
+
+
+def tonemap(image: "np.ndarray", log_average: Optional[float] = None) -> "np.ndarray":
+    """Global Reinhard tone mapping and display gamma to 8-bit RGB."""
+    luminance = image @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+    if log_average is None:
+        log_average = float(np.exp(np.mean(np.log(luminance + 1e-6))))
+    scaled = image * (TONEMAP_KEY / max(log_average, 1e-6))
+    mapped = scaled / (1.0 + scaled)
+    return (np.power(np.clip(mapped, 0, 1), 1 / DISPLAY_GAMMA) * 255 + 0.5).astype(np.uint8)
+
+
+def encode_png(rgb: "np.ndarray") -> bytes:
+    """Encode an 8-bit RGB image as PNG."""
+    height, width, _ = rgb.shape
+    # Every scanline starts with filter type 0 (none)
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+
+def preview_name(content_hash: str, size: int) -> str:
+    return f"{content_hash}_{size}.png"
+
+
+def render_previews(source: str, cache_dir: str, sizes: Sequence[int],
+                    known: Optional[Tuple[str, int, int]] = None) -> Dict:
+    """Make sure cache_dir holds previews of source at every size.
+
+    known is the (hash, size, mtime_ns) recorded for source last time; when
+    size and mtime still match, the file is not hashed again. Previews are
+    keyed by content hash, so an unchanged source is never re-rendered, and
+    existing previews are touched to mark them recently used.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required to render HDR previews")
+    content_hash, file_size, mtime_ns = hash_if_changed(source, known)
+
+    cache = Path(cache_dir)
+    paths = {size: cache / preview_name(content_hash, size) for size in sizes}
+    missing: List[int] = []
+    for size, path in paths.items():
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            missing.append(size)
+
+    if missing:
+        # Decode once at the largest size, derive the smaller ones from it
+        largest = load_hdr_downsampled(source, max(missing))
+        luminance = largest @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+        log_average = float(np.exp(np.mean(np.log(luminance + 1e-6))))
+        for size in sorted(missing, reverse=True):
+            image = _box_downsample(largest, _box_factor(largest.shape[1], largest.shape[0], size))
+            _write_atomic(paths[size], encode_png(tonemap(image, log_average)))
+
+    return {
+        "hash": content_hash,
+        "size": file_size,
+        "mtime_ns": mtime_ns,
+        "previews": {size: str(path) for size, path in paths.items()},
+        "rendered": len(missing),
+    }
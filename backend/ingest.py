@@ -0,0 +1,161 @@
+# backend/ingest.py - Bulk Folder Ingest for Libraries
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import insert
+
+from changes import LIBRARY_ITEM, record_changes
+from database import ReadSessionLocal, SessionLocal
+from jobs import Job, JobCancelled
+from models import LibraryItem
+from tag_index import index_new_items, normalize_tags
+
+logger = logging.getLogger(__name__)
+
+# New items written per transaction
+INGEST_BATCH_SIZE = int(os.environ.get("PIPELINE_INGEST_BATCH_SIZE", "500"))
+
+NAME_SEPARATORS_RE = re.compile(r"[_\-.\s]+")
+
+
+@dataclass
+class IngestResult:
+    """Outcome of an ingest_directory call"""
+    scanned: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    item_ids: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {"scanned": self.scanned, "inserted": self.inserted, "skipped": self.skipped}
+
+
+def walk_files(root: Path, extensions: Sequence[str], recursive: bool = True) -> Iterator[os.DirEntry]:
+    """Yield files below root whose extension is in extensions, one directory at a time.
+
+    Uses os.scandir so file types come from the directory listing without
+    a stat per entry. Hidden entries are skipped and symlinked directories
+    are not followed, which rules out cycles.
+    """
+    suffixes = tuple(ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in extensions)
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                subdirs = []
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                        yield entry
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory {directory}: {e}")
+            continue
+        if recursive:
+            # Reversed so directories are visited in listing order
+            pending.extend(reversed(subdirs))
+
+
+def item_name_from_file(filename: str) -> str:
+    """'sunset_hdri_01.hdr' -> 'Sunset Hdri 01'; words with capitals are kept as they are."""
+    words = NAME_SEPARATORS_RE.split(Path(filename).stem)
+    return " ".join(word.capitalize() if word.islower() else word for word in words if word)
+
+
+def tags_from_path(root: Path, path: str) -> List[str]:
+    """The folder names between root and the file, as tags."""
+    relative = Path(path).relative_to(root)
+    return normalize_tags(relative.parts[:-1])
+
+
+def _existing_paths(library_id: int) -> set:
+    db = ReadSessionLocal()
+    try:
+        return {row[0] for row in db.query(LibraryItem.path).filter(LibraryItem.library_id == library_id)}
+    finally:
+        db.close()
+
+
+def _insert_batch(library_id: int, rows: List[dict]) -> List[int]:
+    """Insert one batch of items and their tag index rows in a single transaction."""
+    db = SessionLocal()
+    try:
+        inserted = db.execute(
+            insert(LibraryItem).returning(LibraryItem.id, LibraryItem.tags, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        index_new_items(db, [(item_id, library_id, tags) for item_id, tags in inserted])
+        record_changes(db, LIBRARY_ITEM, [item_id for item_id, _ in inserted])
+        db.commit()
+        return [item_id for item_id, _ in inserted]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def ingest_directory(
+    job: Optional[Job],
+    library_id: int,
+    root: Path,
+    extensions: Sequence[str],
+    recursive: bool = True,
+    category: Optional[str] = None,
+    path_tags: bool = True,
+) -> IngestResult:
+    """Add every matching file below root to a library, skipping paths it already has.
+
+    The tree is walked while new items accumulate; each full batch is
+    written in its own short transaction, so the write lock is never held
+    during directory listing and a cancelled ingest keeps what it wrote.
+    """
+    result = IngestResult()
+    known = _existing_paths(library_id)
+    batch: List[dict] = []
+
+    def flush():
+        result.item_ids.extend(_insert_batch(library_id, batch))
+        result.inserted += len(batch)
+        batch.clear()
+
+    for entry in walk_files(root, extensions, recursive):
+        result.scanned += 1
+        if entry.path in known:
+            result.skipped += 1
+        else:
+            known.add(entry.path)
+            batch.append({
+                "library_id": library_id,
+                "name": item_name_from_file(entry.name),
+                "path": entry.path,
+                "category": category,
+                "tags": tags_from_path(root, entry.path) if path_tags else [],
+            })
+            if len(batch) >= INGEST_BATCH_SIZE:
+                flush()
+        if job is not None:
+            job.update_progress(result.scanned, 0)
+            job.stats.update(result.to_dict())
+            if job.cancel_event.is_set():
+                if batch:
+                    flush()
+                raise JobCancelled()
+    if batch:
+        flush()
+    if job is not None:
+        job.update_progress(result.scanned, result.scanned)
+        job.stats.update(result.to_dict())
+
+    logger.info(
+        f"Ingested {root} into library {library_id}: {result.inserted} added, "
+        f"{result.skipped} already present"
+    )
+    return result
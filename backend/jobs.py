@@ -0,0 +1,160 @@
+# backend/jobs.py - Background Job Queue
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Each project creation is itself parallel (see folder_templates), so only a
+# couple run at once to avoid saturating the file server
+MAX_CREATE_JOBS = int(os.environ.get("PIPELINE_MAX_CREATE_JOBS", "2"))
+# Library jobs (preview generation, ingest) are disk and CPU heavy and
+# parallelise internally, so they run one at a time
+MAX_LIBRARY_JOBS = int(os.environ.get("PIPELINE_MAX_LIBRARY_JOBS", "1"))
+# Finished jobs kept around for status queries
+MAX_FINISHED_JOBS = 100
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised by a job function that stopped because it was cancelled"""
+
+
+@dataclass
+class Job:
+    """A unit of background work with progress reporting"""
+    id: str
+    kind: str
+    key: Optional[str] = None
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    # Live counters a job wants to report while it runs
+    stats: dict = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def update_progress(self, done: int, total: int):
+        self.done = done
+        self.total = total
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+            "result": self.result,
+            "stats": dict(self.stats),
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobQueue:
+    """Runs submitted jobs on a bounded thread pool and tracks their state.
+
+    Job functions are called as fn(job, *args), should report progress via
+    job.update_progress (a total of 0 means not known yet), check
+    job.cancel_event and raise JobCancelled when it is set, and return a
+    dict that becomes job.result.
+    """
+
+    def __init__(self, max_workers: int, name: str = "job"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, key: Optional[str] = None) -> Job:
+        """Queue fn for execution. Raises ValueError if a job with the same key is still active."""
+        with self._lock:
+            if key is not None and self._find_active(key) is not None:
+                raise ValueError(f"A job for '{key}' is already queued or running")
+            job = Job(id=uuid.uuid4().hex, kind=kind, key=key)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation. Queued jobs never start; running jobs stop at their next check."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = datetime.utcnow()
+        return job
+
+    def shutdown(self):
+        for job in self.list_jobs():
+            if not job.finished:
+                job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _find_active(self, key: str) -> Optional[Job]:
+        for job in self._jobs.values():
+            if job.key == key and not job.finished:
+                return job
+        return None
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, fn: Callable, args: tuple):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job, *args)
+            job.status = COMPLETED
+        except JobCancelled:
+            job.status = CANCELLED
+            logger.info(f"Job {job.id} ({job.kind}) cancelled")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+        finally:
+            job.finished_at = datetime.utcnow()
+
+
+project_jobs = JobQueue(max_workers=MAX_CREATE_JOBS, name="project-job")
+library_jobs = JobQueue(max_workers=MAX_LIBRARY_JOBS, name="library-job")
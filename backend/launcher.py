@@ -0,0 +1,252 @@
+# backend/launcher.py - Tool Launching, Process Tracking and Batched Usage Counters
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func
+
+from changes import TOOL, record_changes
+from database import SessionLocal
+from models import Project, Tool
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of accumulated last_used and launch_count updates
+USAGE_FLUSH_INTERVAL = float(os.environ.get("PIPELINE_TOOL_USAGE_FLUSH_INTERVAL", "5"))
+# Exited launches kept around for status queries
+MAX_FINISHED_LAUNCHES = 100
+# Output lines kept per launch, for diagnosing tools that fail to start
+OUTPUT_TAIL_LINES = 20
+
+RUNNING = "running"
+EXITED = "exited"
+
+
+class LaunchError(Exception):
+    """The tool could not be started"""
+
+
+@dataclass
+class Launch:
+    """One started tool process"""
+    id: str
+    tool_id: int
+    tool_name: str
+    pid: int
+    project_id: Optional[int] = None
+    cwd: Optional[str] = None
+    status: str = RUNNING
+    exit_code: Optional[int] = None
+    # Request to process started, and to its first line of output
+    spawn_ms: Optional[float] = None
+    ready_ms: Optional[float] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    exited_at: Optional[datetime] = None
+    output: Deque[str] = field(default_factory=lambda: deque(maxlen=OUTPUT_TAIL_LINES), repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "tool_id": self.tool_id,
+            "tool_name": self.tool_name,
+            "pid": self.pid,
+            "project_id": self.project_id,
+            "cwd": self.cwd,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "spawn_ms": self.spawn_ms,
+            "ready_ms": self.ready_ms,
+            "started_at": self.started_at.isoformat(),
+            "exited_at": self.exited_at.isoformat() if self.exited_at else None,
+            "output": list(self.output),
+        }
+
+
+def project_environment(project: Project) -> Dict[str, str]:
+    """Variables a tool launched for project sees, on top of the server's environment."""
+    return {
+        "PIPELINE_PROJECT": project.folder_name,
+        "PIPELINE_PROJECT_ID": str(project.id),
+        "PIPELINE_PROJECT_NAME": project.name or "",
+        "PIPELINE_PROJECT_TYPE": project.type or "",
+        "PIPELINE_PROJECT_PATH": project.workspace_path,
+        "PIPELINE_CLIENT": project.client or "",
+    }
+
+
+def _detach_options() -> dict:
+    # Tools outlive the server; keep them out of its process group so a
+    # Ctrl+C on the server console does not take them down too
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+class UsageRecorder:
+    """Accumulates last_used and launch counts in memory and writes them in one transaction.
+
+    Launching never waits on a database write; a background thread
+    flushes every interval seconds, and stop() flushes what is left.
+    """
+
+    def __init__(self, interval: float = USAGE_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending: Dict[int, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, tool_id: int, when: datetime):
+        with self._lock:
+            count, _ = self._pending.get(tool_id, (0, when))
+            self._pending[tool_id] = (count + 1, when)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tool-usage", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write pending counters; returns the number of tools updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        table = Tool.__table__
+        statement = table.update().where(table.c.id == bindparam("tool_id")).values(
+            launch_count=func.coalesce(table.c.launch_count, 0) + bindparam("launches"),
+            last_used=bindparam("used_at"),
+        )
+        rows = [
+            {"tool_id": tool_id, "launches": count, "used_at": when}
+            for tool_id, (count, when) in pending.items()
+        ]
+        db = SessionLocal()
+        try:
+            db.execute(statement, rows)
+            record_changes(db, TOOL, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                for tool_id, (count, when) in pending.items():
+                    newer_count, newer_when = self._pending.get(tool_id, (0, when))
+                    self._pending[tool_id] = (count + newer_count, max(when, newer_when))
+            raise
+        finally:
+            db.close()
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write tool usage: {e}")
+
+
+class ToolLauncher:
+    """Starts tool processes without waiting on them and tracks them until they exit.
+
+    Each process gets a daemon thread that drains its merged stdout and
+    stderr (so a chatty tool never blocks on a full pipe), notes the first
+    line as the moment the tool became ready, and records the exit code.
+    Tools that print nothing have no ready time.
+    """
+
+    def __init__(self, usage: UsageRecorder):
+        self.usage = usage
+        self._launches: "OrderedDict[str, Launch]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def launch(self, tool: Tool, project: Optional[Project] = None, args: Optional[List[str]] = None) -> Launch:
+        """Start tool, in project's workspace and environment when given. Raises LaunchError."""
+        started = time.perf_counter()
+        if not tool.executable_path:
+            raise LaunchError(f"Tool '{tool.name}' has no executable path set")
+        env = None
+        cwd = None
+        if project is not None:
+            if not os.path.isdir(project.workspace_path):
+                raise LaunchError(f"Project workspace not found: {project.workspace_path}")
+            env = {**os.environ, **project_environment(project)}
+            cwd = project.workspace_path
+
+        try:
+            process = subprocess.Popen(
+                [tool.executable_path, *(args or [])],
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                **_detach_options(),
+            )
+        except OSError as e:
+            raise LaunchError(f"Could not start {tool.executable_path}: {e}")
+
+        launch = Launch(
+            id=uuid.uuid4().hex,
+            tool_id=tool.id,
+            tool_name=tool.name,
+            pid=process.pid,
+            project_id=project.id if project is not None else None,
+            cwd=cwd,
+            spawn_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        with self._lock:
+            self._launches[launch.id] = launch
+            self._prune()
+        threading.Thread(
+            target=self._track, args=(launch, process, started), name=f"tool-{process.pid}", daemon=True
+        ).start()
+        self.usage.record(tool.id, launch.started_at)
+        logger.info(f"Launched {tool.name} (pid {process.pid}) in {launch.spawn_ms} ms")
+        return launch
+
+    def get(self, launch_id: str) -> Optional[Launch]:
+        return self._launches.get(launch_id)
+
+    def list_launches(self) -> List[Launch]:
+        with self._lock:
+            return list(self._launches.values())
+
+    def _prune(self):
+        exited = [launch_id for launch_id, launch in self._launches.items() if launch.status == EXITED]
+        for launch_id in exited[:max(0, len(exited) - MAX_FINISHED_LAUNCHES)]:
+            del self._launches[launch_id]
+
+    def _track(self, launch: Launch, process: subprocess.Popen, started: float):
+        for line in process.stdout:
+            if launch.ready_ms is None:
+                launch.ready_ms = round((time.perf_counter() - started) * 1000, 2)
+            launch.output.append(line.rstrip("\n"))
+        process.stdout.close()
+        launch.exit_code = process.wait()
+        launch.exited_at = datetime.utcnow()
+        launch.status = EXITED
+        logger.info(f"{launch.tool_name} (pid {launch.pid}) exited with code {launch.exit_code}")
+
+
+tool_usage = UsageRecorder()
+tool_launcher = ToolLauncher(tool_usage)
@@ -0,0 +1,134 @@
+# backend/library_batch.py - Set-Based Batch Edits of Library Items
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, bindparam, delete, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from changes import LIBRARY_ITEM, record_selected
+from models import LibraryItem, LibraryItemTag, Tag
+from tag_index import get_or_create_tag_ids, normalize_tag
+from versions import mark_changed
+
+logger = logging.getLogger(__name__)
+
+# Ids of the items a batch edit applies to. Staging them first means the
+# selection is evaluated once, before the edit can change which items match.
+batch_items = Table("batch_items", MetaData(), Column("id", Integer, primary_key=True), schema="temp")
+
+_in_batch = select(batch_items.c.id)
+# Statements touch rows the session has not loaded; skip syncing its identity map
+NO_SYNC = {"synchronize_session": False}
+
+# New JSON tag list: the kept tags in their order, then the added ones the item lacks
+TAGS_SQL = """(
+    SELECT json_group_array(value) FROM (
+        SELECT 0 AS part, key, value FROM json_each(coalesce(library_items.tags, '[]'))
+        WHERE lower(trim(value)) NOT IN (SELECT value FROM json_each(:remove_tags))
+        UNION ALL
+        SELECT 1, key, value FROM json_each(:add_tags)
+        WHERE lower(value) NOT IN (
+            SELECT lower(trim(value)) FROM json_each(coalesce(library_items.tags, '[]'))
+        )
+        ORDER BY part, key
+    )
+)"""
+
+ADD_LINKS_SQL = """
+    INSERT OR IGNORE INTO library_item_tags (item_id, tag_id, library_id)
+    SELECT i.id, t.value, i.library_id
+    FROM temp.batch_items b JOIN library_items i ON i.id = b.id, json_each(:tag_ids) t
+"""
+
+
+def _clean_tags(tags: Optional[Iterable]) -> List[str]:
+    """Tags with collapsed whitespace, de-duplicated by their normalized form."""
+    cleaned = {}
+    for tag in tags or []:
+        tag = " ".join(str(tag).split())
+        if tag:
+            cleaned.setdefault(normalize_tag(tag), tag)
+    return list(cleaned.values())
+
+
+def stage_items(db: Session, condition) -> int:
+    """Fill the batch_items temp table with the ids of items matching condition. Returns their number."""
+    db.execute(text("CREATE TEMP TABLE IF NOT EXISTS batch_items (id INTEGER PRIMARY KEY)"))
+    db.execute(delete(batch_items))
+    result = db.execute(insert(batch_items).from_select(["id"], select(LibraryItem.id).where(condition)))
+    return result.rowcount
+
+
+def batch_update_items(
+    db: Session,
+    condition,
+    add_tags: Optional[Iterable] = None,
+    remove_tags: Optional[Iterable] = None,
+    category: Optional[str] = None,
+    library_id: Optional[int] = None,
+) -> int:
+    """Apply one patch to every item matching condition; returns the number of items.
+
+    Runs a fixed number of statements regardless of how many items match:
+    one UPDATE rewrites tags, category and library of all of them (so the
+    search triggers fire once per item), and the tag index is adjusted with
+    one DELETE and one INSERT ... SELECT. A tag both added and removed is
+    kept. The caller commits.
+    """
+    count = stage_items(db, condition)
+    if not count:
+        return 0
+
+    add = _clean_tags(add_tags)
+    added = {normalize_tag(tag) for tag in add}
+    remove = [
+        name for name in dict.fromkeys(normalize_tag(tag) for tag in remove_tags or [])
+        if name and name not in added
+    ]
+
+    sets = ["updated_at = :now"]
+    params = {"now": datetime.utcnow()}
+    if category is not None:
+        sets.append("category = :category")
+        params["category"] = category
+    if library_id is not None:
+        sets.append("library_id = :library_id")
+        params["library_id"] = library_id
+    if add or remove:
+        sets.append(f"tags = {TAGS_SQL}")
+        params["add_tags"] = json.dumps(add)
+        params["remove_tags"] = json.dumps(remove)
+    statement = text(f"UPDATE library_items SET {', '.join(sets)} WHERE id IN (SELECT id FROM temp.batch_items)")
+    db.execute(statement.bindparams(bindparam("now", type_=DateTime())), params)
+    mark_changed(db, "libraries")
+    record_selected(db, LIBRARY_ITEM, _in_batch)
+
+    if remove:
+        db.execute(delete(LibraryItemTag).where(
+            LibraryItemTag.item_id.in_(_in_batch),
+            LibraryItemTag.tag_id.in_(select(Tag.id).where(Tag.name.in_(remove)))
+        ), execution_options=NO_SYNC)
+    if library_id is not None:
+        db.execute(
+            update(LibraryItemTag).where(LibraryItemTag.item_id.in_(_in_batch)).values(library_id=library_id),
+            execution_options=NO_SYNC
+        )
+    if add:
+        add_ids = list(get_or_create_tag_ids(db, sorted(added)).values())
+        db.execute(text(ADD_LINKS_SQL), {"tag_ids": json.dumps(add_ids)})
+
+    logger.info(f"Batch updated {count} library items")
+    return count
+
+
+def batch_delete_items(db: Session, condition) -> int:
+    """Delete every item matching condition with its tag index rows; returns the number deleted. The caller commits."""
+    count = stage_items(db, condition)
+    if count:
+        record_selected(db, LIBRARY_ITEM, _in_batch)
+        db.execute(delete(LibraryItemTag).where(LibraryItemTag.item_id.in_(_in_batch)), execution_options=NO_SYNC)
+        db.execute(delete(LibraryItem).where(LibraryItem.id.in_(_in_batch)), execution_options=NO_SYNC)
+        logger.info(f"Batch deleted {count} library items")
+    return count
@@ -0,0 +1,181 @@
+# backend/library_hashes.py - Library Item Hashing and Duplicate Detection
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import groupby
+from typing import List, Optional
+
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+
+from database import ReadSessionLocal, SessionLocal
+from hashing import hash_if_changed
+from jobs import Job, JobCancelled
+from models import LibraryItem
+
+logger = logging.getLogger(__name__)
+
+# Hashing is mostly waiting on disk or network reads, so threads suffice
+HASH_WORKERS = int(os.environ.get("PIPELINE_HASH_WORKERS", "8"))
+# Results written back per transaction; also how much work a restart can lose
+HASH_COMMIT_BATCH = 200
+QUERY_CHUNK_SIZE = 500
+
+
+def items_needing_hashes(library_id: Optional[int] = None, verify: bool = False) -> List[int]:
+    """Ids of items without a content hash, or of all items with verify.
+
+    Verifying re-stats every file and re-hashes those whose size or mtime
+    changed; unchanged files cost one stat.
+    """
+    db = ReadSessionLocal()
+    try:
+        query = db.query(LibraryItem.id)
+        if not verify:
+            query = query.filter(LibraryItem.content_hash.is_(None))
+        if library_id is not None:
+            query = query.filter(LibraryItem.library_id == library_id)
+        return [row[0] for row in query.order_by(LibraryItem.id)]
+    finally:
+        db.close()
+
+
+def _save_hashes(rows: List[dict]):
+    """Store hashes for items whose path is still the one that was hashed.
+
+    An item moved to another file while its old one was being hashed is
+    left alone; the move cleared its hash and queued it again.
+    """
+    table = LibraryItem.__table__
+    statement = table.update().where(
+        table.c.id == bindparam("item_id"), table.c.path == bindparam("hashed_path")
+    ).values(
+        content_hash=bindparam("new_hash"),
+        content_size=bindparam("new_size"),
+        content_mtime_ns=bindparam("new_mtime_ns"),
+    )
+    db = SessionLocal()
+    try:
+        db.execute(statement, [
+            {
+                "item_id": row["id"], "hashed_path": row["path"], "new_hash": row["content_hash"],
+                "new_size": row["content_size"], "new_mtime_ns": row["content_mtime_ns"],
+            }
+            for row in rows
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_content_hashing(job: Job, item_ids: List[int]) -> dict:
+    """Job body: hash the files of item_ids on a thread pool.
+
+    Results are committed in batches as they complete. Items are picked by
+    missing hash, so after a restart or cancellation the next run continues
+    where this one stopped.
+    """
+    db = ReadSessionLocal()
+    try:
+        items = []
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            items.extend(db.query(
+                LibraryItem.id, LibraryItem.path, LibraryItem.content_hash,
+                LibraryItem.content_size, LibraryItem.content_mtime_ns
+            ).filter(LibraryItem.id.in_(item_ids[start:start + QUERY_CHUNK_SIZE])))
+    finally:
+        db.close()
+
+    summary = {"items": len(items), "hashed": 0, "unchanged": 0, "missing": 0}
+    job.update_progress(0, len(items))
+    remaining = iter(items)
+    pending = {}
+    batch = []
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, HASH_WORKERS), thread_name_prefix="hash") as pool:
+        def submit_next():
+            item = next(remaining, None)
+            if item is not None:
+                known = (item.content_hash, item.content_size, item.content_mtime_ns)
+                pending[pool.submit(hash_if_changed, item.path, known)] = item
+
+        for _ in range(max(1, HASH_WORKERS) * 2):
+            submit_next()
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = pending.pop(future)
+                    try:
+                        content_hash, size, mtime_ns = future.result()
+                    except OSError as e:
+                        summary["missing"] += 1
+                        logger.warning(f"Could not hash library item {item.id} ({item.path}): {e}")
+                    else:
+                        if content_hash == item.content_hash and mtime_ns == item.content_mtime_ns:
+                            summary["unchanged"] += 1
+                        else:
+                            summary["hashed"] += 1
+                            batch.append({
+                                "id": item.id,
+                                "path": item.path,
+                                "content_hash": content_hash,
+                                "content_size": size,
+                                "content_mtime_ns": mtime_ns,
+                            })
+                    done += 1
+                    if job.cancel_event.is_set():
+                        raise JobCancelled()
+                    submit_next()
+                if len(batch) >= HASH_COMMIT_BATCH:
+                    _save_hashes(batch)
+                    batch = []
+                job.update_progress(done, len(items))
+                job.stats.update(summary)
+        finally:
+            for future in pending:
+                future.cancel()
+            if batch:
+                _save_hashes(batch)
+
+    logger.info(f"Content hashing finished: {summary}")
+    return summary
+
+
+def find_duplicates(db: Session, library_id: Optional[int] = None) -> List[dict]:
+    """Groups of items whose files have identical contents, largest waste first.
+
+    Based on the stored hashes; run a verify pass first if files may have
+    changed since they were hashed.
+    """
+    scope = [LibraryItem.content_hash.isnot(None)]
+    if library_id is not None:
+        scope.append(LibraryItem.library_id == library_id)
+    duplicated = (
+        select(LibraryItem.content_hash)
+        .where(*scope)
+        .group_by(LibraryItem.content_hash)
+        .having(func.count(LibraryItem.id) > 1)
+    )
+    items = (
+        db.query(LibraryItem)
+        .filter(*scope, LibraryItem.content_hash.in_(duplicated))
+        .order_by(LibraryItem.content_hash, LibraryItem.id)
+        .all()
+    )
+    groups = []
+    for content_hash, members in groupby(items, key=lambda item: item.content_hash):
+        members = list(members)
+        size = members[0].content_size or 0
+        groups.append({
+            "hash": content_hash,
+            "size": size,
+            "wasted_bytes": size * (len(members) - 1),
+            "items": [
+                {"id": item.id, "library_id": item.library_id, "name": item.name, "path": item.path}
+                for item in members
+            ],
+        })
+    groups.sort(key=lambda group: group["wasted_bytes"], reverse=True)
+    return groups
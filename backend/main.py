@@ -1,20 +1,47 @@
 # backend/main.py - VFX Pipeline Companion Backend
+import asyncio
 import json
 import logging
 import os
 import re
+import threading
 import traceback
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Sequence
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, Depends
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 
-from schemas import PathData, Settings, VFXProjectCreate, Library, LibraryItem, LibraryCreate, LibraryItemCreate, LibraryItemUpdate
-from database import get_db, init_db, SessionLocal
-from models import Settings as SettingsModel, Project, Library as LibraryModel, LibraryItem as LibraryItemModel, Tool
+from schemas import PathData, Settings, VFXProjectCreate, Library, LibraryItem, LibraryCreate, LibraryItemCreate, LibraryItemUpdate, LibraryIngest, LibraryItemSelection, LibraryItemBatchUpdate, LibraryItemBatchDelete, ToolLaunch
+from changes import CursorExpired, change_log_compactor, changes_since, latest_cursor
+from database import get_db, get_read_db, init_db, SessionLocal, ReadSessionLocal
+from models import Settings as SettingsModel, Project, Shot, Library as LibraryModel, LibraryItem as LibraryItemModel, Tool
+from sync import sync_service
+from folder_templates import CreateResult, create_directories, vfx_project_paths
+from events import HEARTBEAT_INTERVAL, broadcaster
+from file_serving import etag_matches, file_response, thumbnail_cache
+from file_metadata import FileMetadata, items_needing_metadata, metadata_refresher, read_file_metadata, run_metadata_extraction
+from ingest import ingest_directory
+from jobs import Job, JobCancelled, library_jobs, project_jobs
+from launcher import RUNNING as LAUNCH_RUNNING, LaunchError, tool_launcher, tool_usage
+from library_batch import batch_delete_items, batch_update_items
+from library_hashes import find_duplicates, items_needing_hashes, run_content_hashing
+from numbering import check_project_number, observe_project_numbers, peek_next_project_number, project_folder_name, reserve_project_numbers
+from pagination import count_cache, keyset_page
+from previews import is_cached_preview, is_previewable, items_needing_previews, previews_available, resolve_preview, run_preview_generation, shutdown_preview_pool
+from serializers import (
+    FastJSONResponse, dumps, library_item_serializer, library_serializer, project_serializer, tool_serializer, wants
+)
+from search import SEARCH_KINDS, init_search_index, matching_ids, search
+from versions import versions
+from tool_discovery import tool_discovery
+from tag_index import ensure_tag_index, parse_tag_expression, set_item_tags, tag_facets, tag_filter
 
 # --- Basic Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,7 +49,7 @@ logger = logging.getLogger(__name__)
 
 logger.info("Starting VFX Pipeline Companion API...")
 
-app = FastAPI(title="VFX Pipeline Companion API", version="1.0.0")
+app = FastAPI(title="VFX Pipeline Companion API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # --- CORS Middleware ---
 app.add_middleware(
@@ -35,203 +62,338 @@ app.add_middleware(
 
 # --- Constants ---
 DATA_DIR = Path(__file__).parent / "data"
+JOB_EVENT_INTERVAL = 0.25  # seconds between job progress events
+LIBRARY_ITEMS_MAX_PAGE = 5000
+LIBRARY_ITEMS_STREAM_BATCH = 500  # rows fetched per round trip while streaming
+TAG_FACETS_MAX = 200
+SEARCH_MAX_PAGE = 200
+PROJECTS_MAX_PAGE = 500
+TOOLS_MAX_PAGE = 500
+CHANGES_MAX_PAGE = 5000
+PROJECT_SORTS = {"created_at": Project.created_at, "name": Project.name, "id": Project.id}
+TOOL_SORTS = {"name": Tool.name, "id": Tool.id}
+# Worker threads for blocking endpoints (database and filesystem access)
+THREADPOOL_SIZE = int(os.environ.get("PIPELINE_THREADPOOL_SIZE", "40"))
 
 # --- Startup Event ---
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
+    """Initialize database and start the background project sync on startup"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    broadcaster.attach(asyncio.get_running_loop())
     init_db()
+    ensure_tag_index()
+    init_search_index()
+    sync_service.start()
+    change_log_compactor.start()
+    tool_usage.start()
+    tool_discovery.start()
+    queue_preview_generation(items_needing_previews(), key="previews:all")
+    queue_content_hashing(items_needing_hashes(), key="hashes:all")
+    metadata_refresher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    broadcaster.close()
+    sync_service.stop()
+    change_log_compactor.stop()
+    tool_usage.stop()
+    metadata_refresher.stop()
+    project_jobs.shutdown()
+    library_jobs.shutdown()
+    shutdown_preview_pool()
 
 # --- Business Logic ---
-def scan_for_existing_projects(workspace_path: str | None = None) -> List[dict]:
-    """Scan for existing VFX projects in the workspace"""
-    discovered_projects = []
-    
-    # Get settings to find workspace path
-    db = SessionLocal()
+def requested_fields(serializer, *extra: str):
+    """Dependency parsing a fields= query parameter for serializer's fields plus extra ones"""
+    def dependency(fields: str | None = Query(None, description="Comma-separated fields to return; all by default")):
+        try:
+            return serializer.parse_fields(fields, extra)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return dependency
+
+
+def check_collection_cache(request: Request, response: Response, *collections: str) -> Response | None:
+    """304 response if the client's copy of collections is current, else None.
+
+    Otherwise the ETag is set on response. Call before querying, so a write
+    landing mid-request leaves the client with an older, non-matching ETag.
+    """
+    etag = versions.etag(*collections)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def list_live_projects(db: Session, fields: Sequence[str] | None = None) -> List[dict]:
+    """All non-deleted projects with their shot counts, in two queries; shot counts are skipped unless wanted."""
+    projects = db.query(Project).filter(Project.deleted_at.is_(None)).all()
+    rows = project_serializer.many(projects, fields)
+    if wants(fields, "shot_count"):
+        shot_counts = dict(
+            db.query(Shot.project_id, func.count(Shot.id)).group_by(Shot.project_id).all()
+        )
+        for project, row in zip(projects, rows):
+            row["shot_count"] = shot_counts.get(project.id, 0)
+    return rows
+
+
+def get_next_project_number() -> str:
+    """Peek at the next project number with a two-digit year prefix."""
+    db = ReadSessionLocal()
     try:
-        settings = db.query(SettingsModel).first()
-        logger.info(f"Settings found: {settings}")
-        
-        if not settings:
-            logger.warning("No settings found, cannot scan for projects")
-            return discovered_projects
-            
-        # Use provided workspace_path or get from settings
-        if workspace_path is None:
-            workspace_path = settings.root_path or ""
-            logger.info(f"Using workspace path from settings: '{workspace_path}'")
-        
-        if not workspace_path:
-            logger.warning("No workspace path available, cannot scan for projects")
-            return discovered_projects
-            
-        projects_dir = Path(workspace_path) / "Projects"
-        logger.info(f"Looking for projects in: {projects_dir}")
-        
-        if not projects_dir.exists():
-            logger.warning(f"Projects directory does not exist: {projects_dir}")
-            return discovered_projects
-        
-        logger.info(f"Scanning for projects in: {projects_dir}")
-        
-        # Look for project folders (typically named with year prefix like 24xxxx)
-        for project_folder in projects_dir.iterdir():
-            if project_folder.is_dir():
-                logger.info(f"Found folder: {project_folder.name}")
-                # Check if it looks like a VFX project (has vfx folder)
-                vfx_folder = project_folder / "vfx"
-                if vfx_folder.exists() and vfx_folder.is_dir():
-                    logger.info(f"Found VFX project: {project_folder.name}")
-                    # Extract project info
-                    folder_name = project_folder.name
-                    
-                    # Try to extract project name from folder name
-                    # Remove year prefix if present (e.g., "24xxxx_ProjectName" -> "ProjectName")
-                    project_name = folder_name
-                    if len(folder_name) >= 6 and folder_name[:2].isdigit() and folder_name[2:6].isdigit():
-                        # Has year prefix, extract the rest
-                        underscore_pos = folder_name.find('_')
-                        if underscore_pos > 0:
-                            project_name = folder_name[underscore_pos + 1:]
-                        else:
-                            project_name = folder_name[6:]
-                    
-                    # Check if project already exists in database
-                    existing_project = db.query(Project).filter(Project.folder_name == folder_name).first()
-                    
-                    if not existing_project:
-                        # Create new project record
-                        new_project = Project(
-                            name=project_name,
-                            folder_name=folder_name,
-                            type="vfx",
-                            client="",  # Could be extracted from folder name or config
-                            workspace_path=str(project_folder),
-                            shots=[]  # Could scan vfx folder for shots
-                        )
-                        db.add(new_project)
-                        logger.info(f"Discovered new project: {project_name} ({folder_name})")
-                    else:
-                        logger.info(f"Project already in database: {project_name} ({folder_name})")
-        
-        db.commit()
-        
-        # Return all projects (including newly discovered ones)
-        all_projects = db.query(Project).all()
-        logger.info(f"Total projects in database: {len(all_projects)}")
-        return [
-            {
-                "id": p.id,
-                "name": p.name,
-                "folder_name": p.folder_name,
-                "type": p.type,
-                "client": p.client,
-                "workspace_path": p.workspace_path,
-                "created_at": p.created_at.isoformat(),
-                "shots": p.shots
-            }
-            for p in all_projects
-        ]
-        
-    except Exception as e:
-        logger.error(f"Error scanning for projects: {e}")
-        db.rollback()
-        return discovered_projects
+        return peek_next_project_number(db)
     finally:
         db.close()
 
 
-def get_next_project_number() -> str:
-    """Calculate the next project number with a two-digit year prefix."""
-    current_year = datetime.now().strftime("%y")
-    
-    # Get database session
-    db = SessionLocal()
+def create_vfx_project_structure(project_path: Path, shots: List[str], job: Job | None = None) -> CreateResult:
+    """Create a complete VFX project structure, including shots.
+
+    Safe to call again on a partially created project; only missing
+    directories are created. When run as a job, progress is reported on the
+    job and its cancel event is honoured.
+    """
+    logger.info(f"Creating VFX project structure at: {project_path}")
+    result = create_directories(
+        project_path,
+        vfx_project_paths(shots),
+        progress=job.update_progress if job else None,
+        cancel_event=job.cancel_event if job else None,
+    )
+    if not result.cancelled:
+        logger.info(f"Complete VFX project structure created for {project_path.name}")
+    return result
+
+
+def queue_preview_generation(item_ids: List[int], key: str | None = None) -> Job | None:
+    """Queue preview rendering for item_ids; None if there is nothing to do or numpy is missing."""
+    if not item_ids:
+        return None
+    if not previews_available():
+        logger.warning("numpy is not installed, skipping HDRI preview generation")
+        return None
+    return library_jobs.submit("previews", run_preview_generation, item_ids, key=key)
+
+
+def queue_content_hashing(item_ids: List[int], key: str | None = None) -> Job | None:
+    """Queue content hashing for item_ids; None if there is nothing to do."""
+    if not item_ids:
+        return None
+    return library_jobs.submit("hashes", run_content_hashing, item_ids, key=key)
+
+
+def queue_metadata_extraction(item_ids: List[int], key: str | None = None) -> Job | None:
+    """Queue header metadata extraction for item_ids; None if there is nothing to do."""
+    if not item_ids:
+        return None
+    return library_jobs.submit("metadata", run_metadata_extraction, item_ids, key=key)
+
+
+def load_file_metadata(path: str) -> FileMetadata | None:
+    """Header metadata of path, or None to leave it for the background pass if unreadable.
+
+    Call before the write session's first query: that query begins the
+    transaction, and disk reads inside it would hold the write lock.
+    """
     try:
-        # Get all projects that start with current year
-        projects = db.query(Project).filter(Project.folder_name.like(f"{current_year}%")).all()
-        
-        if not projects:
-            return f"{current_year}0001"
+        return read_file_metadata(path)
+    except OSError:
+        return None
 
-        numbers = [int(p.folder_name[-4:]) for p in projects if p.folder_name.startswith(current_year)]
-        next_num = max(numbers) + 1 if numbers else 1
-        return f"{current_year}{next_num:04d}"
-    finally:
-        db.close()
 
+def apply_file_metadata(item: LibraryItemModel, meta: FileMetadata | None):
+    """Assign metadata from load_file_metadata to item."""
+    if meta is None:
+        item.width = item.height = item.file_format = item.file_size = item.file_mtime_ns = None
+        return
+    item.width = meta.width
+    item.height = meta.height
+    item.file_format = meta.file_format
+    item.file_size = meta.file_size
+    item.file_mtime_ns = meta.file_mtime_ns
 
-def create_dir_structure(base_path: Path, structure: dict):
-    """Recursively create directory structure."""
-    for name, content in structure.items():
-        current_path = base_path / name
-        current_path.mkdir(exist_ok=True)
-        if isinstance(content, dict):
-            create_dir_structure(current_path, content)
 
+def library_item_filters(
+    min_width: int | None = Query(None, ge=0, description="Minimum width in pixels, e.g. 8192 for 8K"),
+    min_height: int | None = Query(None, ge=0),
+    formats: str | None = Query(None, alias="format", description="Comma-separated file formats, e.g. hdr,exr"),
+    min_size: int | None = Query(None, ge=0, description="Minimum file size in bytes"),
+    max_size: int | None = Query(None, ge=0, description="Maximum file size in bytes"),
+) -> list:
+    """Metadata filters shared by the item listing endpoints, as SQL conditions"""
+    conditions = []
+    if min_width is not None:
+        conditions.append(LibraryItemModel.width >= min_width)
+    if min_height is not None:
+        conditions.append(LibraryItemModel.height >= min_height)
+    if formats:
+        names = [f.strip().lower().lstrip(".") for f in formats.split(",") if f.strip()]
+        conditions.append(LibraryItemModel.file_format.in_(names))
+    if min_size is not None:
+        conditions.append(LibraryItemModel.file_size >= min_size)
+    if max_size is not None:
+        conditions.append(LibraryItemModel.file_size <= max_size)
+    return conditions
 
-def get_vfx_shot_structure() -> dict:
-    """Returns the dictionary defining the VFX shot folder structure."""
-    common_app_structure = {
-        "work": {"scenes": {}, "cache": {"alembic": {}}},
-        "publish": {"maya_exports": {}, "obj": {}}
-    }
-    return {
-        "artwork": {},
-        "modeling": {app: common_app_structure for app in ["maya", "houdini", "zbrush"]},
-        "animation": {app: common_app_structure for app in ["maya", "houdini"]},
-        "fx": {
-            app: {
-                "work": {"scenes": {}, "cache": {"sim": {}, "geo": {}}},
-                "publish": {"fx_exports": {}}
-            } for app in ["houdini", "maya", "realflow"]
-        },
-        "lighting": {
-            app: {
-                "work": {"scenes": {}, "cache": {}},
-                "publish": {"lighting_exports": {}}
-            } for app in ["maya", "houdini", "katana"]
-        },
-        "rendering": {
-            "beauty": {},
-            "passes": {pass_name: {} for pass_name in ["diffuse", "specular", "reflection", "shadow", "ambient_occlusion"]}
-        },
-        "comp": {
-            "nuke": {
-                "work": {"scripts": {}, "precomps": {}},
-                "publish": {"comp_exports": {}},
-                "elements": {}, "images": {}, "renders": {}
-            }
-        }
-    }
 
+def library_selection_condition(db: Session, selection: LibraryItemSelection):
+    """SQL condition for the items a batch request selects; 400 if it selects nothing in particular."""
+    filters = library_item_filters(
+        min_width=selection.min_width, min_height=selection.min_height, formats=selection.format,
+        min_size=selection.min_size, max_size=selection.max_size
+    )
+    if selection.ids is None and selection.library_id is None and not (selection.tags or "").strip() and not filters:
+        raise HTTPException(status_code=400, detail="Select items by ids, library_id, tags or filters")
+    try:
+        condition = tag_filter(db, parse_tag_expression(selection.tags or ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selection.ids is not None:
+        condition = condition & LibraryItemModel.id.in_(selection.ids)
+    if selection.library_id is not None:
+        condition = condition & (LibraryItemModel.library_id == selection.library_id)
+    for extra in filters:
+        condition = condition & extra
+    return condition
 
-def create_vfx_project_structure(project_path: Path, shots: List[str]):
-    """Create a complete VFX project structure, including shots."""
-    logger.info(f"Creating VFX project structure at: {project_path}")
-    project_structure = {
-        "in": {"tracking": {}, "reference": {"media": {}, "notes": {}}, "models": {}},
-        "out": {"postings": {"Posting01": {}}},
-        "vfx": {shot: get_vfx_shot_structure() for shot in shots}
+
+def run_library_ingest(job: Job, library_id: int, root: Path, options: LibraryIngest, category: str) -> dict:
+    """Job body for POST /libraries/{library_id}/ingest; previews of new items are queued afterwards."""
+    result = ingest_directory(
+        job, library_id, root, options.extensions,
+        recursive=options.recursive, category=category, path_tags=options.tags_from_path
+    )
+    if result.inserted:
+        queue_preview_generation(items_needing_previews(library_id))
+        queue_content_hashing(result.item_ids)
+        queue_metadata_extraction(result.item_ids)
+    return result.to_dict()
+
+
+def run_project_creation(job: Job, project_data: VFXProjectCreate, project_path: Path) -> dict:
+    """Job body for POST /projects/create: build the folders, then record the project."""
+    structure = create_vfx_project_structure(project_path, project_data.shots, job)
+    if structure.cancelled:
+        raise JobCancelled()
+
+    project_info = {
+        "name": project_data.name,
+        "type": "general_vfx",
+        "client": project_data.client,
+        "shots": project_data.shots,
+        "created_at": datetime.now().isoformat(),
     }
-    create_dir_structure(project_path, project_structure)
-    logger.info(f"Complete VFX project structure created for {project_path.name}")
+    
+    # Save project info to file
+    with open(project_path / "project_info.json", 'w') as f:
+        json.dump(project_info, f, indent=2)
+
+    # Save to database; a resumed creation (or the background scanner)
+    # may already have written the row
+    db = SessionLocal()
+    try:
+        new_project = db.query(Project).filter(Project.folder_name == project_data.folderName).first()
+        if not new_project:
+            new_project = Project(folder_name=project_data.folderName)
+            db.add(new_project)
+        new_project.name = project_data.name
+        new_project.type = "general_vfx"
+        new_project.client = project_data.client
+        new_project.workspace_path = str(project_path)
+        new_project.deleted_at = None
+        known_shots = {shot.name for shot in new_project.shots}
+        for shot in dict.fromkeys(project_data.shots):
+            if shot not in known_shots:
+                new_project.shots.append(Shot(name=shot, path=str(project_path / "vfx" / shot)))
+        observe_project_numbers(db, [project_data.folderName])
+        db.commit()
+        db.refresh(new_project)
+
+        logger.info(f"VFX Project created successfully: {project_data.folderName}")
+        return {
+            "project": {**project_serializer(new_project), "shot_count": len(new_project.shots)},
+            "directories": {
+                "total": structure.total,
+                "created": structure.created,
+                "existing": structure.existing
+            }
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 # --- API Endpoints ---
+# Endpoints that touch the database or the filesystem are plain `def`, so
+# FastAPI runs them on the worker thread pool (sized by THREADPOOL_SIZE)
+# instead of blocking the event loop. Only endpoints that never block are
+# `async def`.
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "VFX Pipeline Companion API is running", "time": datetime.now().isoformat()}
 
 
+@app.get("/events")
+async def stream_changes():
+    """Stream collection changes as Server-Sent Events so clients refetch instead of polling.
+
+    The first event carries every collection's current version; each
+    `change` event after it carries the collections changed since, with
+    bursts of writes coalesced into one event.
+    """
+    async def events():
+        with broadcaster.subscribe() as subscriber:
+            current = {"epoch": versions.epoch, "versions": versions.snapshot()}
+            yield f"retry: 5000\nevent: versions\ndata: {dumps(current).decode()}\n\n"
+            while True:
+                changes = await subscriber.next(HEARTBEAT_INTERVAL)
+                if subscriber.closed:
+                    break
+                if changes is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"event: change\ndata: {dumps(changes).decode()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/changes")
+def get_changes(
+    since: int | None = Query(None, ge=0, description="Cursor returned by the previous call"),
+    limit: int = Query(500, ge=1, le=CHANGES_MAX_PAGE),
+    db: Session = Depends(get_read_db)
+):
+    """Projects, libraries, library items, tools and settings changed since a cursor.
+
+    Without since only the current cursor is returned: take it, load
+    everything, then poll from it. A 410 means the cursor is older than the
+    compacted log and the client has to load everything again.
+    """
+    if since is None:
+        return {"changes": [], "cursor": latest_cursor(db), "has_more": False}
+    try:
+        changes, cursor, has_more = changes_since(db, since, limit)
+    except CursorExpired:
+        raise HTTPException(status_code=410, detail="Cursor has expired; reload and start from a new cursor")
+    return FastJSONResponse({"changes": changes, "cursor": cursor, "has_more": has_more})
+
+
 @app.get("/")
 async def root():
     return {"message": "VFX Pipeline Companion API", "status": "running"}
 
 
 @app.get("/settings", response_model=Settings)
-async def get_settings(db: Session = Depends(get_db)):
+def get_settings(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get current settings"""
+    if (not_modified := check_collection_cache(request, response, "settings")) is not None:
+        return not_modified
     settings = db.query(SettingsModel).first()
     if not settings:
         # Create default settings if none exist
@@ -254,7 +416,7 @@ async def get_settings(db: Session = Depends(get_db)):
 
 
 @app.post("/settings")
-async def save_settings_endpoint(settings: Settings, db: Session = Depends(get_db)):
+def save_settings_endpoint(settings: Settings, db: Session = Depends(get_db)):
     """Save settings"""
     try:
         db_settings = db.query(SettingsModel).first()
@@ -269,6 +431,8 @@ async def save_settings_endpoint(settings: Settings, db: Session = Depends(get_d
         db_settings.updated_at = datetime.utcnow()
         
         db.commit()
+        sync_service.reload()
+        tool_discovery.start()
         return {"message": "Settings saved successfully", "settings": settings}
     except Exception as e:
         logger.error(f"Error in save_settings: {e}")
@@ -276,7 +440,7 @@ async def save_settings_endpoint(settings: Settings, db: Session = Depends(get_d
 
 
 @app.post("/settings/validate-path")
-async def validate_path(path_data: PathData):
+def validate_path(path_data: PathData):
     """Validate if a path exists and has the expected structure"""
     try:
         path_obj = Path(path_data.path)
@@ -297,71 +461,135 @@ async def validate_path(path_data: PathData):
 
 
 @app.get("/projects/next-number")
-async def get_next_project_number_endpoint():
-    """Get the next project number"""
+def get_next_project_number_endpoint():
+    """Get the next project number (not reserved; see /projects/numbers/reserve)"""
     return {"next_number": get_next_project_number()}
 
 
-@app.post("/projects/create")
-async def create_vfx_project(project_data: VFXProjectCreate, db: Session = Depends(get_db)):
-    """Create a VFX project with detailed folder structure and shots"""
+@app.post("/projects/numbers/reserve")
+def reserve_project_numbers_endpoint(count: int = Query(1, ge=1, le=1000), db: Session = Depends(get_db)):
+    """Atomically reserve one or more consecutive project numbers"""
+    try:
+        return {"numbers": reserve_project_numbers(db, count)}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to reserve project numbers: {e}")
+        raise HTTPException(status_code=500, detail="Failed to reserve project numbers")
+
+
+# Serializes the number check and job submission of project creations
+project_number_lock = threading.Lock()
+
+
+@app.post("/projects/create", status_code=202)
+def create_vfx_project(project_data: VFXProjectCreate):
+    """Queue creation of a VFX project with detailed folder structure and shots.
+
+    Returns the job immediately; poll /projects/jobs/{job_id} or stream
+    /projects/jobs/{job_id}/events for progress. The project row and
+    project_info.json are written when the job completes.
+
+    Without folderName the next project number is reserved here. A given
+    folderName must use a number from /projects/numbers/reserve that no
+    other project uses (409 otherwise).
+    """
     try:
         logger.info(f"Creating VFX project with data: {project_data.name}")
         root_path_obj = Path(project_data.rootPath)
         projects_folder = root_path_obj / "Projects"
-        project_path = projects_folder / project_data.folderName
-
         projects_folder.mkdir(exist_ok=True)
 
-        if project_path.exists():
-            raise HTTPException(status_code=400, detail=f"Project folder '{project_data.folderName}' already exists.")
-
-        project_path.mkdir(parents=True)
-        create_vfx_project_structure(project_path, project_data.shots)
+        if not project_data.folderName:
+            # Number the project here, atomically, rather than trusting a number peeked at earlier
+            db = SessionLocal()
+            try:
+                project_number = reserve_project_numbers(db)[0]
+            finally:
+                db.close()
+            project_data.folderName = project_folder_name(project_number, project_data.name)
+        project_path = projects_folder / project_data.folderName
 
-        project_info = {
-            "name": project_data.name,
-            "type": "general_vfx",
-            "client": project_data.client,
-            "shots": project_data.shots,
-            "created_at": datetime.now().isoformat(),
-        }
-        
-        # Save project info to file
-        with open(project_path / "project_info.json", 'w') as f:
-            json.dump(project_info, f, indent=2)
-
-        # Save to database
-        new_project = Project(
-            name=project_data.name,
-            folder_name=project_data.folderName,
-            type="general_vfx",
-            client=project_data.client,
-            workspace_path=str(project_path),
-            shots=project_data.shots
-        )
-        db.add(new_project)
-        db.commit()
-        db.refresh(new_project)
+        if project_path.exists() and not project_data.resume:
+            raise HTTPException(status_code=400, detail=f"Project folder '{project_data.folderName}' already exists.")
 
-        logger.info(f"VFX Project created successfully: {project_data.folderName}")
-        return {"message": "VFX Project created successfully", "project": new_project}
+        # Keyed by number, so two creations claiming the same number cannot both be active;
+        # once one finishes, its row and folder make check_project_number reject the other
+        with project_number_lock:
+            db = ReadSessionLocal()
+            try:
+                project_number = check_project_number(db, project_data.folderName, projects_folder)
+            finally:
+                db.close()
+            job = project_jobs.submit(
+                "create_project", run_project_creation, project_data, project_path,
+                key=f"project-number:{project_number}" if project_number else str(project_path)
+            )
+        return {"message": "VFX Project creation queued", "folderName": project_data.folderName, "job": job.to_dict()}
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to create VFX project: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to create VFX project: {str(e)}")
 
 
+@app.get("/projects/jobs")
+async def list_project_jobs():
+    """List queued, running and recently finished project creation jobs"""
+    return [job.to_dict() for job in project_jobs.list_jobs()]
+
+
+@app.get("/projects/jobs/{job_id}")
+async def get_project_job(job_id: str):
+    """Get the status and progress of a project creation job"""
+    job = project_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/projects/jobs/{job_id}/events")
+async def stream_project_job(job_id: str):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    job = project_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        while True:
+            snapshot = job.to_dict()
+            if snapshot != last:
+                yield f"data: {dumps(snapshot).decode()}\n\n"
+                last = snapshot
+            if job.finished:
+                break
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/projects/jobs/{job_id}/cancel")
+async def cancel_project_job(job_id: str):
+    """Cancel a project creation job; directories already created are kept for resume"""
+    job = project_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @app.get("/projects/scan")
-async def scan_projects():
-    """Manually trigger project scanning"""
+def scan_projects(full: bool = True, db: Session = Depends(get_read_db)):
+    """Force a resync of the project table with the Projects folder and report what changed"""
     try:
-        projects = scan_for_existing_projects()
+        scan_result = sync_service.resync(full=full)
+        projects = list_live_projects(db)
         return {
             "message": f"Project scan completed. Found {len(projects)} projects.",
-            "projects": projects
+            "projects": projects,
+            "scan": scan_result.to_dict()
         }
     except Exception as e:
         logger.error(f"Error scanning projects: {e}")
@@ -369,84 +597,535 @@ async def scan_projects():
 
 
 @app.get("/projects")
-async def get_projects(db: Session = Depends(get_db)):
-    """Get all projects, including newly discovered ones"""
+def get_projects(
+    request: Request,
+    response: Response,
+    after: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=PROJECTS_MAX_PAGE),
+    sort: str = Query("created_at", pattern="^(created_at|name|id)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    project_type: str | None = Query(None, alias="type"),
+    client: str | None = None,
+    year: str | None = Query(None, pattern=r"^(\d{2}|\d{4})$", description="Year of the project number, e.g. 24 or 2024"),
+    q: str | None = Query(None, max_length=200, description="Words to look for; each one matches as a prefix"),
+    fields: tuple | None = Depends(requested_fields(project_serializer, "shot_count")),
+    db: Session = Depends(get_read_db)
+):
+    """Keyset-paginated projects, newest first by default.
+
+    Pass the returned next_cursor as `after` to fetch the next page. total
+    counts all projects matching the filters and is cached until a project
+    changes. q matches name, folder name, client and type through the
+    search index. The background sync service keeps the table current.
+    """
+    if (not_modified := check_collection_cache(request, response, "projects")) is not None:
+        return not_modified
+
+    conditions = [Project.deleted_at.is_(None)]
+    if project_type:
+        conditions.append(Project.type == project_type)
+    if client:
+        conditions.append(Project.client == client)
+    if year:
+        conditions.append(Project.folder_name.op("GLOB")(f"{year[-2:]}[0-9][0-9][0-9][0-9]*"))
+    if q and (ids := matching_ids("project", q)) is not None:
+        conditions.append(Project.id.in_(ids))
+
     try:
-        # Scan for existing projects first
-        all_projects = scan_for_existing_projects()
-        return all_projects
-    except Exception as e:
-        logger.error(f"Error getting projects: {e}")
-        # Fallback to database-only projects
-        projects = db.query(Project).all()
-        return [
+        projects, next_cursor = keyset_page(
+            db.query(Project).filter(*conditions), PROJECT_SORTS[sort], Project.id, order == "desc", after, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = project_serializer.many(projects, fields)
+    if wants(fields, "shot_count") and projects:
+        shot_counts = dict(
+            db.query(Shot.project_id, func.count(Shot.id))
+            .filter(Shot.project_id.in_([p.id for p in projects]))
+            .group_by(Shot.project_id)
+            .all()
+        )
+        for project, item in zip(projects, items):
+            item["shot_count"] = shot_counts.get(project.id, 0)
+    total = count_cache.get_or_count(
+        "projects", (project_type, client, year[-2:] if year else None, q),
+        lambda: db.query(func.count(Project.id)).filter(*conditions).scalar()
+    )
+    return FastJSONResponse({"items": items, "total": total, "next_cursor": next_cursor}, headers=response.headers)
+
+
+@app.get("/projects/{project_id}/shots")
+def get_project_shots(
+    project_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db)
+):
+    """Page through the shots of a project"""
+    project = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    total = db.query(func.count(Shot.id)).filter(Shot.project_id == project_id).scalar()
+    shots = (
+        db.query(Shot)
+        .filter(Shot.project_id == project_id)
+        .order_by(Shot.name)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return {
+        "project_id": project_id,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "shots": [
             {
-                "id": p.id,
-                "name": p.name,
-                "folder_name": p.folder_name,
-                "type": p.type,
-                "client": p.client,
-                "workspace_path": p.workspace_path,
-                "created_at": p.created_at.isoformat(),
-                "shots": p.shots
+                "id": shot.id,
+                "name": shot.name,
+                "path": shot.path,
+                "created_at": shot.created_at.isoformat()
             }
-            for p in projects
+            for shot in shots
         ]
+    }
+
+
+@app.get("/search")
+def search_endpoint(
+    q: str = Query(..., description="Words to look for; each one matches as a prefix"),
+    kinds: str | None = Query(None, description=f"Comma-separated subset of {', '.join(SEARCH_KINDS)}"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_PAGE),
+    db: Session = Depends(get_read_db)
+):
+    """Ranked full-text search over projects, shots, library items and tools"""
+    kind_list = [kind.strip() for kind in kinds.split(",") if kind.strip()] if kinds else []
+    unknown = set(kind_list) - set(SEARCH_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search kinds: {', '.join(sorted(unknown))}")
+
+    results = search(db, q, kind_list, offset=offset, limit=limit + 1)
+    has_more = len(results) > limit
+    return {
+        "query": q,
+        "results": results[:limit],
+        "next_offset": offset + limit if has_more else None
+    }
 
 
 @app.get("/tools")
-async def get_tools(db: Session = Depends(get_db)):
-    """Get all tools"""
-    tools = db.query(Tool).all()
-    return [
-        {
-            "id": t.id,
-            "name": t.name,
-            "category": t.category,
-            "description": t.description,
-            "executable_path": t.executable_path,
-            "is_favorite": t.is_favorite,
-            "last_used": t.last_used.isoformat() if t.last_used else None
-        }
-        for t in tools
-    ]
+def get_tools(
+    request: Request,
+    response: Response,
+    after: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=TOOLS_MAX_PAGE),
+    sort: str = Query("name", pattern="^(name|id)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    category: str | None = None,
+    favorite: bool | None = None,
+    q: str | None = Query(None, max_length=200, description="Words to look for; each one matches as a prefix"),
+    fields: tuple | None = Depends(requested_fields(tool_serializer)),
+    db: Session = Depends(get_read_db)
+):
+    """Keyset-paginated tools, by name by default; see GET /projects for paging"""
+    if (not_modified := check_collection_cache(request, response, "tools")) is not None:
+        return not_modified
+
+    conditions = []
+    if category:
+        conditions.append(Tool.category == category)
+    if favorite is not None:
+        conditions.append(func.coalesce(Tool.is_favorite, False) == favorite)
+    if q and (ids := matching_ids("tool", q)) is not None:
+        conditions.append(Tool.id.in_(ids))
+
+    try:
+        tools, next_cursor = keyset_page(
+            db.query(Tool).filter(*conditions), TOOL_SORTS[sort], Tool.id, order == "desc", after, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = count_cache.get_or_count(
+        "tools", (category, favorite, q),
+        lambda: db.query(func.count(Tool.id)).filter(*conditions).scalar()
+    )
+    return FastJSONResponse(
+        {"items": tool_serializer.many(tools, fields), "total": total, "next_cursor": next_cursor},
+        headers=response.headers
+    )
+
+
+@app.post("/tools/{tool_id}/launch")
+def launch_tool(tool_id: int, launch: ToolLaunch | None = None, db: Session = Depends(get_read_db)):
+    """Start a tool without waiting for it, optionally in a project's workspace and environment.
+
+    last_used and launch_count are written in batches shortly afterwards.
+    """
+    launch = launch or ToolLaunch()
+    tool = db.query(Tool).filter(Tool.id == tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    project = None
+    if launch.project_id is not None:
+        project = db.query(Project).filter(Project.id == launch.project_id, Project.deleted_at.is_(None)).first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        return tool_launcher.launch(tool, project, launch.args).to_dict()
+    except LaunchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/tools/discover")
+def discover_tools():
+    """Find installed DCC applications and add or fill in their Tool rows.
+
+    Searches $PATH, <root_path>/Tools and the install prefixes in
+    PIPELINE_TOOL_PREFIXES; unchanged directories are not listed again.
+    """
+    try:
+        return tool_discovery.sync()
+    except Exception as e:
+        logger.error(f"Error in discover_tools: {e}")
+        raise HTTPException(status_code=500, detail=f"Tool discovery failed: {e}")
+
+
+@app.get("/tools/launches")
+async def list_tool_launches():
+    """Running and recently exited tool processes with their exit codes and start-up latency"""
+    launches = tool_launcher.list_launches()
+    return {
+        "running": sum(1 for launch in launches if launch.status == LAUNCH_RUNNING),
+        "launches": [launch.to_dict() for launch in reversed(launches)]
+    }
 
 
 @app.get("/libraries")
-async def get_libraries(db: Session = Depends(get_db)):
-    """Get all libraries with their items"""
-    libraries = db.query(LibraryModel).all()
-    result = []
-    
-    for library in libraries:
-        library_dict = {
-            "id": library.id,
-            "name": library.name,
-            "description": library.description,
-            "category": library.category,
-            "created_at": library.created_at.isoformat(),
-            "updated_at": library.updated_at.isoformat(),
-            "items": [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "path": item.path,
-                    "preview_path": item.preview_path,
-                    "category": item.category,
-                    "tags": item.tags,
-                    "created_at": item.created_at.isoformat(),
-                    "updated_at": item.updated_at.isoformat()
-                }
-                for item in library.items
-            ]
-        }
-        result.append(library_dict)
-    
-    return result
+def get_libraries(
+    request: Request,
+    response: Response,
+    fields: tuple | None = Depends(requested_fields(library_serializer, "items")),
+    db: Session = Depends(get_read_db)
+):
+    """Get all libraries with their items.
+
+    Items are loaded with one extra query for all libraries, and not at all
+    when fields= leaves them out. Large libraries should use
+    /libraries/summary and /libraries/{library_id}/items instead.
+    """
+    if (not_modified := check_collection_cache(request, response, "libraries")) is not None:
+        return not_modified
+    query = db.query(LibraryModel)
+    if wants(fields, "items"):
+        query = query.options(selectinload(LibraryModel.items))
+    libraries = query.all()
+    rows = library_serializer.many(libraries, fields)
+    if wants(fields, "items"):
+        for library, row in zip(libraries, rows):
+            row["items"] = library_item_serializer.many(library.items)
+    return FastJSONResponse(rows, headers=response.headers)
+
+
+@app.get("/libraries/summary")
+def get_library_summary(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """Get all libraries with item counts but without their items"""
+    if (not_modified := check_collection_cache(request, response, "libraries")) is not None:
+        return not_modified
+    item_counts = dict(
+        db.query(LibraryItemModel.library_id, func.count(LibraryItemModel.id))
+        .group_by(LibraryItemModel.library_id)
+        .all()
+    )
+    return FastJSONResponse([
+        {**library_serializer(library), "item_count": item_counts.get(library.id, 0)}
+        for library in db.query(LibraryModel).all()
+    ], headers=response.headers)
+
+
+@app.get("/libraries/search")
+def search_library_items(
+    tags: str = Query("", description='Tag expression, e.g. outdoor AND (warm OR "golden hour") AND NOT city'),
+    library_id: int | None = None,
+    after: int | None = Query(None, description="Return items with an id greater than this cursor"),
+    limit: int = Query(100, ge=1, le=LIBRARY_ITEMS_MAX_PAGE),
+    facets: int = Query(20, ge=0, le=TAG_FACETS_MAX, description="Number of tag facets to return"),
+    filters: list = Depends(library_item_filters),
+    fields: tuple | None = Depends(requested_fields(library_item_serializer)),
+    db: Session = Depends(get_read_db)
+):
+    """Find library items by tag expression.
+
+    Supports AND, OR, NOT and parentheses; adjacent tags are ANDed and tags
+    match case-insensitively. Returns one keyset page of items, the total
+    number of matches and the most common tags among all matches.
+    """
+    try:
+        expression = parse_tag_expression(tags)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    condition = tag_filter(db, expression)
+    if library_id is not None:
+        condition = condition & (LibraryItemModel.library_id == library_id)
+    for extra in filters:
+        condition = condition & extra
+
+    query = db.query(LibraryItemModel).filter(condition)
+    if after is not None:
+        query = query.filter(LibraryItemModel.id > after)
+    items = query.order_by(LibraryItemModel.id).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    total = db.query(func.count(LibraryItemModel.id)).filter(condition).scalar()
+
+    return FastJSONResponse({
+        "items": library_item_serializer.many(items, fields),
+        "total": total,
+        "facets": tag_facets(db, condition, library_id, total, facets) if facets else [],
+        "next_cursor": items[-1].id if has_more else None
+    })
+
+
+@app.get("/libraries/{library_id}/items")
+def get_library_items(
+    library_id: int,
+    after: int | None = Query(None, description="Return items with an id greater than this cursor"),
+    limit: int = Query(500, ge=1, le=LIBRARY_ITEMS_MAX_PAGE),
+    filters: list = Depends(library_item_filters),
+    fields: tuple | None = Depends(requested_fields(library_item_serializer)),
+    db: Session = Depends(get_read_db)
+):
+    """Keyset-paginated items of a library, streamed as JSON.
+
+    Pass the returned next_cursor as `after` to fetch the next page;
+    next_cursor is null on the last page. Items can be filtered by
+    resolution, format and file size.
+    """
+    if not db.query(LibraryModel.id).filter(LibraryModel.id == library_id).first():
+        raise HTTPException(status_code=404, detail="Library not found")
+
+    def stream():
+        # The request's session may be closed before streaming finishes,
+        # so the generator owns its own session
+        stream_db = ReadSessionLocal()
+        try:
+            query = stream_db.query(LibraryItemModel).filter(LibraryItemModel.library_id == library_id, *filters)
+            if after is not None:
+                query = query.filter(LibraryItemModel.id > after)
+            rows = query.order_by(LibraryItemModel.id).limit(limit + 1).yield_per(LIBRARY_ITEMS_STREAM_BATCH)
+
+            yield f'{{"library_id": {library_id}, "items": ['.encode()
+            count = 0
+            last_id = None
+            has_more = False
+            for item in rows:
+                if count == limit:
+                    has_more = True
+                    break
+                yield (b"," if count else b"") + dumps(library_item_serializer(item, fields))
+                last_id = item.id
+                count += 1
+            next_cursor = last_id if has_more else None
+            yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'.encode()
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+
+@app.get("/libraries/{library_id}/items/{item_id}/preview")
+def get_library_item_preview(
+    library_id: int,
+    item_id: int,
+    request: Request,
+    size: int | None = Query(None, ge=1, description="Smallest long-side size wanted, for cached previews"),
+    db: Session = Depends(get_read_db),
+):
+    """Serve an item's preview image with ETag, If-None-Match and Range support.
+
+    Small previews are kept in memory after the first request. A cached
+    preview that was evicted from disk is queued for rendering again.
+    """
+    item = db.query(LibraryItemModel.path, LibraryItemModel.preview_path).filter(
+        LibraryItemModel.id == item_id,
+        LibraryItemModel.library_id == library_id
+    ).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not item.preview_path:
+        raise HTTPException(status_code=404, detail="Item has no preview")
+
+    path, etag = resolve_preview(item.preview_path, size)
+    try:
+        return file_response(
+            request.headers, path, etag=etag, cache=thumbnail_cache,
+            immutable=etag is not None, touch=etag is not None
+        )
+    except FileNotFoundError:
+        if etag is not None and is_previewable(item.path) and previews_available():
+            try:
+                queue_preview_generation([item_id], key=f"previews:item:{item_id}")
+            except ValueError:
+                pass
+        raise HTTPException(status_code=404, detail="Preview file not found")
+
+
+@app.get("/libraries/{library_id}/items/{item_id}/asset")
+def get_library_item_asset(library_id: int, item_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Stream an item's file with ETag, If-None-Match and Range support.
+
+    The ETag is the content hash while the file still matches the size and
+    mtime it was hashed at, so copies of one file share a validator.
+    """
+    item = db.query(
+        LibraryItemModel.path, LibraryItemModel.content_hash,
+        LibraryItemModel.content_size, LibraryItemModel.content_mtime_ns
+    ).filter(
+        LibraryItemModel.id == item_id,
+        LibraryItemModel.library_id == library_id
+    ).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    try:
+        stat_result = os.stat(item.path)
+        etag = None
+        if item.content_hash and (item.content_size, item.content_mtime_ns) == (
+            stat_result.st_size, stat_result.st_mtime_ns
+        ):
+            etag = f'"{item.content_hash}"'
+        filename = os.path.basename(item.path)
+        return file_response(
+            request.headers, item.path, etag=etag, stat_result=stat_result,
+            headers={"content-disposition": f"inline; filename*=utf-8''{quote(filename)}"}
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Asset file not found")
+
+
+@app.post("/libraries/{library_id}/previews", status_code=202)
+def generate_library_previews(library_id: int, refresh: bool = False, db: Session = Depends(get_read_db)):
+    """Queue preview rendering for HDR items of a library that have none.
+
+    With refresh=true, previews already in the cache are checked as well:
+    evicted ones and those of changed source files are rendered again.
+    """
+    if not db.query(LibraryModel.id).filter(LibraryModel.id == library_id).first():
+        raise HTTPException(status_code=404, detail="Library not found")
+    if not previews_available():
+        raise HTTPException(status_code=501, detail="Preview generation needs numpy, which is not installed")
+    try:
+        job = queue_preview_generation(
+            items_needing_previews(library_id, refresh=refresh), key=f"previews:{library_id}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        return {"message": "All items already have previews", "job": None}
+    return {"message": "Preview generation queued", "job": job.to_dict()}
+
+
+@app.post("/libraries/{library_id}/ingest", status_code=202)
+def ingest_library_folder(library_id: int, options: LibraryIngest, db: Session = Depends(get_read_db)):
+    """Queue a bulk import of every matching file below a folder into a library.
+
+    Paths the library already contains are skipped, so re-running an ingest
+    only adds new files. Poll /libraries/jobs/{job_id} for progress; its
+    stats hold the scanned, inserted and skipped counts.
+    """
+    library = db.query(LibraryModel).filter(LibraryModel.id == library_id).first()
+    if not library:
+        raise HTTPException(status_code=404, detail="Library not found")
+    root = Path(options.path)
+    if not root.is_dir():
+        raise HTTPException(status_code=400, detail=f"Folder '{options.path}' does not exist")
+    if not options.extensions:
+        raise HTTPException(status_code=400, detail="At least one extension is required")
+
+    try:
+        job = library_jobs.submit(
+            "ingest", run_library_ingest, library_id, root, options, options.category or library.category,
+            key=f"ingest:{library_id}:{root}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Queued ingest of {root} into library {library_id}")
+    return {"message": "Library ingest queued", "job": job.to_dict()}
+
+
+@app.post("/libraries/hashes", status_code=202)
+def hash_library_items(
+    library_id: int | None = None,
+    verify: bool = Query(False, description="Re-check every item and re-hash files whose size or mtime changed"),
+):
+    """Queue content hashing of items that have no hash yet (all libraries unless library_id is given)"""
+    try:
+        job = queue_content_hashing(
+            items_needing_hashes(library_id, verify=verify), key=f"hashes:{library_id or 'all'}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        return {"message": "All items are already hashed", "job": None}
+    return {"message": "Content hashing queued", "job": job.to_dict()}
+
+
+@app.post("/libraries/metadata", status_code=202)
+def extract_library_metadata(
+    library_id: int | None = None,
+    verify: bool = Query(False, description="Re-check every item and re-read headers of files whose mtime changed"),
+):
+    """Queue header metadata extraction for items never inspected (all libraries unless library_id is given)"""
+    try:
+        job = queue_metadata_extraction(
+            items_needing_metadata(library_id, verify=verify), key=f"metadata:{library_id or 'all'}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        return {"message": "All items already have metadata", "job": None}
+    return {"message": "Metadata extraction queued", "job": job.to_dict()}
+
+
+@app.get("/libraries/duplicates")
+def get_library_duplicates(library_id: int | None = None, db: Session = Depends(get_read_db)):
+    """Groups of library items with identical file contents, by stored content hash"""
+    groups = find_duplicates(db, library_id)
+    return {
+        "groups": groups,
+        "duplicate_items": sum(len(group["items"]) - 1 for group in groups),
+        "wasted_bytes": sum(group["wasted_bytes"] for group in groups)
+    }
+
+
+@app.get("/libraries/jobs")
+async def list_library_jobs():
+    """List queued, running and recently finished library jobs"""
+    return [job.to_dict() for job in library_jobs.list_jobs()]
+
+
+@app.get("/libraries/jobs/{job_id}")
+async def get_library_job(job_id: str):
+    """Get the status and progress of a library job"""
+    job = library_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.post("/libraries/jobs/{job_id}/cancel")
+async def cancel_library_job(job_id: str):
+    """Cancel a library job; work finished so far is kept"""
+    job = library_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
 @app.post("/libraries")
-async def create_library(library: LibraryCreate, db: Session = Depends(get_db)):
+def create_library(library: LibraryCreate, db: Session = Depends(get_db)):
     """Create a new library"""
     try:
         new_library = LibraryModel(
@@ -465,8 +1144,9 @@ async def create_library(library: LibraryCreate, db: Session = Depends(get_db)):
 
 
 @app.post("/libraries/{library_id}/items")
-async def add_library_item(library_id: int, item: LibraryItemCreate, db: Session = Depends(get_db)):
+def add_library_item(library_id: int, item: LibraryItemCreate, db: Session = Depends(get_db)):
     """Add a new item to a library"""
+    meta = load_file_metadata(item.path)
     try:
         # Check if library exists
         library = db.query(LibraryModel).filter(LibraryModel.id == library_id).first()
@@ -481,22 +1161,19 @@ async def add_library_item(library_id: int, item: LibraryItemCreate, db: Session
             category=item.category,
             tags=item.tags
         )
+        apply_file_metadata(new_item, meta)
         
         db.add(new_item)
+        set_item_tags(db, new_item, item.tags)
         db.commit()
         db.refresh(new_item)
         
+        if not new_item.preview_path and is_previewable(new_item.path):
+            queue_preview_generation([new_item.id])
+        queue_content_hashing([new_item.id])
+        
         logger.info(f"Added new item '{item.name}' to library {library_id}")
-        return {
-            "id": new_item.id,
-            "name": new_item.name,
-            "path": new_item.path,
-            "preview_path": new_item.preview_path,
-            "category": new_item.category,
-            "tags": new_item.tags,
-            "created_at": new_item.created_at.isoformat(),
-            "updated_at": new_item.updated_at.isoformat()
-        }
+        return library_item_serializer(new_item)
     except HTTPException:
         raise
     except Exception as e:
@@ -505,8 +1182,21 @@ async def add_library_item(library_id: int, item: LibraryItemCreate, db: Session
 
 
 @app.put("/libraries/{library_id}/items/{item_id}")
-async def update_library_item(library_id: int, item_id: int, item: LibraryItemUpdate, db: Session = Depends(get_db)):
+def update_library_item(library_id: int, item_id: int, item: LibraryItemUpdate, db: Session = Depends(get_db)):
     """Update an existing library item"""
+    # Read the new file's header before the write transaction starts, and
+    # only if the path actually changes
+    meta = None
+    if item.path is not None:
+        read_db = ReadSessionLocal()
+        try:
+            stored_path = read_db.query(LibraryItemModel.path).filter(
+                LibraryItemModel.id == item_id, LibraryItemModel.library_id == library_id
+            ).scalar()
+        finally:
+            read_db.close()
+        if stored_path is not None and item.path != stored_path:
+            meta = load_file_metadata(item.path)
     try:
         # Find the item
         db_item = db.query(LibraryItemModel).filter(
@@ -518,30 +1208,36 @@ async def update_library_item(library_id: int, item_id: int, item: LibraryItemUp
             raise HTTPException(status_code=404, detail="Item not found")
         
         # Update fields
+        path_changed = item.path is not None and item.path != db_item.path
         if item.name is not None:
             db_item.name = item.name
-        if item.path is not None:
+        if path_changed:
             db_item.path = item.path
+            # Hashed for the old file; rehashed once the change is committed
+            db_item.content_hash = None
+            db_item.content_size = None
+            db_item.content_mtime_ns = None
+            apply_file_metadata(db_item, meta)
+            # A rendered preview shows the old file; one set by hand is kept
+            if is_cached_preview(db_item.preview_path):
+                db_item.preview_path = None
         if item.preview_path is not None:
             db_item.preview_path = item.preview_path
         if item.tags is not None:
             db_item.tags = item.tags
+            set_item_tags(db, db_item, item.tags)
         
         db_item.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_item)
         
+        if path_changed:
+            queue_content_hashing([db_item.id])
+            if not db_item.preview_path and is_previewable(db_item.path):
+                queue_preview_generation([db_item.id])
+        
         logger.info(f"Updated item {item_id} in library {library_id}")
-        return {
-            "id": db_item.id,
-            "name": db_item.name,
-            "path": db_item.path,
-            "preview_path": db_item.preview_path,
-            "category": db_item.category,
-            "tags": db_item.tags,
-            "created_at": db_item.created_at.isoformat(),
-            "updated_at": db_item.updated_at.isoformat()
-        }
+        return library_item_serializer(db_item)
     except HTTPException:
         raise
     except Exception as e:
@@ -550,7 +1246,7 @@ async def update_library_item(library_id: int, item_id: int, item: LibraryItemUp
 
 
 @app.delete("/libraries/{library_id}/items/{item_id}")
-async def delete_library_item(library_id: int, item_id: int, db: Session = Depends(get_db)):
+def delete_library_item(library_id: int, item_id: int, db: Session = Depends(get_db)):
     """Delete a library item"""
     try:
         # Find the item
@@ -575,11 +1271,49 @@ async def delete_library_item(library_id: int, item_id: int, db: Session = Depen
         raise HTTPException(status_code=500, detail="Failed to delete item")
 
 
+@app.post("/libraries/items/batch-update")
+def batch_update_library_items(request: LibraryItemBatchUpdate, db: Session = Depends(get_db)):
+    """Add/remove tags, set the category or move many items at once.
+
+    Items are selected by ids or by tag expression and filters; the patch
+    is applied to all of them in one transaction.
+    """
+    patch = request.patch
+    if patch.library_id is not None and not db.query(LibraryModel.id).filter(LibraryModel.id == patch.library_id).first():
+        raise HTTPException(status_code=404, detail="Target library not found")
+    condition = library_selection_condition(db, request.selection)
+    try:
+        updated = batch_update_items(
+            db, condition, add_tags=patch.add_tags, remove_tags=patch.remove_tags,
+            category=patch.category, library_id=patch.library_id
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to batch update library items: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update items")
+    return {"message": f"Updated {updated} items", "updated": updated}
+
+
+@app.post("/libraries/items/batch-delete")
+def batch_delete_library_items(request: LibraryItemBatchDelete, db: Session = Depends(get_db)):
+    """Delete many items at once, selected by ids or by tag expression and filters."""
+    condition = library_selection_condition(db, request.selection)
+    try:
+        deleted = batch_delete_items(db, condition)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to batch delete library items: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete items")
+    return {"message": f"Deleted {deleted} items", "deleted": deleted}
+
+
 @app.get("/test/workspace")
-async def test_workspace():
+def test_workspace():
     """Test endpoint to check workspace structure"""
     try:
-        db = SessionLocal()
+        db = ReadSessionLocal()
         settings = db.query(SettingsModel).first()
         
         if not settings:
@@ -1,8 +1,8 @@
 # backend/models.py - SQLAlchemy Database Models
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 Base = declarative_base()
 
@@ -23,6 +23,13 @@ class Settings(Base):
 class Project(Base):
     """Projects table for VFX projects"""
     __tablename__ = "projects"
+    # Keyset pagination sorts by (created_at, id) or (name, id)
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_name_id", "name", "id"),
+        Index("ix_projects_type", "type"),
+        Index("ix_projects_client", "client"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -30,9 +37,30 @@ class Project(Base):
     type = Column(String(100), default="general_vfx")
     client = Column(String(255))
     workspace_path = Column(String(500), nullable=False)
-    shots = Column(JSON, default=list)  # Store shots as JSON array
+    # Legacy JSON array of shot names, superseded by the shots table; deferred
+    # so it is never loaded with the project row
+    shots_json = deferred(Column("shots", JSON, default=list))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime)  # Tombstone set when the project folder disappears
+    
+    # Relationship to shots (loaded lazily, on access)
+    shots = relationship("Shot", back_populates="project", cascade="all, delete-orphan", order_by="Shot.name")
+
+
+class Shot(Base):
+    """Shots table, one row per vfx/<shot> folder of a project"""
+    __tablename__ = "shots"
+    __table_args__ = (UniqueConstraint("project_id", "name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    path = Column(String(500), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship to project
+    project = relationship("Project", back_populates="shots")
 
 
 class Library(Base):
@@ -53,6 +81,8 @@ class Library(Base):
 class LibraryItem(Base):
     """Library items table for individual assets like HDRIs"""
     __tablename__ = "library_items"
+    # Keyset pagination walks items of one library in id order
+    __table_args__ = (Index("ix_library_items_library_id_id", "library_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     library_id = Column(Integer, ForeignKey("libraries.id"), nullable=False)
@@ -61,23 +91,112 @@ class LibraryItem(Base):
     preview_path = Column(String(500))
     category = Column(String(100), default="hdri")
     tags = Column(JSON, default=list)  # Store tags as JSON array
+    # Content hash of the file at path and the size/mtime it was computed
+    # for; the hash is only recomputed when those change
+    content_hash = Column(String(64), index=True)
+    content_size = Column(BigInteger)
+    content_mtime_ns = Column(BigInteger)
+    # Read from the file header; file_mtime_ns tells when to read it again
+    width = Column(Integer, index=True)
+    height = Column(Integer)
+    file_format = Column(String(20), index=True)
+    file_size = Column(BigInteger, index=True)
+    file_mtime_ns = Column(BigInteger)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship to library
     library = relationship("Library", back_populates="items")
+    
+    # Rows of the inverted tag index; LibraryItem.tags stays the display copy
+    tag_links = relationship("LibraryItemTag", cascade="all, delete-orphan")
+
+
+class Tag(Base):
+    """Distinct, normalized tag names used by library items"""
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+
+class LibraryItemTag(Base):
+    """Inverted index from tags to library items"""
+    __tablename__ = "library_item_tags"
+    # The primary key serves item -> tags lookups, the indexes tag -> items
+    # and per-library tag counts without touching library_items
+    __table_args__ = (
+        Index("ix_library_item_tags_tag_id_item_id", "tag_id", "item_id"),
+        Index("ix_library_item_tags_library_id_tag_id", "library_id", "tag_id"),
+    )
+    
+    item_id = Column(Integer, ForeignKey("library_items.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+    # Copy of LibraryItem.library_id
+    library_id = Column(Integer, ForeignKey("libraries.id"), nullable=False)
 
 
 class Tool(Base):
     """Tools table for application shortcuts"""
     __tablename__ = "tools"
+    __table_args__ = (Index("ix_tools_name_id", "name", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
     category = Column(String(100), default="utility")
     executable_path = Column(String(500))
+    version = Column(String(50))  # Detected from the install path by tool discovery
     is_favorite = Column(Boolean, default=False)
     last_used = Column(DateTime)
+    launch_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ScanEntry(Base):
+    """Cached directory signatures used by the incremental project scanner"""
+    __tablename__ = "scan_entries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(500), nullable=False, unique=True)
+    parent = Column(String(500), index=True)  # Projects directory this folder lives in
+    mtime_ns = Column(BigInteger)
+    inode = Column(BigInteger)
+    vfx_mtime_ns = Column(BigInteger)  # None when the folder has no vfx/ subfolder
+    is_project = Column(Boolean, default=False)
+    scanned_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProjectSequence(Base):
+    """Per-year project number sequence (the YY part of YYNNNN folder names)"""
+    __tablename__ = "project_sequences"
+    
+    year_prefix = Column(String(2), primary_key=True)
+    last_number = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ChangeLog(Base):
+    """Append-only log of changed rows, read by GET /changes for incremental sync"""
+    __tablename__ = "change_log"
+    # Compaction keeps the newest entry per (entity, entity_id); AUTOINCREMENT
+    # so ids of pruned entries are never handed out again
+    __table_args__ = (
+        Index("ix_change_log_entity_entity_id_id", "entity", "entity_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    id = Column(Integer, primary_key=True)  # The sync cursor; only ever grows
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ChangeLogState(Base):
+    """Single row recording how far old change log entries have been pruned"""
+    __tablename__ = "change_log_state"
+    
+    id = Column(Integer, primary_key=True)
+    pruned_through = Column(Integer, nullable=False, default=0)  # Cursors below this have lost entries
+    compacted_at = Column(DateTime)
@@ -0,0 +1,115 @@
+# backend/numbering.py - Project Number Allocation
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Integer, cast, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Project, ProjectSequence
+
+# "240042_Name" -> year prefix "24", number 42
+PROJECT_NUMBER_RE = re.compile(r"^(\d{2})(\d{4})")
+
+
+def current_year_prefix() -> str:
+    return datetime.now().strftime("%y")
+
+
+def format_project_number(year_prefix: str, number: int) -> str:
+    return f"{year_prefix}{number:04d}"
+
+
+def _highest_existing_number(db: Session, year_prefix: str) -> int:
+    """Highest number already used by a project folder for this year (one-off seed)."""
+    highest = db.query(func.max(cast(func.substr(Project.folder_name, 3, 4), Integer))).filter(
+        Project.folder_name.op("GLOB")(f"{year_prefix}[0-9][0-9][0-9][0-9]*")
+    ).scalar()
+    return highest or 0
+
+
+def _ensure_sequence(db: Session, year_prefix: str):
+    """Create the sequence row for a year, seeded from existing project folders."""
+    if db.get(ProjectSequence, year_prefix) is None:
+        db.add(ProjectSequence(year_prefix=year_prefix, last_number=_highest_existing_number(db, year_prefix)))
+        db.flush()
+
+
+def peek_next_project_number(db: Session, year_prefix: Optional[str] = None) -> str:
+    """The number the next reservation will return, without reserving it."""
+    year_prefix = year_prefix or current_year_prefix()
+    sequence = db.get(ProjectSequence, year_prefix)
+    last_number = sequence.last_number if sequence else _highest_existing_number(db, year_prefix)
+    return format_project_number(year_prefix, last_number + 1)
+
+
+def reserve_project_numbers(db: Session, count: int = 1, year_prefix: Optional[str] = None) -> List[str]:
+    """Atomically reserve count consecutive project numbers and commit.
+
+    Write sessions begin with BEGIN IMMEDIATE, so the read-increment-return
+    below cannot interleave with another reservation.
+    """
+    year_prefix = year_prefix or current_year_prefix()
+    _ensure_sequence(db, year_prefix)
+    last_number = db.execute(
+        update(ProjectSequence)
+        .where(ProjectSequence.year_prefix == year_prefix)
+        .values(last_number=ProjectSequence.last_number + count, updated_at=datetime.utcnow())
+        .returning(ProjectSequence.last_number)
+    ).scalar_one()
+    db.commit()
+    return [format_project_number(year_prefix, n) for n in range(last_number - count + 1, last_number + 1)]
+
+
+def project_folder_name(project_number: str, name: str) -> str:
+    """Folder name for a project: "240042" and "My Show!" -> "240042_My_Show"."""
+    clean_name = re.sub(r"\s+", "_", re.sub(r"[^a-zA-Z0-9\s]", "", name).strip())
+    return f"{project_number}_{clean_name}"
+
+
+def check_project_number(db: Session, folder_name: str, projects_dir: Path) -> Optional[str]:
+    """The project number of folder_name if it may be created; raises ValueError otherwise.
+
+    The number must have been handed out by reserve_project_numbers and
+    must not be used by another project, in the database or on disk.
+    Folder names without a YYNNNN prefix carry no number and return None.
+    """
+    match = PROJECT_NUMBER_RE.match(folder_name)
+    if not match:
+        return None
+    year_prefix, number = match.group(1), int(match.group(2))
+    project_number = match.group(0)
+    sequence = db.get(ProjectSequence, year_prefix)
+    if sequence is None or number > sequence.last_number:
+        raise ValueError(f"Project number {project_number} has not been reserved")
+    taken = db.query(Project.folder_name).filter(
+        Project.folder_name.op("GLOB")(f"{project_number}*"), Project.folder_name != folder_name
+    ).limit(1).scalar()
+    if taken is None and projects_dir.is_dir():
+        taken = next((p.name for p in projects_dir.glob(f"{project_number}*") if p.name != folder_name), None)
+    if taken is not None:
+        raise ValueError(f"Project number {project_number} is already used by {taken}")
+    return project_number
+
+
+def observe_project_numbers(db: Session, folder_names: Iterable[str]):
+    """Advance sequences past numbers used by created or discovered project folders.
+
+    Does not commit; runs inside the caller's transaction.
+    """
+    highest = {}
+    for folder_name in folder_names:
+        match = PROJECT_NUMBER_RE.match(folder_name)
+        if match:
+            year_prefix, number = match.group(1), int(match.group(2))
+            highest[year_prefix] = max(highest.get(year_prefix, 0), number)
+
+    for year_prefix, number in highest.items():
+        _ensure_sequence(db, year_prefix)
+        stmt = sqlite_insert(ProjectSequence).values(year_prefix=year_prefix, last_number=number, updated_at=datetime.utcnow())
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ProjectSequence.year_prefix],
+            set_={"last_number": func.max(ProjectSequence.last_number, stmt.excluded.last_number)},
+        ))
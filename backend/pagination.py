@@ -0,0 +1,98 @@
+# backend/pagination.py - Keyset Pagination and Cached Totals
+import base64
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Optional, Tuple
+
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+
+from versions import versions
+
+# Distinct filter combinations whose totals are remembered
+COUNT_CACHE_SIZE = 256
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, is_datetime: bool = False) -> Tuple[object, int]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if is_datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(query: Query, sort_column, id_column, descending: bool, cursor: Optional[str],
+                limit: int) -> Tuple[list, Optional[str]]:
+    """One page of query ordered by (sort_column, id_column) and the cursor of the next page.
+
+    The cursor holds the last row's sort value and id, so the next page is
+    a range seek on a (sort_column, id) index instead of an OFFSET that
+    reads and discards every earlier row.
+    """
+    if cursor is not None:
+        if sort_column is id_column:
+            after = decode_cursor(cursor)[1]
+            query = query.filter(id_column < after if descending else id_column > after)
+        else:
+            is_datetime = sort_column.type.python_type is datetime
+            sort_value, row_id = decode_cursor(cursor, is_datetime)
+            key = tuple_(sort_column, id_column)
+            value = tuple_(literal(sort_value, sort_column.type), literal(row_id))
+            query = query.filter(key < value if descending else key > value)
+    if sort_column is id_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    else:
+        order = [column.desc() if descending else column.asc() for column in (sort_column, id_column)]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+
+class CountCache:
+    """Totals per collection and filter set, valid until the collection's version changes.
+
+    Paging through a result set then counts it once rather than per page.
+    """
+
+    def __init__(self, max_entries: int = COUNT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_count(self, collection: str, key: Hashable, count: Callable[[], int]) -> int:
+        # Read the version first: a write landing during count() then leaves
+        # an entry that is already stale and gets recounted next time
+        version = versions.get(collection)
+        cache_key = (collection, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                return entry[1]
+        total = count()
+        with self._lock:
+            self._entries[cache_key] = (version, total)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return total
+
+
+count_cache = CountCache()
@@ -0,0 +1,231 @@
+# backend/previews.py - HDRI Preview Generation and Cache
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, or_
+
+from changes import LIBRARY_ITEM, record_changes
+from database import DATA_DIR, ReadSessionLocal, SessionLocal
+from hdri import HDR_EXTENSIONS, np, preview_name, render_previews
+from jobs import Job, JobCancelled
+from models import LibraryItem
+from versions import mark_changed
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CACHE_DIR = Path(os.environ.get("PIPELINE_PREVIEW_CACHE_DIR", str(DATA_DIR / "previews")))
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get("PIPELINE_PREVIEW_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Long-side pixel sizes rendered per item; preview_path points at the first
+PREVIEW_SIZES = tuple(int(s) for s in os.environ.get("PIPELINE_PREVIEW_SIZES", "256,1024").split(","))
+PREVIEW_WORKERS = int(os.environ.get("PIPELINE_PREVIEW_WORKERS", str(os.cpu_count() or 2)))
+# Results written back to the database per transaction
+PREVIEW_COMMIT_BATCH = 100
+QUERY_CHUNK_SIZE = 500
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def previews_available() -> bool:
+    return np is not None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The shared worker process pool, started on first use.
+
+    Workers are spawned rather than forked: the server process runs
+    threads and holds database connections that must not be copied.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, PREVIEW_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_preview_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def is_previewable(path: Optional[str]) -> bool:
+    return bool(path) and path.lower().endswith(HDR_EXTENSIONS)
+
+
+def is_cached_preview(preview_path: Optional[str]) -> bool:
+    """Whether preview_path was rendered into the cache rather than set by hand."""
+    return bool(preview_path) and Path(preview_path).parent == PREVIEW_CACHE_DIR
+
+
+def resolve_preview(preview_path: str, size: Optional[int] = None) -> Tuple[str, Optional[str]]:
+    """File to serve for an item's preview_path and a strong ETag if it is content-addressed.
+
+    Previews in the cache are named <hash>_<size>.png and never change under
+    that name, so the name is the ETag and the closest rendered size at
+    least as large as size can be picked. Other preview paths are served
+    as they are, validated by stat.
+    """
+    if not is_cached_preview(preview_path):
+        return preview_path, None
+    path = Path(preview_path)
+    stem, _, rendered = path.stem.rpartition("_")
+    if not stem or not rendered.isdigit():
+        return preview_path, None
+    if size is not None:
+        larger = [s for s in sorted(PREVIEW_SIZES) if s >= size]
+        rendered = str(larger[0] if larger else max(PREVIEW_SIZES))
+        path = path.with_name(preview_name(stem, int(rendered)))
+    return str(path), f'"{stem}_{rendered}"'
+
+
+def _previewable_filter():
+    return or_(*(func.lower(LibraryItem.path).like(f"%{ext}") for ext in HDR_EXTENSIONS))
+
+
+def items_needing_previews(library_id: Optional[int] = None, refresh: bool = False) -> List[int]:
+    """Ids of HDR items without a preview.
+
+    With refresh, items whose preview lives in the cache are included too,
+    which re-renders evicted previews and previews of changed sources.
+    """
+    db = ReadSessionLocal()
+    try:
+        missing = or_(LibraryItem.preview_path.is_(None), LibraryItem.preview_path == "")
+        if refresh:
+            missing = or_(missing, LibraryItem.preview_path.like(f"{PREVIEW_CACHE_DIR}%"))
+        query = db.query(LibraryItem.id).filter(missing, _previewable_filter())
+        if library_id is not None:
+            query = query.filter(LibraryItem.library_id == library_id)
+        return [row[0] for row in query.order_by(LibraryItem.id)]
+    finally:
+        db.close()
+
+
+def evict_cache(max_bytes: int = PREVIEW_CACHE_MAX_BYTES) -> int:
+    """Delete the least recently used previews until the cache fits max_bytes.
+
+    Rendering and serving a preview updates its mtime, which serves as the
+    LRU clock since atime is often disabled. Returns the number removed.
+    """
+    entries = []
+    with os.scandir(PREVIEW_CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Evicted {removed} previews from the cache")
+    return removed
+
+
+def _save_results(results: List[dict]):
+    db = SessionLocal()
+    try:
+        db.bulk_update_mappings(LibraryItem, results)
+        mark_changed(db, "libraries")
+        record_changes(db, LIBRARY_ITEM, [result["id"] for result in results])
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_preview_generation(job: Job, item_ids: List[int]) -> dict:
+    """Job body: render missing previews for item_ids on the process pool.
+
+    Results are written back in batches as they complete, so a cancelled
+    or failed job keeps the previews made so far.
+    """
+    if not previews_available():
+        raise RuntimeError("Preview generation needs numpy, which is not installed")
+    PREVIEW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    db = ReadSessionLocal()
+    try:
+        items = []
+        for start in range(0, len(item_ids), QUERY_CHUNK_SIZE):
+            items.extend(db.query(
+                LibraryItem.id, LibraryItem.path, LibraryItem.content_hash,
+                LibraryItem.content_size, LibraryItem.content_mtime_ns
+            ).filter(LibraryItem.id.in_(item_ids[start:start + QUERY_CHUNK_SIZE])))
+    finally:
+        db.close()
+
+    summary = {"items": len(items), "rendered": 0, "cached": 0, "failed": 0, "evicted": 0}
+    job.update_progress(0, len(items))
+    pool = _get_pool()
+    pending = {}
+    remaining = iter(items)
+    batch = []
+    done = 0
+
+    def submit_next() -> bool:
+        item = next(remaining, None)
+        if item is None:
+            return False
+        known = (item.content_hash, item.content_size, item.content_mtime_ns)
+        future = pool.submit(render_previews, item.path, str(PREVIEW_CACHE_DIR), PREVIEW_SIZES, known)
+        pending[future] = item.id
+        return True
+
+    # Keep a bounded number of files in flight instead of queueing them all
+    for _ in range(max(1, PREVIEW_WORKERS) * 2):
+        if not submit_next():
+            break
+    try:
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item_id = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    logger.warning(f"Could not render preview for library item {item_id}: {e}")
+                else:
+                    summary["rendered" if result["rendered"] else "cached"] += 1
+                    batch.append({
+                        "id": item_id,
+                        "preview_path": result["previews"][PREVIEW_SIZES[0]],
+                        "content_hash": result["hash"],
+                        "content_size": result["size"],
+                        "content_mtime_ns": result["mtime_ns"],
+                    })
+                done += 1
+                if job.cancel_event.is_set():
+                    raise JobCancelled()
+                submit_next()
+            if len(batch) >= PREVIEW_COMMIT_BATCH:
+                _save_results(batch)
+                batch = []
+            job.update_progress(done, len(items))
+    finally:
+        for future in pending:
+            future.cancel()
+        if batch:
+            _save_results(batch)
+        summary["evicted"] = evict_cache()
+
+    logger.info(f"Preview generation finished: {summary}")
+    return summary
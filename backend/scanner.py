@@ -0,0 +1,387 @@
+# backend/scanner.py - Incremental Project Discovery
+import logging
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, literal
+from sqlalchemy.orm import Session
+
+from changes import PROJECT, record_changes
+from models import Project, ScanEntry, Shot
+from numbering import observe_project_numbers
+
+logger = logging.getLogger(__name__)
+
+# Parallel stat calls only pay off on high-latency (network) filesystems,
+# but a small pool costs next to nothing on local disks either
+SCAN_WORKERS = int(os.environ.get("PIPELINE_SCAN_WORKERS", "16"))
+# Stay well below SQLite's bound-parameter limit for IN (...) queries
+QUERY_CHUNK_SIZE = 500
+
+
+@dataclass
+class ScanResult:
+    """Summary of a single scan pass over a Projects directory"""
+    projects_dir: str = ""
+    skipped: int = 0
+    rescanned: int = 0
+    discovered: List[str] = field(default_factory=list)
+    restored: List[str] = field(default_factory=list)
+    renamed: List[dict] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    shots_added: int = 0
+    shots_removed: int = 0
+    full: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(
+            self.discovered or self.restored or self.renamed or self.removed
+            or self.shots_added or self.shots_removed
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "projects_dir": self.projects_dir,
+            "skipped": self.skipped,
+            "rescanned": self.rescanned,
+            "discovered": self.discovered,
+            "restored": self.restored,
+            "renamed": self.renamed,
+            "removed": self.removed,
+            "shots_added": self.shots_added,
+            "shots_removed": self.shots_removed,
+            "full": self.full,
+        }
+
+
+def project_name_from_folder(folder_name: str) -> str:
+    """Strip the year/number prefix from a project folder name.
+
+    "24xxxx_ProjectName" -> "ProjectName"
+    """
+    if len(folder_name) >= 6 and folder_name[:2].isdigit() and folder_name[2:6].isdigit():
+        underscore_pos = folder_name.find('_')
+        if underscore_pos > 0:
+            return folder_name[underscore_pos + 1:]
+        return folder_name[6:]
+    return folder_name
+
+
+def _stat_dir(path):
+    """Return the stat result for a directory, or None if it is missing or not a directory."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    return st
+
+
+def _signature_matches(entry: ScanEntry, st) -> bool:
+    return entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.inode == st.st_ino
+
+
+def _chunks(items: list, size: int = QUERY_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _list_folders(projects_dir: Path) -> List[os.DirEntry]:
+    """List sub-directories using the type information cached by scandir."""
+    with os.scandir(projects_dir) as it:
+        return [entry for entry in it if entry.is_dir()]
+
+
+def _probe_folder(entry: os.DirEntry):
+    """Stat a project folder and its vfx/ subfolder. Runs on the scan thread pool."""
+    try:
+        folder_st = entry.stat()
+    except OSError:
+        return entry, None, None
+    return entry, folder_st, _stat_dir(os.path.join(entry.path, "vfx"))
+
+
+def _probe_folders(folders: List[os.DirEntry]):
+    """Probe folders in parallel; on SMB/NFS each stat is a network round trip."""
+    if len(folders) < 2 or SCAN_WORKERS <= 1:
+        return [_probe_folder(entry) for entry in folders]
+    with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(folders)), thread_name_prefix="scan") as pool:
+        return list(pool.map(_probe_folder, folders))
+
+
+def _list_shots(vfx_path: str) -> List[str]:
+    """Names of the shot folders in a project's vfx/ folder."""
+    try:
+        with os.scandir(vfx_path) as it:
+            return sorted(entry.name for entry in it if entry.is_dir())
+    except OSError:
+        return []
+
+
+def _list_shots_parallel(vfx_paths: List[str]) -> List[List[str]]:
+    if len(vfx_paths) < 2 or SCAN_WORKERS <= 1:
+        return [_list_shots(path) for path in vfx_paths]
+    with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(vfx_paths)), thread_name_prefix="scan") as pool:
+        return list(pool.map(_list_shots, vfx_paths))
+
+
+def _load_projects(db: Session, folder_names: List[str]) -> Dict[str, Project]:
+    """Fetch projects by folder name with one IN query per chunk."""
+    projects = {}
+    for chunk in _chunks(folder_names):
+        for project in db.query(Project).filter(Project.folder_name.in_(chunk)):
+            projects[project.folder_name] = project
+    return projects
+
+
+def _move_shot_paths(db: Session, project_id: int, old_path: str, new_path: str):
+    """Point the shots of a renamed project folder at the new location."""
+    db.query(Shot).filter(
+        Shot.project_id == project_id,
+        Shot.path.startswith(old_path + os.sep, autoescape=True)
+    ).update(
+        {Shot.path: literal(new_path) + func.substr(Shot.path, len(old_path) + 1)},
+        synchronize_session=False
+    )
+
+
+def _sync_projects(db: Session, changed: List[ScanEntry], vanished: Dict[int, ScanEntry], result: ScanResult) -> Dict[str, int]:
+    """Create, restore or rename Project rows for changed project folders.
+
+    Returns the project id for every changed folder.
+    """
+    names = [Path(entry.path).name for entry in changed]
+    old_names = [Path(entry.path).name for entry in vanished.values()]
+    existing = _load_projects(db, names + old_names)
+
+    project_ids = {}
+    new_rows = []
+    for entry in changed:
+        folder_name = Path(entry.path).name
+        existing_project = existing.get(folder_name)
+
+        if existing_project:
+            project_ids[folder_name] = existing_project.id
+            if existing_project.deleted_at is not None:
+                existing_project.deleted_at = None
+                existing_project.workspace_path = entry.path
+                result.restored.append(folder_name)
+                logger.info(f"Restored project: {folder_name}")
+            continue
+
+        # A new folder with the inode of a vanished one is the same directory after a rename
+        previous = vanished.pop(entry.inode, None) if entry.inode else None
+        renamed_project = existing.get(Path(previous.path).name) if previous is not None else None
+        if renamed_project is not None:
+            old_name = renamed_project.folder_name
+            _move_shot_paths(db, renamed_project.id, renamed_project.workspace_path, entry.path)
+            renamed_project.folder_name = folder_name
+            renamed_project.workspace_path = entry.path
+            renamed_project.deleted_at = None
+            project_ids[folder_name] = renamed_project.id
+            result.renamed.append({"from": old_name, "to": folder_name})
+            logger.info(f"Project renamed: {old_name} -> {folder_name}")
+            continue
+
+        new_rows.append({
+            "name": project_name_from_folder(folder_name),
+            "folder_name": folder_name,
+            "type": "vfx",
+            "client": "",
+            "workspace_path": entry.path,
+        })
+        result.discovered.append(folder_name)
+
+    if new_rows:
+        db.flush()
+        # OR IGNORE: a project created through the API may land between the
+        # existence query and this insert
+        db.execute(insert(Project).prefix_with("OR IGNORE"), new_rows)
+        discovered = _load_projects(db, [row["folder_name"] for row in new_rows])
+        for folder_name, project in discovered.items():
+            project_ids[folder_name] = project.id
+        record_changes(db, PROJECT, [project.id for project in discovered.values()])
+        logger.info(f"Discovered {len(new_rows)} new projects")
+
+    return project_ids
+
+
+def _sync_shots(db: Session, changed: List[ScanEntry], project_ids: Dict[str, int],
+                listings: Dict[str, List[str]], result: ScanResult):
+    """Bring the shots table in line with the vfx/ folders of changed projects."""
+    ids = list(project_ids.values())
+    existing = {}
+    for chunk in _chunks(ids):
+        for shot_id, project_id, name in db.query(Shot.id, Shot.project_id, Shot.name).filter(Shot.project_id.in_(chunk)):
+            existing[(project_id, name)] = shot_id
+
+    new_rows = []
+    wanted = set()
+    for entry in changed:
+        project_id = project_ids.get(Path(entry.path).name)
+        if project_id is None:
+            continue
+        vfx_path = os.path.join(entry.path, "vfx")
+        for name in listings.get(entry.path, []):
+            wanted.add((project_id, name))
+            if (project_id, name) not in existing:
+                new_rows.append({"project_id": project_id, "name": name, "path": os.path.join(vfx_path, name)})
+
+    stale = [shot_id for key, shot_id in existing.items() if key not in wanted]
+    for chunk in _chunks(stale):
+        db.query(Shot).filter(Shot.id.in_(chunk)).delete(synchronize_session=False)
+    if new_rows:
+        db.execute(insert(Shot).prefix_with("OR IGNORE"), new_rows)
+
+    stale_projects = {key[0] for key, shot_id in existing.items() if key not in wanted}
+    record_changes(db, PROJECT, stale_projects | {row["project_id"] for row in new_rows})
+
+    result.shots_added += len(new_rows)
+    result.shots_removed += len(stale)
+
+
+def _tombstone_missing_projects(db: Session, root_key: str, seen: dict, result: ScanResult):
+    """Mark projects below root_key whose folder is gone (or lost its vfx/) as deleted."""
+    live_folders = {Path(key).name for key, entry in seen.items() if entry.is_project}
+    db.flush()
+    candidates = db.query(Project.id, Project.folder_name).filter(
+        Project.deleted_at.is_(None),
+        Project.workspace_path.startswith(root_key + os.sep, autoescape=True)
+    )
+    gone = [(project_id, folder_name) for project_id, folder_name in candidates if folder_name not in live_folders]
+    if not gone:
+        return
+    now = datetime.utcnow()
+    for chunk in _chunks([project_id for project_id, _ in gone]):
+        db.query(Project).filter(Project.id.in_(chunk)).update({Project.deleted_at: now}, synchronize_session=False)
+    record_changes(db, PROJECT, [project_id for project_id, _ in gone])
+    for _, folder_name in gone:
+        result.removed.append(folder_name)
+        logger.info(f"Project folder vanished, tombstoned: {folder_name}")
+
+
+def scan_projects_dir(db: Session, projects_dir: Path, full: bool = False, verify: bool = False,
+                      read_db: Optional[Session] = None) -> ScanResult:
+    """Discover VFX projects and their shots below projects_dir.
+
+    Directory signatures (mtime and inode) are cached in the scan_entries
+    table. When the Projects directory itself is unchanged the whole scan
+    costs a single stat. Otherwise the folder listing comes from os.scandir,
+    the folders and their vfx/ subfolders are stat'ed on a bounded thread
+    pool, and a folder is re-examined only when its own signature or the
+    mtime of its vfx/ subfolder differs from the cache. Re-examined projects
+    have their vfx/ shot folders listed in parallel and synced into the
+    shots table. All filesystem work happens outside a database
+    transaction, so the write lock is only held for the final short update.
+    The cached signatures are read through read_db (db if not given); with
+    a read-only session there, a scan that finds nothing changed never
+    takes the write lock.
+
+    Changes nested inside an existing folder (a vfx/ subfolder or a shot
+    being added) do not touch the Projects directory mtime. verify=True skips
+    the single-stat shortcut so those are found while still honouring the
+    per-folder cache; full=True ignores the cache altogether.
+    """
+    result = ScanResult(projects_dir=str(projects_dir), full=full)
+
+    root_st = _stat_dir(projects_dir)
+    if root_st is None:
+        logger.warning(f"Projects directory does not exist: {projects_dir}")
+        return result
+
+    if read_db is None:
+        read_db = db
+    root_key = str(projects_dir)
+    root_entry = read_db.query(ScanEntry).filter(ScanEntry.path == root_key).first()
+
+    if not (full or verify) and _signature_matches(root_entry, root_st):
+        result.skipped = read_db.query(ScanEntry).filter(ScanEntry.parent == root_key).count()
+        read_db.rollback()
+        return result
+
+    signatures = {
+        path: (mtime_ns, inode, vfx_mtime_ns)
+        for path, mtime_ns, inode, vfx_mtime_ns in read_db.query(
+            ScanEntry.path, ScanEntry.mtime_ns, ScanEntry.inode, ScanEntry.vfx_mtime_ns
+        ).filter(ScanEntry.parent == root_key)
+    }
+    # End the transaction before the slow filesystem work; write sessions
+    # hold the database write lock for as long as a transaction is open
+    read_db.rollback()
+
+    probes = []
+    for dir_entry, folder_st, vfx_st in _probe_folders(_list_folders(projects_dir)):
+        if folder_st is None:
+            continue
+        key = os.path.join(root_key, dir_entry.name)
+        vfx_mtime_ns = vfx_st.st_mtime_ns if vfx_st else None
+        unchanged = not full and signatures.get(key) == (folder_st.st_mtime_ns, folder_st.st_ino, vfx_mtime_ns)
+        probes.append((key, folder_st, vfx_mtime_ns, unchanged))
+
+    if (not full and _signature_matches(root_entry, root_st)
+            and all(unchanged for _, _, _, unchanged in probes) and len(probes) == len(signatures)):
+        # A verify pass that found nothing new has nothing to write either
+        result.skipped = len(probes)
+        return result
+
+    shot_folders = [key for key, _, vfx_mtime_ns, unchanged in probes if not unchanged and vfx_mtime_ns is not None]
+    listings = dict(zip(shot_folders, _list_shots_parallel([os.path.join(key, "vfx") for key in shot_folders])))
+
+    # Everything below is database work in one short write transaction
+    cached = {e.path: e for e in db.query(ScanEntry).filter(ScanEntry.parent == root_key).all()}
+    seen = {}
+    changed_projects = []
+
+    for key, folder_st, vfx_mtime_ns, unchanged in probes:
+        entry = cached.get(key)
+        if unchanged and entry is not None:
+            result.skipped += 1
+            seen[key] = entry
+            continue
+
+        result.rescanned += 1
+        if entry is None:
+            entry = ScanEntry(path=key, parent=root_key)
+            db.add(entry)
+        entry.mtime_ns = folder_st.st_mtime_ns
+        entry.inode = folder_st.st_ino
+        entry.vfx_mtime_ns = vfx_mtime_ns
+        entry.is_project = vfx_mtime_ns is not None
+        seen[key] = entry
+
+        if entry.is_project:
+            changed_projects.append(entry)
+
+    vanished = {}
+    for key, entry in cached.items():
+        if key not in seen:
+            if entry.is_project and entry.inode:
+                vanished[entry.inode] = entry
+            db.delete(entry)
+
+    project_ids = _sync_projects(db, changed_projects, vanished, result)
+    db.flush()
+    observe_project_numbers(db, result.discovered + [r["to"] for r in result.renamed])
+    _sync_shots(db, changed_projects, project_ids, listings, result)
+    _tombstone_missing_projects(db, root_key, seen, result)
+
+    root_entry = db.query(ScanEntry).filter(ScanEntry.path == root_key).first()
+    if root_entry is None:
+        root_entry = ScanEntry(path=root_key, parent=None)
+        db.add(root_entry)
+    root_entry.mtime_ns = root_st.st_mtime_ns
+    root_entry.inode = root_st.st_ino
+
+    db.commit()
+    logger.info(
+        f"Scanned {projects_dir}: {result.rescanned} rescanned, {result.skipped} skipped, "
+        f"{len(result.discovered)} new, {len(result.renamed)} renamed, {len(result.removed)} removed"
+    )
+    return result
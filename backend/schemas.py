@@ -53,8 +53,10 @@ class ToolUpdate(BaseModel):
 class ToolResponse(ToolBase):
     id: int
     executable_path: Optional[str] = None
+    version: Optional[str] = None
     is_favorite: bool
     last_used: Optional[datetime] = None
+    launch_count: Optional[int] = 0
     created_at: datetime
     updated_at: datetime
 
@@ -62,6 +64,11 @@ class ToolResponse(ToolBase):
         from_attributes = True
 
 
+class ToolLaunch(BaseModel):
+    project_id: Optional[int] = None  # Run in this project's workspace with its environment
+    args: List[str] = []
+
+
 # Metadata schemas
 class MetadataBase(BaseModel):
     client: Optional[str] = None
@@ -123,8 +130,9 @@ class VFXProjectCreate(BaseModel):
     name: str
     client: Optional[str] = None
     shots: List[str]
-    folderName: str
+    folderName: Optional[str] = None  # YYNNNN_Name; assigned on create when omitted
     rootPath: str
+    resume: bool = False  # Finish an interrupted creation instead of rejecting the existing folder
 
 
 # Library schemas
@@ -168,4 +176,40 @@ class LibraryItemUpdate(BaseModel):
     path: Optional[str] = None
     preview_path: Optional[str] = None
     category: Optional[str] = None
-    tags: Optional[List[str]] = None
\ No newline at end of file
+    tags: Optional[List[str]] = None
+
+
+class LibraryItemSelection(BaseModel):
+    """Items to act on: explicit ids, or a query like /libraries/search takes"""
+    ids: Optional[List[int]] = None
+    library_id: Optional[int] = None
+    tags: Optional[str] = None  # Tag expression, e.g. outdoor AND NOT city
+    min_width: Optional[int] = None
+    min_height: Optional[int] = None
+    format: Optional[str] = None  # Comma-separated file formats
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+
+
+class LibraryItemPatch(BaseModel):
+    add_tags: List[str] = []
+    remove_tags: List[str] = []
+    category: Optional[str] = None
+    library_id: Optional[int] = None  # Move the items to this library
+
+
+class LibraryItemBatchUpdate(BaseModel):
+    selection: LibraryItemSelection
+    patch: LibraryItemPatch
+
+
+class LibraryItemBatchDelete(BaseModel):
+    selection: LibraryItemSelection
+
+
+class LibraryIngest(BaseModel):
+    path: str
+    extensions: List[str] = [".hdr", ".exr"]
+    recursive: bool = True
+    category: Optional[str] = None  # Defaults to the library's category
+    tags_from_path: bool = True  # Tag items with the folder names below path
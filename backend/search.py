@@ -0,0 +1,197 @@
+# backend/search.py - Full-Text Search Index
+import logging
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Integer, text
+from sqlalchemy.orm import Session
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Each entry has rowid = ref_id * 8 + a code per kind (project 1, library
+# item 2, tool 3, shot 4), so a trigger can replace or remove the entry of a
+# row by rowid without scanning the index
+SEARCH_KINDS = ("project", "shot", "library_item", "tool")
+
+# Hits on the name column outrank hits on the descriptive text
+NAME_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Words as the unicode61 tokenizer sees them
+QUERY_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+_PROJECT_ROW = (
+    "{p}.id * 8 + 1, 'project', {p}.id, {p}.name, "
+    "{p}.folder_name || ' ' || coalesce({p}.client, '') || ' ' || coalesce({p}.type, ''), NULL"
+)
+_SHOT_ROW = "{s}.id * 8 + 4, 'shot', {s}.id, {s}.name, {p}.name || ' ' || {p}.folder_name, {p}.id"
+_LIBRARY_ITEM_ROW = (
+    "{i}.id * 8 + 2, 'library_item', {i}.id, {i}.name, "
+    "coalesce({i}.path, '') || ' ' || coalesce({i}.tags, '') || ' ' || coalesce({i}.category, ''), {i}.library_id"
+)
+_TOOL_ROW = (
+    "{t}.id * 8 + 3, 'tool', {t}.id, {t}.name, "
+    "coalesce({t}.description, '') || ' ' || coalesce({t}.category, ''), NULL"
+)
+_COLUMNS = "rowid, kind, ref_id, name, body, parent_id"
+
+CREATE_INDEX_SQL = """
+CREATE VIRTUAL TABLE search_index USING fts5(
+    kind UNINDEXED, ref_id UNINDEXED, name, body, parent_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+)
+"""
+
+# Tombstoned projects and their shots are left out of the index
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_ai AFTER INSERT ON projects
+    WHEN NEW.deleted_at IS NULL BEGIN
+        INSERT INTO search_index({_COLUMNS}) VALUES ({_PROJECT_ROW.format(p="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_projects_au AFTER UPDATE OF name, folder_name, client, type, deleted_at
+    ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+        DELETE FROM search_index WHERE rowid IN (SELECT id * 8 + 4 FROM shots WHERE project_id = OLD.id);
+        INSERT INTO search_index({_COLUMNS}) SELECT {_PROJECT_ROW.format(p="NEW")} WHERE NEW.deleted_at IS NULL;
+        INSERT INTO search_index({_COLUMNS}) SELECT {_SHOT_ROW.format(s="s", p="NEW")}
+            FROM shots s WHERE s.project_id = NEW.id AND NEW.deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_projects_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_shots_ai AFTER INSERT ON shots BEGIN
+        INSERT INTO search_index({_COLUMNS}) SELECT {_SHOT_ROW.format(s="NEW", p="p")}
+            FROM projects p WHERE p.id = NEW.project_id AND p.deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_shots_ad AFTER DELETE ON shots BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_library_items_ai AFTER INSERT ON library_items BEGIN
+        INSERT INTO search_index({_COLUMNS}) VALUES ({_LIBRARY_ITEM_ROW.format(i="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_library_items_au AFTER UPDATE OF name, path, tags, category, library_id
+    ON library_items BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+        INSERT INTO search_index({_COLUMNS}) VALUES ({_LIBRARY_ITEM_ROW.format(i="NEW")});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_library_items_ad AFTER DELETE ON library_items BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_tools_ai AFTER INSERT ON tools BEGIN
+        INSERT INTO search_index({_COLUMNS}) VALUES ({_TOOL_ROW.format(t="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_tools_au AFTER UPDATE OF name, description, category ON tools BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+        INSERT INTO search_index({_COLUMNS}) VALUES ({_TOOL_ROW.format(t="NEW")});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_tools_ad AFTER DELETE ON tools BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+    END
+    """,
+]
+
+POPULATE_SQL = [
+    f"INSERT INTO search_index({_COLUMNS}) SELECT {_PROJECT_ROW.format(p='p')} FROM projects p WHERE p.deleted_at IS NULL",
+    f"INSERT INTO search_index({_COLUMNS}) SELECT {_SHOT_ROW.format(s='s', p='p')} "
+    "FROM shots s JOIN projects p ON p.id = s.project_id WHERE p.deleted_at IS NULL",
+    f"INSERT INTO search_index({_COLUMNS}) SELECT {_LIBRARY_ITEM_ROW.format(i='i')} FROM library_items i",
+    f"INSERT INTO search_index({_COLUMNS}) SELECT {_TOOL_ROW.format(t='t')} FROM tools t",
+]
+
+
+def init_search_index():
+    """Create the FTS5 index and its triggers, filling it on first creation.
+
+    The triggers keep the index current for every write, including the
+    scanner's bulk inserts and tombstoning, so no write path has to know
+    about it.
+    """
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).first()
+        if not exists:
+            conn.exec_driver_sql(CREATE_INDEX_SQL)
+        for statement in TRIGGERS_SQL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            for statement in POPULATE_SQL:
+                conn.exec_driver_sql(statement)
+            count = conn.exec_driver_sql("SELECT count(*) FROM search_index").scalar()
+            logger.info(f"Built search index with {count} entries")
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Turn user input into an FTS5 query matching every word as a prefix.
+
+    'sun hdr' -> '"sun"* "hdr"*'. Quoting each word keeps FTS5 operators
+    and punctuation in the input from being interpreted.
+    """
+    terms = QUERY_TERM_RE.findall(q or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(db: Session, q: str, kinds: Sequence[str] = (), offset: int = 0, limit: int = 20) -> List[dict]:
+    """Ranked matches for q, best first.
+
+    parent_id is the project of a shot and the library of a library item.
+    """
+    match = build_match_query(q)
+    if match is None:
+        return []
+    params = {"match": match, "offset": offset, "limit": limit}
+    kind_filter = ""
+    if kinds:
+        names = [f":kind{i}" for i in range(len(kinds))]
+        kind_filter = f"AND kind IN ({', '.join(names)})"
+        params.update({f"kind{i}": kind for i, kind in enumerate(kinds)})
+    rows = db.execute(text(f"""
+        SELECT kind, ref_id, name, parent_id,
+               bm25(search_index, 0, 0, {NAME_WEIGHT}, {BODY_WEIGHT}, 0) AS score
+        FROM search_index
+        WHERE search_index MATCH :match {kind_filter}
+        ORDER BY score
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [
+        {"kind": kind, "id": ref_id, "name": name, "parent_id": parent_id, "score": -score}
+        for kind, ref_id, name, parent_id, score in rows
+    ]
+
+
+def matching_ids(kind: str, q: str):
+    """Select of the ids of kind matching q, for filtering a query with column.in_().
+
+    None when q has no words to match.
+    """
+    match = build_match_query(q)
+    if match is None:
+        return None
+    return text(
+        "SELECT ref_id FROM search_index WHERE search_index MATCH :match AND kind = :kind"
+    ).bindparams(match=match, kind=kind).columns(ref_id=Integer)
@@ -0,0 +1,148 @@
+# backend/sync.py - Background Project Sync Service
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from database import ReadSessionLocal, SessionLocal
+from models import Settings as SettingsModel
+from scanner import ScanResult, scan_projects_dir
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - optional dependency
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get("PIPELINE_SYNC_POLL_INTERVAL", "5"))
+VERIFY_INTERVAL = float(os.environ.get("PIPELINE_SYNC_VERIFY_INTERVAL", "60"))
+FORCE_POLLING = os.environ.get("PIPELINE_SYNC_FORCE_POLLING", "").lower() in ("1", "true", "yes")
+
+
+class ProjectSyncService:
+    """Keeps the Project table in sync with <root_path>/Projects in the background.
+
+    Uses watchfiles (inotify on Linux, native APIs elsewhere) when it is
+    installed and falls back to polling otherwise. Every wake-up runs the
+    incremental scanner, so a poll with nothing changed costs one stat.
+    Only the Projects directory is watched, so every verify_interval seconds
+    the per-folder signatures are checked as well to pick up new shots.
+    Network shares often do not deliver change notifications; set
+    PIPELINE_SYNC_FORCE_POLLING=1 for those.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, verify_interval: float = VERIFY_INTERVAL,
+                 force_polling: bool = FORCE_POLLING):
+        self.poll_interval = poll_interval
+        self.verify_interval = verify_interval
+        self.force_polling = force_polling
+        self._last_verify = 0.0
+        self.last_result: Optional[ScanResult] = None
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return "watch" if watchfiles is not None and not self.force_polling else "poll"
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="project-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Project sync service started ({self.mode} mode)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def reload(self):
+        """Re-read the root path from settings, e.g. after it was changed."""
+        self._wake.set()
+
+    def resync(self, full: bool = True) -> ScanResult:
+        """Run a scan now and return what changed."""
+        projects_dir = self._projects_dir()
+        if projects_dir is None:
+            return ScanResult(full=full)
+        return self._scan(projects_dir, full=full)
+
+    def _projects_dir(self) -> Optional[Path]:
+        db = ReadSessionLocal()
+        try:
+            settings = db.query(SettingsModel).first()
+            if not settings or not settings.root_path:
+                return None
+            return Path(settings.root_path) / "Projects"
+        finally:
+            db.close()
+
+    def _scan(self, projects_dir: Path, full: bool = False) -> ScanResult:
+        with self._scan_lock:
+            verify = time.monotonic() - self._last_verify >= self.verify_interval
+            # The unchanged-directory check reads through read_db, so idle
+            # polls never take the write lock
+            db = SessionLocal()
+            read_db = ReadSessionLocal()
+            try:
+                result = scan_projects_dir(db, projects_dir, full=full, verify=verify, read_db=read_db)
+                if full or verify:
+                    self._last_verify = time.monotonic()
+                self.last_result = result
+                return result
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                read_db.close()
+                db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                projects_dir = self._projects_dir()
+                if projects_dir is None or not projects_dir.is_dir():
+                    self._wake.wait(self.poll_interval)
+                    continue
+
+                # Catch up on anything that changed while we were not watching;
+                # a full pass also fills in shots for projects scanned before
+                # shots were tracked
+                self._scan(projects_dir, full=True)
+
+                if self.mode == "watch":
+                    self._watch(projects_dir)
+                else:
+                    self._poll(projects_dir)
+            except Exception as e:
+                logger.error(f"Project sync error: {e}")
+                self._wake.wait(self.poll_interval)
+
+    def _watch(self, projects_dir: Path):
+        # Only the Projects directory itself is watched; recursive watches on
+        # large project trees cost one inotify watch per directory.
+        for _changes in watchfiles.watch(
+            projects_dir,
+            recursive=False,
+            stop_event=self._wake,
+            rust_timeout=int(self.poll_interval * 1000),
+            yield_on_timeout=True,
+        ):
+            self._scan(projects_dir)
+
+    def _poll(self, projects_dir: Path):
+        while not self._wake.wait(self.poll_interval):
+            self._scan(projects_dir)
+
+
+sync_service = ProjectSyncService()
@@ -0,0 +1,275 @@
+# backend/tag_index.py - Inverted Tag Index for Library Items
+import heapq
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, false, func, not_, or_, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import LibraryItem, LibraryItemTag, Tag
+
+logger = logging.getLogger(__name__)
+
+TAG_MAX_LENGTH = 100
+REBUILD_BATCH = 1000
+
+# Parentheses, "quoted tags" and bare words
+TOKEN_RE = re.compile(r'\s*(\(|\)|"[^"]*"|[^\s()"]+)')
+OPERATORS = ("AND", "OR", "NOT")
+
+
+def normalize_tag(tag) -> str:
+    """Lower-case a tag and collapse its whitespace: '  Warm  Light' -> 'warm light'."""
+    return " ".join(str(tag).split()).lower()[:TAG_MAX_LENGTH]
+
+
+def normalize_tags(tags: Optional[Iterable]) -> List[str]:
+    """Normalized, de-duplicated tags in their original order."""
+    names = (normalize_tag(tag) for tag in tags or [])
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def get_or_create_tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """Map tag names to ids, inserting the ones that do not exist yet."""
+    if not names:
+        return {}
+    ids = dict(db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        db.execute(sqlite_insert(Tag.__table__).prefix_with("OR IGNORE"), [{"name": name} for name in missing])
+        ids.update(db.query(Tag.name, Tag.id).filter(Tag.name.in_(missing)).all())
+    return ids
+
+
+def set_item_tags(db: Session, item: LibraryItem, tags: Optional[Iterable]):
+    """Point the index rows of item at tags; only changed links are written."""
+    tag_ids = set(get_or_create_tag_ids(db, normalize_tags(tags)).values())
+    current = {link.tag_id: link for link in item.tag_links}
+    for tag_id, link in current.items():
+        if tag_id not in tag_ids:
+            item.tag_links.remove(link)
+        else:
+            link.library_id = item.library_id
+    for tag_id in tag_ids - current.keys():
+        item.tag_links.append(LibraryItemTag(tag_id=tag_id, library_id=item.library_id))
+
+
+def index_new_items(db: Session, items: List[Tuple[int, int, Optional[Iterable]]]) -> int:
+    """Add index rows for freshly inserted (item_id, library_id, tags) in bulk. Returns the number of links."""
+    normalized = [(item_id, library_id, normalize_tags(tags)) for item_id, library_id, tags in items]
+    ids = get_or_create_tag_ids(db, list(dict.fromkeys(name for *_, names in normalized for name in names)))
+    rows = [
+        {"item_id": item_id, "library_id": library_id, "tag_id": ids[name]}
+        for item_id, library_id, names in normalized
+        for name in names
+    ]
+    if rows:
+        db.execute(LibraryItemTag.__table__.insert(), rows)
+    return len(rows)
+
+
+def rebuild_tag_index(db: Session) -> int:
+    """Rebuild the whole index from LibraryItem.tags and commit. Returns the number of links."""
+    db.query(LibraryItemTag).delete(synchronize_session=False)
+    links = 0
+    item_ids = [row[0] for row in db.query(LibraryItem.id).order_by(LibraryItem.id)]
+    for start in range(0, len(item_ids), REBUILD_BATCH):
+        chunk = item_ids[start:start + REBUILD_BATCH]
+        rows = db.query(LibraryItem.id, LibraryItem.library_id, LibraryItem.tags).filter(LibraryItem.id.in_(chunk))
+        links += index_new_items(db, [tuple(row) for row in rows])
+    db.commit()
+    return links
+
+
+def ensure_tag_index():
+    """Build the index once for databases that predate it."""
+    db = SessionLocal()
+    try:
+        if db.query(LibraryItemTag.item_id).first() is not None:
+            return
+        if db.query(LibraryItem.id).filter(LibraryItem.tags.isnot(None)).first() is None:
+            return
+        links = rebuild_tag_index(db)
+        logger.info(f"Built tag index with {links} item tags")
+    finally:
+        db.close()
+
+
+# --- Tag expressions ---
+
+@dataclass
+class TagTerm:
+    name: str
+
+
+@dataclass
+class NotExpr:
+    operand: "TagExpr"
+
+
+@dataclass
+class BoolExpr:
+    op: str  # "AND" or "OR"
+    operands: List["TagExpr"]
+
+
+TagExpr = Union[TagTerm, NotExpr, BoolExpr]
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = TOKEN_RE.match(expression, pos)
+        if not match:
+            raise ValueError(f"Unexpected character at position {pos} in tag expression")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser; NOT binds tighter than AND, AND tighter than OR.
+
+    Adjacent terms without an operator are ANDed, so "outdoor warm" equals
+    "outdoor AND warm".
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def peek_operator(self) -> Optional[str]:
+        token = self.peek()
+        return token.upper() if token and token.upper() in OPERATORS else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of tag expression")
+        self.pos += 1
+        return token
+
+    def parse(self) -> TagExpr:
+        expr = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected '{self.peek()}' in tag expression")
+        return expr
+
+    def parse_or(self) -> TagExpr:
+        operands = [self.parse_and()]
+        while self.peek_operator() == "OR":
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else BoolExpr("OR", operands)
+
+    def parse_and(self) -> TagExpr:
+        operands = [self.parse_not()]
+        while self.peek() not in (None, ")") and self.peek_operator() != "OR":
+            if self.peek_operator() == "AND":
+                self.take()
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else BoolExpr("AND", operands)
+
+    def parse_not(self) -> TagExpr:
+        if self.peek_operator() == "NOT":
+            self.take()
+            return NotExpr(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> TagExpr:
+        token = self.take()
+        if token == "(":
+            expr = self.parse_or()
+            if self.take() != ")":
+                raise ValueError("Missing ')' in tag expression")
+            return expr
+        if token == ")" or token.upper() in OPERATORS:
+            raise ValueError(f"Expected a tag but found '{token}'")
+        name = normalize_tag(token[1:-1] if token.startswith('"') else token)
+        if not name:
+            raise ValueError("Empty tag in expression")
+        return TagTerm(name)
+
+
+def parse_tag_expression(expression: str) -> Optional[TagExpr]:
+    """Parse e.g. 'outdoor AND (warm OR "golden hour") AND NOT city'.
+
+    Returns None for an empty expression; raises ValueError if it is malformed.
+    """
+    tokens = _tokenize(expression or "")
+    return _Parser(tokens).parse() if tokens else None
+
+
+def _terms(expr: TagExpr) -> List[str]:
+    if isinstance(expr, TagTerm):
+        return [expr.name]
+    if isinstance(expr, NotExpr):
+        return _terms(expr.operand)
+    return [name for operand in expr.operands for name in _terms(operand)]
+
+
+def tag_filter(db: Session, expr: Optional[TagExpr]):
+    """Compile a parsed expression into a WHERE clause on LibraryItem.
+
+    Every tag becomes an id lookup on the (tag_id, item_id) index, so no
+    item rows or JSON are read to evaluate the expression.
+    """
+    if expr is None:
+        return true()
+    names = _terms(expr)
+    ids = dict(db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all())
+
+    def compile_expr(node: TagExpr):
+        if isinstance(node, TagTerm):
+            if node.name not in ids:
+                return false()
+            return LibraryItem.id.in_(select(LibraryItemTag.item_id).where(LibraryItemTag.tag_id == ids[node.name]))
+        if isinstance(node, NotExpr):
+            return not_(compile_expr(node.operand))
+        combine = and_ if node.op == "AND" else or_
+        return combine(*(compile_expr(operand) for operand in node.operands))
+
+    return compile_expr(expr)
+
+
+def _tag_counts(db: Session, library_id: Optional[int], condition=None) -> Dict[int, int]:
+    """Item count per tag id, optionally restricted to items matching condition."""
+    query = db.query(LibraryItemTag.tag_id, func.count())
+    if library_id is not None:
+        query = query.filter(LibraryItemTag.library_id == library_id)
+    if condition is not None:
+        query = query.filter(LibraryItemTag.item_id.in_(select(LibraryItem.id).where(condition)))
+    return dict(query.group_by(LibraryItemTag.tag_id).all())
+
+
+def tag_facets(db: Session, condition, library_id: Optional[int], matched: int, limit: int) -> List[dict]:
+    """Most common tags among the items matching condition, with their counts.
+
+    Counting tags of most of a library means visiting most of its items, so
+    when more than half of the items match, the tags of all items are counted
+    straight from the index and those of the non-matching items subtracted.
+    """
+    scope = true() if library_id is None else LibraryItem.library_id == library_id
+    in_scope = db.query(func.count(LibraryItem.id)).filter(scope).scalar()
+    if matched * 2 <= in_scope:
+        counts = _tag_counts(db, library_id, and_(scope, condition))
+    else:
+        counts = _tag_counts(db, library_id)
+        # coalesce: a filter on a column that is NULL (unreadable file headers)
+        # is NULL, not false, and NOT NULL would leave that item out of both sets
+        excluded = not_(func.coalesce(condition, false()))
+        for tag_id, n in _tag_counts(db, library_id, and_(scope, excluded)).items():
+            counts[tag_id] -= n
+
+    top = heapq.nlargest(limit, ((n, tag_id) for tag_id, n in counts.items() if n > 0))
+    names = dict(db.query(Tag.id, Tag.name).filter(Tag.id.in_([tag_id for _, tag_id in top])).all())
+    return sorted(({"tag": names[tag_id], "count": n} for n, tag_id in top), key=lambda f: (-f["count"], f["tag"]))
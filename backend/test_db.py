@@ -1,10 +1,21 @@
 # backend/test_db.py - Test database functionality
 import sys
 import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 sys.path.append(os.path.dirname(__file__))
 
-from database import SessionLocal, init_db
-from models import Settings, Library, LibraryItem, Tool
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from database import SQLITE_PROFILE, SessionLocal, create_sqlite_engine, init_db
+from models import Base, Settings, Library, LibraryItem, Project, Shot, Tool
+from library_hashes import _save_hashes
+from numbering import check_project_number, reserve_project_numbers
+from scanner import scan_projects_dir
+from tag_index import index_new_items, tag_facets
 
 def test_database():
     """Test database functionality"""
@@ -55,5 +66,198 @@ def test_database():
     finally:
         db.close()
 
+def test_tag_facets_null_metadata():
+    """Facet counts under a metadata filter leave out items whose headers could not be read"""
+    init_db()
+    db = SessionLocal()
+    try:
+        library = Library(name="Facet test", category="hdri")
+        db.add(library)
+        db.flush()
+        # Three readable 8K items and one with NULL metadata, all tagged outdoor
+        items = [
+            LibraryItem(library_id=library.id, name=f"item {i}", path=f"/facets/{i}.hdr", tags=["outdoor"], width=width)
+            for i, width in enumerate([8192, 8192, 8192, None])
+        ]
+        db.add_all(items)
+        db.flush()
+        index_new_items(db, [(item.id, library.id, item.tags) for item in items])
+
+        condition = LibraryItem.width >= 10
+        matched = db.query(LibraryItem).filter(LibraryItem.library_id == library.id, condition).count()
+        # 3 of 4 match, so the counts come from the library minus the non-matching items
+        facets = tag_facets(db, condition, library.id, matched, 10)
+        assert matched == 3
+        assert facets == [{"tag": "outdoor", "count": 3}], facets
+        print("✓ Facet counts exclude items with unreadable metadata")
+    finally:
+        db.rollback()
+        db.close()
+
+def scratch_sessions(root: Path):
+    """Write and read session factories on an empty database below root"""
+    url = f"sqlite:///{root}/scratch.db"
+    write_engine = create_sqlite_engine(url, SQLITE_PROFILE)
+    Base.metadata.create_all(bind=write_engine)
+    read_engine = create_sqlite_engine(url, SQLITE_PROFILE, read_only=True)
+    return (
+        sessionmaker(autocommit=False, autoflush=False, bind=write_engine),
+        sessionmaker(autocommit=False, autoflush=False, bind=read_engine),
+    )
+
+def test_scanner_rename_moves_shot_paths():
+    """Renaming a project folder on disk moves its shots to the new path"""
+    root = Path(tempfile.mkdtemp(prefix="scan_test_"))
+    try:
+        WriteSession, _ = scratch_sessions(root)
+        projects_dir = root / "Projects"
+        for shot in ("sh010", "sh020"):
+            (projects_dir / "250001_Old" / "vfx" / shot).mkdir(parents=True)
+
+        db = WriteSession()
+        try:
+            scan_projects_dir(db, projects_dir)
+            (projects_dir / "250001_Old").rename(projects_dir / "250001_New")
+            result = scan_projects_dir(db, projects_dir)
+            assert result.renamed == [{"from": "250001_Old", "to": "250001_New"}], result.renamed
+
+            project = db.query(Project).filter(Project.folder_name == "250001_New").one()
+            paths = sorted(path for (path,) in db.query(Shot.path).filter(Shot.project_id == project.id))
+            new_vfx = projects_dir / "250001_New" / "vfx"
+            assert paths == [str(new_vfx / "sh010"), str(new_vfx / "sh020")], paths
+            assert all(os.path.isdir(path) for path in paths)
+            print("✓ Shot paths follow a renamed project folder")
+        finally:
+            db.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def test_scanner_skip_counts():
+    """Unchanged folders are skipped without taking the write lock; changed ones are rescanned"""
+    root = Path(tempfile.mkdtemp(prefix="scan_test_"))
+    try:
+        WriteSession, ReadSession = scratch_sessions(root)
+        write_begins = []
+        event.listen(WriteSession.kw["bind"], "begin", lambda conn: write_begins.append(conn))
+        projects_dir = root / "Projects"
+        for folder in ("250001_A", "250002_B"):
+            (projects_dir / folder / "vfx" / "sh010").mkdir(parents=True)
+
+        def scan(**kwargs):
+            db, read_db = WriteSession(), ReadSession()
+            try:
+                return scan_projects_dir(db, projects_dir, read_db=read_db, **kwargs)
+            finally:
+                read_db.close()
+                db.close()
+
+        result = scan()
+        assert (result.rescanned, result.skipped, len(result.discovered)) == (2, 0, 2), result.to_dict()
+
+        begins = len(write_begins)
+        result = scan()
+        assert (result.rescanned, result.skipped) == (0, 2), result.to_dict()
+        assert len(write_begins) == begins, "an unchanged scan opened a write transaction"
+
+        # A new shot changes vfx/ but not the Projects directory: only a verify pass sees it
+        (projects_dir / "250001_A" / "vfx" / "sh020").mkdir()
+        result = scan()
+        assert (result.rescanned, result.skipped, result.shots_added) == (0, 2, 0), result.to_dict()
+        result = scan(verify=True)
+        assert (result.rescanned, result.skipped, result.shots_added) == (1, 1, 1), result.to_dict()
+
+        begins = len(write_begins)
+        result = scan(verify=True)
+        assert (result.rescanned, result.skipped) == (0, 2), result.to_dict()
+        assert len(write_begins) == begins, "an unchanged verify pass opened a write transaction"
+        print("✓ Scans report skipped and rescanned folders and stay read-only when nothing changed")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def test_save_hashes_skips_moved_items():
+    """A hash of the old file is not written to an item whose path changed meanwhile"""
+    init_db()
+    db = SessionLocal()
+    library = Library(name="Hash test", category="hdri")
+    db.add(library)
+    db.flush()
+    item = LibraryItem(library_id=library.id, name="moved", path="/hashes/new.hdr", tags=[])
+    db.add(item)
+    db.flush()
+    item_id = item.id
+    db.commit()
+
+    def stored_hash():
+        # End the read right away; write sessions hold the write lock while a transaction is open
+        try:
+            return db.query(LibraryItem.content_hash).filter(LibraryItem.id == item_id).scalar()
+        finally:
+            db.rollback()
+
+    try:
+        stale = {"id": item_id, "path": "/hashes/old.hdr", "content_hash": "old", "content_size": 1, "content_mtime_ns": 1}
+        _save_hashes([stale])
+        assert stored_hash() is None
+
+        _save_hashes([{**stale, "path": "/hashes/new.hdr", "content_hash": "new"}])
+        assert stored_hash() == "new"
+        print("✓ Hashes are only stored for the path that was hashed")
+    finally:
+        db.delete(item)
+        db.delete(library)
+        db.commit()
+        db.close()
+
+def test_project_number_reservation():
+    """Reserved numbers are unique across sessions; creation only accepts reserved, unused ones"""
+    root = Path(tempfile.mkdtemp(prefix="numbering_test_"))
+    try:
+        WriteSession, _ = scratch_sessions(root)
+        projects_dir = root / "Projects"
+        projects_dir.mkdir()
+
+        def reserve(_):
+            db = WriteSession()
+            try:
+                return reserve_project_numbers(db, 5, year_prefix="25")
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            numbers = [n for batch in pool.map(reserve, range(4)) for n in batch]
+        assert sorted(numbers) == [f"25{n:04d}" for n in range(1, 21)], numbers
+
+        db = WriteSession()
+        try:
+            db.add(Project(name="Used", folder_name="250001_Used", workspace_path=str(projects_dir / "250001_Used")))
+            db.commit()
+            (projects_dir / "250002_OnDisk").mkdir()
+
+            assert check_project_number(db, "250003_New", projects_dir) == "250003"
+            assert check_project_number(db, "250001_Used", projects_dir) == "250001"
+            assert check_project_number(db, "No_Number", projects_dir) is None
+            for folder_name, reason in [
+                ("250021_New", "has not been reserved"),
+                ("260001_New", "has not been reserved"),
+                ("250001_Other", "already used by 250001_Used"),
+                ("250002_Other", "already used by 250002_OnDisk"),
+            ]:
+                try:
+                    check_project_number(db, folder_name, projects_dir)
+                except ValueError as e:
+                    assert reason in str(e), e
+                else:
+                    raise AssertionError(f"{folder_name} was accepted")
+            print("✓ Project numbers are reserved uniquely and checked before creation")
+        finally:
+            db.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
 if __name__ == "__main__":
-    test_database() 
\ No newline at end of file
+    test_database()
+    test_tag_facets_null_metadata()
+    test_scanner_rename_moves_shot_paths()
+    test_scanner_skip_counts()
+    test_save_hashes_skips_moved_items()
+    test_project_number_reservation()
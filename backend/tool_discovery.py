@@ -0,0 +1,310 @@
+# backend/tool_discovery.py - Discovery of Installed DCC Executables
+import logging
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import ReadSessionLocal, SessionLocal
+from models import Settings as SettingsModel, Tool
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_WORKERS = int(os.environ.get("PIPELINE_TOOL_DISCOVERY_WORKERS", "16"))
+# Levels below <root>/Tools, and below a matching install directory in a prefix
+TOOLS_DIR_DEPTH = 3
+INSTALL_DIR_DEPTH = 4
+# Large directories inside installs that never hold the launcher binary
+SKIP_DIRS = {
+    "lib", "lib64", "libs", "include", "python", "plug-ins", "plugins", "resources", "doc", "docs",
+    "share", "examples", "presets", "scripts", "modules", "site-packages", "qml", "translations",
+    "frameworks", "fonts", "icons", "config", "houdini", "toolkit", "sdk", "devkit",
+}
+
+if sys.platform == "win32":
+    DEFAULT_PREFIXES = [
+        r"C:\Program Files", r"C:\Program Files\Autodesk", r"C:\Program Files\Side Effects Software",
+        r"C:\Program Files\Blender Foundation", r"C:\Program Files\Blackmagic Design",
+    ]
+elif sys.platform == "darwin":
+    DEFAULT_PREFIXES = ["/Applications", "/Applications/Autodesk"]
+else:
+    DEFAULT_PREFIXES = ["/opt", "/usr/autodesk", "/usr/local"]
+# Install prefixes to search, separated like PATH
+PREFIXES = [p for p in os.environ.get("PIPELINE_TOOL_PREFIXES", os.pathsep.join(DEFAULT_PREFIXES)).split(os.pathsep) if p]
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """How to recognise one application: its launcher file name, version and install folders"""
+    name: str
+    category: str
+    description: str
+    binary: re.Pattern
+    version: Optional[re.Pattern]
+    install_dir: re.Pattern
+
+
+def _spec(name, category, description, binary, version, install_dir) -> ToolSpec:
+    return ToolSpec(
+        name, category, description, re.compile(binary, re.IGNORECASE),
+        re.compile(version, re.IGNORECASE) if version else None, re.compile(install_dir, re.IGNORECASE),
+    )
+
+
+KNOWN_TOOLS = [
+    _spec("Maya", "3d", "3D Animation and Modeling",
+          r"^maya(\.exe)?$", r"maya(\d{4}(?:\.\d+)?)", r"^(autodesk|maya\d{4}.*|maya\.app)$"),
+    _spec("Nuke", "compositing", "Node-based Compositing",
+          r"^nuke(\d+\.\d+(v\d+)?)?(\.exe)?$", r"nuke(\d+\.\d+(?:v\d+)?)", r"^(nuke\d.*|(the )?foundry)$"),
+    _spec("Houdini", "3d", "Procedural 3D and VFX",
+          r"^houdini(fx|core)?(\.exe)?$", r"(?:hfs|houdini ?)(\d+\.\d+(?:\.\d+)?)",
+          r"^(hfs\d.*|houdini.*|side effects software)$"),
+    _spec("Blender", "3d", "Open Source 3D Suite",
+          r"^blender(\.exe)?$", r"blender[- _]?(\d+\.\d+(?:\.\d+)?)", r"^(blender.*|blender foundation)$"),
+    _spec("Mari", "texturing", "3D Texture Painting",
+          r"^mari(\d+\.\d+(v\d+)?)?(\.exe)?$", r"mari(\d+\.\d+(?:v\d+)?)", r"^(mari\d.*|(the )?foundry)$"),
+    _spec("Katana", "lighting", "Look Development and Lighting",
+          r"^katana(\.exe|\.bat)?$", r"katana(\d+\.\d+(?:v\d+)?)", r"^(katana\d.*|(the )?foundry)$"),
+    _spec("DaVinci Resolve", "editing", "Editing and Color Grading",
+          r"^resolve(\.exe)?$", None, r"^(resolve|davinci.*|blackmagic design)$"),
+]
+
+
+@dataclass
+class DiscoveredTool:
+    spec: ToolSpec
+    executable_path: str
+    version: Optional[str]
+    source: str  # "path", "tools" or "prefix"
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.spec.name} {self.version}" if self.version else self.spec.name
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.display_name,
+            "tool": self.spec.name,
+            "version": self.version,
+            "executable_path": self.executable_path,
+            "source": self.source,
+        }
+
+
+@dataclass
+class _Listing:
+    """What a directory holds, valid while its mtime is unchanged"""
+    mtime_ns: int
+    executables: List[Tuple[int, str]] = field(default_factory=list)  # (KNOWN_TOOLS index, path)
+    subdirs: List[str] = field(default_factory=list)
+
+
+def _is_executable(entry: os.DirEntry) -> bool:
+    try:
+        if not entry.is_file():
+            return False
+    except OSError:
+        return False
+    return sys.platform == "win32" or os.access(entry.path, os.X_OK)
+
+
+def _version_key(version: Optional[str]) -> Tuple[int, ...]:
+    return tuple(int(part) for part in re.findall(r"\d+", version or ""))
+
+
+def _detect_version(spec: ToolSpec, path: str) -> Optional[str]:
+    if spec.version is None:
+        return None
+    # The real path of a PATH symlink usually names the versioned install
+    for candidate in (os.path.realpath(path), path):
+        matches = spec.version.findall(candidate)
+        if matches:
+            # Nuke14.0v5/Nuke14.0: the most specific version, the innermost on a tie
+            return max(reversed(matches), key=lambda match: len(_version_key(match)))
+    return None
+
+
+class ToolDiscovery:
+    """Finds installed DCC applications in $PATH, <root_path>/Tools and install prefixes.
+
+    Directories are listed level by level on a thread pool. Every listing
+    is cached with the directory's mtime, which changes whenever an entry
+    is added, removed or renamed in it, so a repeat discovery costs one
+    stat per directory and lists only those that changed. Versions come
+    from the install path (maya2024, Nuke14.0v5, hfs19.5.605) rather than
+    from running the binaries, some of which take seconds to start.
+    """
+
+    def __init__(self, prefixes: List[str] = PREFIXES, workers: int = DISCOVERY_WORKERS):
+        self.prefixes = prefixes
+        self.workers = workers
+        self._listings: Dict[str, _Listing] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_summary: Optional[dict] = None
+
+    def _list_dir(self, path: str) -> Optional[_Listing]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._listings.get(path)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+        listing = _Listing(mtime_ns)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            listing.subdirs.append(entry.name)
+                            continue
+                    except OSError:
+                        continue
+                    for index, spec in enumerate(KNOWN_TOOLS):
+                        if spec.binary.match(entry.name) and _is_executable(entry):
+                            listing.executables.append((index, entry.path))
+                            break
+        except OSError:
+            return None
+        with self._lock:
+            self._listings[path] = listing
+        return listing
+
+    def _roots(self, root_path: Optional[str]) -> List[Tuple[str, int, bool, str]]:
+        """(directory, levels to descend, only into install dirs, source) for every search root."""
+        roots = [(p, 0, False, "path") for p in os.environ.get("PATH", "").split(os.pathsep) if p]
+        if root_path:
+            roots.append((str(Path(root_path) / "Tools"), TOOLS_DIR_DEPTH, False, "tools"))
+        roots.extend((prefix, INSTALL_DIR_DEPTH, True, "prefix") for prefix in self.prefixes)
+        return roots
+
+    def discover(self, root_path: Optional[str] = None) -> List[DiscoveredTool]:
+        """Every known tool found, newest version first within each tool."""
+        frontier = []
+        seen_dirs = set()
+        for path, depth, installs_only, source in self._roots(root_path):
+            key = os.path.normcase(os.path.abspath(path))
+            if key not in seen_dirs:
+                seen_dirs.add(key)
+                frontier.append((path, depth, installs_only, source))
+
+        found: Dict[str, DiscoveredTool] = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="tool-discovery") as pool:
+            while frontier:
+                listings = pool.map(self._list_dir, [path for path, _, _, _ in frontier])
+                next_frontier = []
+                for (path, depth, installs_only, source), listing in zip(frontier, listings):
+                    if listing is None:
+                        continue
+                    for index, executable in listing.executables:
+                        real = os.path.normcase(os.path.realpath(executable))
+                        if real not in found:
+                            spec = KNOWN_TOOLS[index]
+                            found[real] = DiscoveredTool(spec, executable, _detect_version(spec, executable), source)
+                    if depth <= 0:
+                        continue
+                    for name in listing.subdirs:
+                        if name.lower() in SKIP_DIRS or name.startswith("."):
+                            continue
+                        # At the top of a prefix like /opt, only enter folders named like an install
+                        if installs_only and not any(spec.install_dir.match(name) for spec in KNOWN_TOOLS):
+                            continue
+                        child = os.path.join(path, name)
+                        key = os.path.normcase(child)
+                        if key not in seen_dirs:
+                            seen_dirs.add(key)
+                            next_frontier.append((child, depth - 1, False, source))
+                frontier = next_frontier
+
+        order = {spec.name: index for index, spec in enumerate(KNOWN_TOOLS)}
+        return sorted(found.values(), key=lambda tool: (
+            order[tool.spec.name], tool.version is None, tuple(-part for part in _version_key(tool.version))
+        ))
+
+    def sync(self) -> dict:
+        """Discover tools below the configured root and upsert them into the tools table."""
+        with self._sync_lock:
+            db = ReadSessionLocal()
+            try:
+                settings = db.query(SettingsModel).first()
+                root_path = settings.root_path if settings else None
+            finally:
+                db.close()
+            discovered = self.discover(root_path)
+            db = SessionLocal()
+            try:
+                summary = upsert_tools(db, discovered)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            summary["tools"] = [tool.to_dict() for tool in discovered]
+            self.last_summary = summary
+            logger.info(f"Tool discovery found {len(discovered)} executables: "
+                        f"{summary['added']} added, {summary['filled']} filled, {summary['updated']} updated")
+            return summary
+
+    def start(self):
+        """Run sync on a background thread unless one is already running."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="tool-discovery", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.sync()
+        except Exception as e:
+            logger.error(f"Tool discovery failed: {e}")
+
+
+def upsert_tools(db: Session, discovered: List[DiscoveredTool]) -> dict:
+    """Bring Tool rows in line with discovered executables. The caller commits, once.
+
+    A row with the same executable path gets the detected version; a
+    seeded row with no path (e.g. "Maya" from init_db) gets the newest
+    version; any other version becomes a new row such as "Maya 2023".
+    Rows are never deleted, since they carry favorites and usage.
+    """
+    tools = db.query(Tool).all()
+    by_path = {os.path.normcase(tool.executable_path): tool for tool in tools if tool.executable_path}
+    unset = {tool.name.lower(): tool for tool in tools if not tool.executable_path}
+    summary = {"added": 0, "filled": 0, "updated": 0, "unchanged": 0}
+    for found in discovered:
+        tool = by_path.get(os.path.normcase(found.executable_path))
+        if tool is not None:
+            if tool.version == found.version:
+                summary["unchanged"] += 1
+                continue
+            tool.version = found.version
+            summary["updated"] += 1
+            continue
+        tool = unset.pop(found.spec.name.lower(), None)
+        if tool is not None:
+            tool.executable_path = found.executable_path
+            tool.version = found.version
+            summary["filled"] += 1
+        else:
+            tool = Tool(
+                name=found.display_name, category=found.spec.category, description=found.spec.description,
+                executable_path=found.executable_path, version=found.version,
+            )
+            db.add(tool)
+            summary["added"] += 1
+        by_path[os.path.normcase(found.executable_path)] = tool
+    return summary
+
+
+tool_discovery = ToolDiscovery()
@@ -0,0 +1,110 @@
+# backend/versions.py - Collection Change Versions for HTTP Caching
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+COLLECTIONS = ("projects", "libraries", "tools", "settings")
+
+# Which collection a write to each table changes
+TABLE_COLLECTIONS = {
+    "projects": "projects",
+    "shots": "projects",
+    "libraries": "libraries",
+    "library_items": "libraries",
+    "library_item_tags": "libraries",
+    "tags": "libraries",
+    "tools": "tools",
+    "settings": "settings",
+}
+
+_PENDING_KEY = "changed_collections"
+
+
+class CollectionVersions:
+    """Monotonic per-collection change counters, bumped after each committed write.
+
+    Counters live in memory and restart at zero, so ETags also carry an
+    epoch unique to this process; a validator from before a restart never
+    matches.
+    """
+
+    def __init__(self):
+        self.epoch = f"{time.time_ns():x}"
+        self._versions: Dict[str, int] = dict.fromkeys(COLLECTIONS, 0)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, int]], None]] = []
+
+    def get(self, collection: str) -> int:
+        return self._versions[collection]
+
+    def bump(self, *collections: str):
+        with self._lock:
+            for collection in collections:
+                self._versions[collection] += 1
+            changed = {collection: self._versions[collection] for collection in collections}
+        for listener in self._listeners:
+            listener(changed)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._versions)
+
+    def add_listener(self, listener: Callable[[Dict[str, int]], None]):
+        """Call listener with {collection: new version} after every bump, on the bumping thread."""
+        self._listeners.append(listener)
+
+    def etag(self, *collections: str) -> str:
+        """Weak ETag for a response built from collections."""
+        parts = ".".join(str(self._versions[collection]) for collection in collections)
+        return f'W/"{self.epoch}-{parts}"'
+
+
+versions = CollectionVersions()
+
+
+def mark_changed(db: Session, *collections: str):
+    """Bump collections once db's current transaction commits.
+
+    ORM unit-of-work changes and ORM insert/update/delete statements are
+    picked up automatically; call this for bulk_*_mappings and text() SQL.
+    """
+    db.info.setdefault(_PENDING_KEY, set()).update(collections)
+
+
+def _mark_tables(db: Session, tables):
+    changed = {TABLE_COLLECTIONS[name] for name in tables if name in TABLE_COLLECTIONS}
+    if changed:
+        mark_changed(db, *changed)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    _mark_tables(session, {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, "__table__")
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _mark_tables(orm_execute_state.session, [table.name])
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    # Bumped only once the rows are visible, so an ETag never labels stale data
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed:
+        versions.bump(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
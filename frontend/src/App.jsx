@@ -1,9 +1,14 @@
 // frontend/src/App.jsx - Simplified for VFX Projects
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Folder, Plus, Settings, Play, Star, Clock, Search, ExternalLink, Film, Image } from 'lucide-react';
 import CreateProjectModal from './Components/CreateProjectModal';
 import SettingsModal from './Components/SettingsModal';
 import Library from './Components/Library';
+import { changeService } from './services/api';
+
+const PROJECT_PAGE_SIZE = 100;
+// Wait for typing to pause before searching on the server
+const SEARCH_DEBOUNCE_MS = 300;
 
 // Enhanced ProjectCard component for VFX projects
 const ProjectCard = ({ project }) => {
@@ -157,25 +162,58 @@ const ToolCard = ({ tool, onLaunch }) => {
 function App() {
   const [activeTab, setActiveTab] = useState('projects');
   const [projects, setProjects] = useState([]);
+  const [projectTotal, setProjectTotal] = useState(0);
+  const [projectCursor, setProjectCursor] = useState(null);
   const [tools, setTools] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showCreateProject, setShowCreateProject] = useState(false);
   const [showSettings, setShowSettings] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
+  // The change subscription outlives renders; it reads the current query from here
+  const searchQueryRef = useRef('');
+
+  useEffect(() => {
+    const timer = setTimeout(() => setSearchQuery(searchTerm.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  useEffect(() => {
+    if (searchQueryRef.current === searchQuery) return;
+    searchQueryRef.current = searchQuery;
+    setProjectCursor(null);
+    loadData({ quiet: true });
+  }, [searchQuery]);
 
   useEffect(() => {
     loadData();
+    // Refetch quietly when another client or the folder sync changes the data
+    return changeService.subscribe((changes) => {
+      if (changes.projects !== undefined || changes.tools !== undefined) {
+        loadData({ quiet: true });
+      }
+    });
   }, []);
 
-  const loadData = async () => {
+  const searchParam = () => (
+    searchQueryRef.current ? `&q=${encodeURIComponent(searchQueryRef.current)}` : ''
+  );
+
+  // Loads the first page again, so a new search starts over from the top
+  const loadData = async ({ quiet = false } = {}) => {
+    const q = searchParam();
     try {
-      setLoading(true);
-      const [projectsData, toolsData] = await Promise.all([
-        fetch('http://localhost:8000/projects').then(res => res.json()),
-        fetch('http://localhost:8000/tools').then(res => res.json())
+      if (!quiet) setLoading(true);
+      const [projectsPage, toolsPage] = await Promise.all([
+        fetch(`http://localhost:8000/projects?limit=${PROJECT_PAGE_SIZE}${q}`).then(res => res.json()),
+        fetch(`http://localhost:8000/tools?limit=500${q}`).then(res => res.json())
       ]);
-      setProjects(projectsData);
-      setTools(toolsData);
+      // A newer search was started while this one was in flight
+      if (q !== searchParam()) return;
+      setProjects(projectsPage.items);
+      setProjectTotal(projectsPage.total);
+      setProjectCursor(projectsPage.next_cursor);
+      setTools(toolsPage.items);
     } catch (error) {
       console.error('Failed to load data:', error);
     } finally {
@@ -183,6 +221,21 @@ function App() {
     }
   };
 
+  const loadMoreProjects = async () => {
+    const q = searchParam();
+    try {
+      const page = await fetch(
+        `http://localhost:8000/projects?limit=${PROJECT_PAGE_SIZE}&after=${encodeURIComponent(projectCursor)}${q}`
+      ).then(res => res.json());
+      if (q !== searchParam()) return;
+      setProjects(current => [...current, ...page.items]);
+      setProjectTotal(page.total);
+      setProjectCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Failed to load more projects:', error);
+    }
+  };
+
   const handleCreateProject = async (projectData) => {
     try {
       await loadData(); // Reload projects after creation
@@ -194,25 +247,19 @@ function App() {
 
   const handleLaunchTool = async (toolId) => {
     try {
-      await fetch(`http://localhost:8000/tools/${toolId}/launch`, {
+      const response = await fetch(`http://localhost:8000/tools/${toolId}/launch`, {
         method: 'POST'
       });
-      await loadData(); // Reload to update last_used timestamp
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail);
+      }
+      // last_used is written in the background; the change stream reloads tools when it lands
     } catch (error) {
       console.error('Failed to launch tool:', error);
     }
   };
 
-  const filteredProjects = projects.filter(project =>
-    project.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    project.client?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
-  const filteredTools = tools.filter(tool =>
-    tool.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    tool.description?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="min-h-screen bg-gray-900 flex items-center justify-center">
@@ -280,7 +327,7 @@ function App() {
               }`}
             >
               <Film className="inline w-4 h-4 mr-2" />
-              VFX Projects ({projects.length})
+              VFX Projects ({projectTotal})
             </button>
             <button
               onClick={() => setActiveTab('tools')}
@@ -319,13 +366,24 @@ function App() {
               </div>
             </div>
 
-            {filteredProjects.length > 0 ? (
+            {projects.length > 0 && (
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-                {filteredProjects.map((project) => (
+                {projects.map((project) => (
                   <ProjectCard key={project.id} project={project} />
                 ))}
               </div>
-            ) : (
+            )}
+            {projectCursor && (
+              <div className="mt-6 text-center">
+                <button
+                  onClick={loadMoreProjects}
+                  className="bg-gray-700 hover:bg-gray-600 px-4 py-2 rounded-lg text-sm transition-colors"
+                >
+                  Load more ({projects.length} of {projectTotal})
+                </button>
+              </div>
+            )}
+            {projects.length === 0 && !projectCursor && (
               <div className="text-center py-12">
                 <Film className="mx-auto h-12 w-12 text-gray-600" />
                 <h3 className="mt-2 text-sm font-medium text-gray-300">No VFX projects found</h3>
@@ -357,9 +415,9 @@ function App() {
               </div>
             </div>
 
-            {filteredTools.length > 0 ? (
+            {tools.length > 0 ? (
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-                {filteredTools.map((tool) => (
+                {tools.map((tool) => (
                   <ToolCard
                     key={tool.id}
                     tool={tool}
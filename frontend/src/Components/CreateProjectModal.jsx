@@ -54,6 +54,20 @@ function CreateProjectModal({ isOpen, onClose, onProjectCreated }) {
     }
   }
 
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const jobResponse = await fetch(`http://localhost:8000/projects/jobs/${jobId}`)
+      if (!jobResponse.ok) {
+        throw new Error('Lost track of project creation job')
+      }
+      const job = await jobResponse.json()
+      if (job.status === 'completed') return job.result.project
+      if (job.status === 'failed') throw new Error(job.error || 'Failed to create project')
+      if (job.status === 'cancelled') throw new Error('Project creation was cancelled')
+      await new Promise(resolve => setTimeout(resolve, 500))
+    }
+  }
+
   if (!isOpen) return null
 
   const handleSubmit = async (e) => {
@@ -77,14 +91,12 @@ function CreateProjectModal({ isOpen, onClose, onProjectCreated }) {
       setLoading(true)
       setError('')
 
-      // Clean project name for folder creation
-      const cleanName = formData.name.replace(/[^a-zA-Z0-9\s]/g, '').replace(/\s+/g, '_')
-      const projectFolderName = `${nextProjectNumber}_${cleanName}`
-
+      // No folderName: the backend reserves the project number when it creates
+      // the project, so two people creating at once never get the same number.
+      // nextProjectNumber is only a preview of it.
       const projectData = {
         ...formData,
         type: 'general_vfx', // Always General VFX
-        folderName: projectFolderName,
         rootPath: settings.rootPath
       }
 
@@ -101,7 +113,9 @@ function CreateProjectModal({ isOpen, onClose, onProjectCreated }) {
         throw new Error(errorData.detail || 'Failed to create project')
       }
 
-      const project = await response.json()
+      // Creation runs as a background job; wait for it to finish
+      const { job } = await response.json()
+      const project = await waitForJob(job.id)
       onProjectCreated(project)
 
       // Reset form
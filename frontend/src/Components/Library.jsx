@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import { Copy, Image, Folder, Plus, Search, Tag, Edit } from 'lucide-react'
-import { libraryService } from '../services/api'
+import { changeService, libraryService } from '../services/api'
 import AddHDRIModal from './AddHDRIModal'
 import EditHDRIModal from './EditHDRIModal'
 
@@ -17,16 +17,20 @@ function Library() {
 
   useEffect(() => {
     loadLibraries()
+    return changeService.subscribe((changes) => {
+      if (changes.libraries !== undefined) {
+        loadLibraries({ quiet: true })
+      }
+    })
   }, [])
 
-  const loadLibraries = async () => {
+  const loadLibraries = async ({ quiet = false } = {}) => {
     try {
-      setLoading(true)
+      if (!quiet) setLoading(true)
       const data = await libraryService.getLibraries()
       setLibraries(data)
-      if (data.length > 0) {
-        setSelectedLibrary(data[0])
-      }
+      // Keep the open library selected across background reloads
+      setSelectedLibrary(current => data.find(library => current && library.id === current.id) || data[0] || null)
     } catch (error) {
       console.error('Failed to load libraries:', error)
       setError('Failed to load libraries')
@@ -191,7 +195,7 @@ function Library() {
                         <div className="aspect-video bg-gray-700 relative">
                           {item.preview_path ? (
                             <img
-                              src={`file://${item.preview_path}`}
+                              src={libraryService.getPreviewUrl(selectedLibrary.id, item.id)}
                               alt={item.name}
                               className="w-full h-full object-cover"
                               onError={(e) => {
@@ -30,8 +30,9 @@ export const settingsService = {
 
 // Project API
 export const projectService = {
-  async getProjects() {
-    const response = await api.get('/projects')
+  // Returns one page: { items, total, next_cursor }; pass next_cursor as params.after
+  async getProjects(params = {}) {
+    const response = await api.get('/projects', { params })
     return response.data
   },
 
@@ -68,8 +69,9 @@ export const projectService = {
 
 // Tool API
 export const toolService = {
-  async getTools() {
-    const response = await api.get('/tools')
+  // Returns one page: { items, total, next_cursor }
+  async getTools(params = {}) {
+    const response = await api.get('/tools', { params })
     return response.data
   },
 
@@ -132,5 +134,21 @@ export const libraryService = {
   async deleteLibraryItem(libraryId, itemId) {
     const response = await api.delete(`/libraries/${libraryId}/items/${itemId}`)
     return response.data
+  },
+
+  getPreviewUrl(libraryId, itemId, size) {
+    const query = size ? `?size=${size}` : ''
+    return `${API_BASE_URL}/libraries/${libraryId}/items/${itemId}/preview${query}`
+  }
+}
+
+// Change notifications
+export const changeService = {
+  // Calls onChange with the collections that changed, e.g. { projects: 12 };
+  // EventSource reconnects on its own. Returns a function that closes the stream.
+  subscribe(onChange) {
+    const source = new EventSource(`${API_BASE_URL}/events`)
+    source.addEventListener('change', (event) => onChange(JSON.parse(event.data)))
+    return () => source.close()
   }
-}
\ No newline at end of file
+}
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 import requests
 import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Test API endpoints
 BASE_URL = "http://localhost:8000"
@@ -33,12 +38,23 @@ def test_projects():
     response = requests.get(f"{BASE_URL}/projects")
     print(f"GET /projects: {response.status_code}")
     if response.status_code == 200:
-        projects = response.json()
-        print(f"Found {len(projects)} projects:")
+        page = response.json()
+        projects = page["items"]
+        assert page["total"] >= len(projects), page
+        assert "next_cursor" in page, page
+        print(f"Found {len(projects)} of {page['total']} projects (next_cursor: {page['next_cursor']}):")
         for project in projects:
             print(f"  - {project['name']} ({project['folder_name']})")
     else:
         print(f"Error: {response.text}")
+
+    # Server-side search
+    response = requests.get(f"{BASE_URL}/projects", params={"q": "nosuchprojectname"})
+    print(f"GET /projects?q=nosuchprojectname: {response.status_code}")
+    assert response.status_code == 200 and response.json()["total"] == 0, response.text
+    response = requests.get(f"{BASE_URL}/tools", params={"q": "maya"})
+    print(f"GET /tools?q=maya: {[tool['name'] for tool in response.json()['items']]}")
+    assert all("maya" in tool["name"].lower() for tool in response.json()["items"]), response.text
     
     # Manual scan
     response = requests.get(f"{BASE_URL}/projects/scan")
@@ -49,10 +65,64 @@ def test_projects():
     else:
         print(f"Error: {response.text}")
 
+def test_concurrent_project_creation():
+    print("\n=== Testing Concurrent Project Creation ===")
+    # Work in a scratch root so no projects are left in the real one
+    original_settings = requests.get(f"{BASE_URL}/settings").json()
+    root_path = tempfile.mkdtemp(prefix="pipeline_api_test_")
+    requests.post(f"{BASE_URL}/settings", json={**original_settings, "rootPath": root_path}).raise_for_status()
+    jobs = []
+
+    def create(folder_name=None):
+        data = {"name": "Concurrency Test", "shots": ["shot01"], "rootPath": root_path}
+        if folder_name:
+            data["folderName"] = folder_name
+        response = requests.post(f"{BASE_URL}/projects/create", json=data)
+        if response.status_code == 202:
+            jobs.append(response.json()["job"]["id"])
+        return response
+
+    try:
+        # Two creations at once without a number each get their own
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            responses = list(pool.map(lambda _: create(), range(2)))
+        folder_names = [response.json()["folderName"] for response in responses]
+        print(f"POST /projects/create x2: {[r.status_code for r in responses]} -> {folder_names}")
+        assert all(response.status_code == 202 for response in responses)
+        assert folder_names[0][:6] != folder_names[1][:6], "Both creations got the same project number"
+
+        # Two creations at once claiming the same reserved number: only one is accepted
+        number = requests.post(f"{BASE_URL}/projects/numbers/reserve").json()["numbers"][0]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            responses = list(pool.map(create, [f"{number}_Concurrency_A", f"{number}_Concurrency_B"]))
+        codes = sorted(response.status_code for response in responses)
+        print(f"POST /projects/create x2 with {number}: {codes}")
+        assert codes == [202, 409], codes
+
+        # A number that was never reserved is rejected
+        year = number[:2]
+        response = create(f"{year}9999_Concurrency_C")
+        print(f"POST /projects/create with an unreserved number: {response.status_code}")
+        assert response.status_code == 409
+    finally:
+        # Let the jobs finish, remove their folders and rescan so their rows are tombstoned
+        deadline = time.monotonic() + 30
+        for job_id in jobs:
+            while time.monotonic() < deadline:
+                if requests.get(f"{BASE_URL}/projects/jobs/{job_id}").json()["status"] not in ("queued", "running"):
+                    break
+                time.sleep(0.1)
+        shutil.rmtree(os.path.join(root_path, "Projects"), ignore_errors=True)
+        os.makedirs(os.path.join(root_path, "Projects"))
+        requests.get(f"{BASE_URL}/projects/scan", params={"full": True})
+        requests.post(f"{BASE_URL}/settings", json=original_settings)
+        shutil.rmtree(root_path, ignore_errors=True)
+
 if __name__ == "__main__":
     try:
         test_settings()
         test_projects()
+        test_concurrent_project_creation()
     except requests.exceptions.ConnectionError:
         print("Error: Could not connect to the API. Make sure the backend is running.")
     except Exception as e: